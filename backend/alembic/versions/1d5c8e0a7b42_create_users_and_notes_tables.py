@@ -0,0 +1,63 @@
+"""create users and notes tables
+
+Revision ID: 1d5c8e0a7b42
+Revises: 
+Create Date: 2026-10-19 09:14:52.618370
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1d5c8e0a7b42'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _id_type(dialect_name):
+    if dialect_name == 'postgresql':
+        return postgresql.UUID(as_uuid=False)
+    return sa.String(32)
+
+
+def upgrade() -> None:
+    # The schema the first migrations were written against, which used to be
+    # created by Base.metadata.create_all; databases that predate this
+    # revision are already past it and never run it. SQLite IDs start as hex
+    # strings and become blobs in 9d2f6b1e4a57, like they did there.
+    id_type = _id_type(op.get_bind().dialect.name)
+
+    op.create_table(
+        'users',
+        sa.Column('id', id_type, primary_key=True),
+        sa.Column('email', sa.String(255), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'notes',
+        sa.Column('id', id_type, primary_key=True),
+        sa.Column('user_id', id_type, sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('title', sa.String(255), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False, server_default=''),
+        sa.Column('tags', sa.Text(), nullable=False, server_default=''),
+        sa.Column('status', sa.String(20), nullable=False, server_default='active'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.CheckConstraint("status IN ('active', 'archived')", name='check_status'),
+    )
+    op.create_index('idx_notes_user_id', 'notes', ['user_id'])
+    op.create_index('idx_notes_user_status', 'notes', ['user_id', 'status'])
+    op.create_index('idx_notes_created_at', 'notes', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_table('notes')
+    op.drop_table('users')
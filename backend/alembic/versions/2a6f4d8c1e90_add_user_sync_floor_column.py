@@ -0,0 +1,27 @@
+"""add user sync_floor column
+
+Revision ID: 2a6f4d8c1e90
+Revises: 7f3a9c2e5d18
+Create Date: 2026-10-18 23:52:37.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a6f4d8c1e90'
+down_revision: Union[str, None] = '7f3a9c2e5d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # No tombstone has been pruned yet, so every sync token stays valid
+    op.add_column('users', sa.Column('sync_floor', sa.BigInteger(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'sync_floor')
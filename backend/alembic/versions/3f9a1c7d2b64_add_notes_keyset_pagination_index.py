@@ -0,0 +1,30 @@
+"""add notes keyset pagination index
+
+Revision ID: 3f9a1c7d2b64
+Revises: 0486227a5f85
+Create Date: 2026-10-18 10:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c7d2b64'
+down_revision: Union[str, None] = '0486227a5f85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'idx_notes_user_created_id',
+        'notes',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_notes_user_created_id', table_name='notes')
@@ -0,0 +1,67 @@
+"""add note content compression
+
+Revision ID: 4c7e1a9b2d36
+Revises: e3b8a4c61f92
+Create Date: 2026-10-18 19:12:45.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7e1a9b2d36'
+down_revision: Union[str, None] = 'e3b8a4c61f92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_fts_triggers(content, update_columns):
+    op.execute(f"""
+        CREATE TRIGGER notes_fts_insert AFTER INSERT ON notes BEGIN
+            INSERT INTO notes_fts (note_id, title, content, tags)
+            VALUES (new.id, new.title, {content}, new.tags);
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER notes_fts_update AFTER UPDATE OF {update_columns} ON notes BEGIN
+            DELETE FROM notes_fts WHERE note_id = old.id;
+            INSERT INTO notes_fts (note_id, title, content, tags)
+            VALUES (new.id, new.title, {content}, new.tags);
+        END
+    """)
+
+
+def _drop_fts_triggers():
+    op.execute("DROP TRIGGER IF EXISTS notes_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS notes_fts_insert")
+
+
+def upgrade() -> None:
+    # Existing rows stay uncompressed with a NULL length until
+    # `python -m app.compress_notes` rewrites them in batches
+    op.add_column('notes', sa.Column('content_blob', sa.LargeBinary(), nullable=True))
+    op.add_column('notes', sa.Column('content_length', sa.Integer(), nullable=True))
+
+    if op.get_bind().dialect.name == 'sqlite':
+        # note_content() is registered on every connection by app.database
+        _drop_fts_triggers()
+        _create_fts_triggers(
+            'note_content(new.content, new.content_blob)',
+            'title, content, content_blob, tags'
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("""
+            UPDATE notes SET content = note_content(content, content_blob)
+            WHERE content_blob IS NOT NULL
+        """)
+        _drop_fts_triggers()
+        _create_fts_triggers('new.content', 'title, content, tags')
+
+    op.drop_column('notes', 'content_length')
+    op.drop_column('notes', 'content_blob')
@@ -0,0 +1,26 @@
+"""add notes user/updated_at index
+
+Revision ID: 5e0b93d4c8a1
+Revises: c51d8e3a7f20
+Create Date: 2026-10-18 13:21:50.117392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b93d4c8a1'
+down_revision: Union[str, None] = 'c51d8e3a7f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_notes_user_updated', 'notes', ['user_id', 'updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_notes_user_updated', table_name='notes')
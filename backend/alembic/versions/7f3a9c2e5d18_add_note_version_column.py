@@ -0,0 +1,27 @@
+"""add note version column
+
+Revision ID: 7f3a9c2e5d18
+Revises: b6d2f0e8a513
+Create Date: 2026-10-18 22:41:09.207583
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3a9c2e5d18'
+down_revision: Union[str, None] = 'b6d2f0e8a513'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing notes start at version 1; the first update after this makes them 2
+    op.add_column('notes', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    op.drop_column('notes', 'version')
@@ -1,7 +1,7 @@
 """Add tags column to notes table
 
 Revision ID: 8cbe2ffc5dc3
-Revises: 
+Revises: 1d5c8e0a7b42
 Create Date: 2026-01-04 01:35:41.047255
 
 """
@@ -13,7 +13,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision: str = '8cbe2ffc5dc3'
-down_revision: Union[str, None] = None
+down_revision: Union[str, None] = '1d5c8e0a7b42'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
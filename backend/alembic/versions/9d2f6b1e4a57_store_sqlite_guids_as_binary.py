@@ -0,0 +1,60 @@
+"""store sqlite guids as binary
+
+Revision ID: 9d2f6b1e4a57
+Revises: 5e0b93d4c8a1
+Create Date: 2026-10-18 15:02:37.804216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2f6b1e4a57'
+down_revision: Union[str, None] = '5e0b93d4c8a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every column mapped with models.GUID, plus the FTS5 table's copy of notes.id
+GUID_COLUMNS = {
+    'users': ['id'],
+    'notes': ['id', 'user_id'],
+    'tags': ['id', 'user_id'],
+    'note_tags': ['note_id', 'tag_id'],
+    'notes_fts': ['note_id'],
+}
+
+
+def _guid_unhex(value):
+    return bytes.fromhex(value) if isinstance(value, str) else value
+
+
+def _guid_hex(value):
+    return value.hex() if isinstance(value, bytes) else value
+
+
+def _convert(function_name, function):
+    # PostgreSQL keeps its native uuid columns. SQLite is dynamically typed,
+    # so the stored values are rewritten in place and the declared column
+    # types are left alone: rebuilding notes would drop its FTS triggers.
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+
+    bind.connection.driver_connection.create_function(function_name, 1, function, deterministic=True)
+    # Parent and child keys change in separate statements; check the foreign
+    # keys once at commit instead of after each one.
+    op.execute('PRAGMA defer_foreign_keys = ON')
+    for table, columns in GUID_COLUMNS.items():
+        assignments = ', '.join(f'{column} = {function_name}({column})' for column in columns)
+        op.execute(f'UPDATE {table} SET {assignments}')
+
+
+def upgrade() -> None:
+    _convert('guid_unhex', _guid_unhex)
+
+
+def downgrade() -> None:
+    _convert('guid_hex', _guid_hex)
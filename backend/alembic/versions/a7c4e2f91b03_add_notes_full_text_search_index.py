@@ -0,0 +1,70 @@
+"""add notes full-text search index
+
+Revision ID: a7c4e2f91b03
+Revises: 3f9a1c7d2b64
+Create Date: 2026-10-18 11:02:17.304981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c4e2f91b03'
+down_revision: Union[str, None] = '3f9a1c7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("""
+            ALTER TABLE notes ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(tags, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(content, '')), 'C')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX idx_notes_search_vector ON notes USING GIN (search_vector)")
+    else:
+        op.execute("""
+            CREATE VIRTUAL TABLE notes_fts USING fts5(
+                note_id UNINDEXED, title, content, tags, tokenize = 'porter unicode61'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER notes_fts_insert AFTER INSERT ON notes BEGIN
+                INSERT INTO notes_fts (note_id, title, content, tags)
+                VALUES (new.id, new.title, new.content, new.tags);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER notes_fts_delete AFTER DELETE ON notes BEGIN
+                DELETE FROM notes_fts WHERE note_id = old.id;
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER notes_fts_update AFTER UPDATE OF title, content, tags ON notes BEGIN
+                DELETE FROM notes_fts WHERE note_id = old.id;
+                INSERT INTO notes_fts (note_id, title, content, tags)
+                VALUES (new.id, new.title, new.content, new.tags);
+            END
+        """)
+        op.execute("""
+            INSERT INTO notes_fts (note_id, title, content, tags)
+            SELECT id, title, content, tags FROM notes
+        """)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('idx_notes_search_vector', table_name='notes')
+        op.drop_column('notes', 'search_vector')
+    else:
+        op.execute("DROP TRIGGER IF EXISTS notes_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS notes_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS notes_fts_insert")
+        op.execute("DROP TABLE IF EXISTS notes_fts")
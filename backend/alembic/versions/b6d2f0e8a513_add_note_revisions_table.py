@@ -0,0 +1,45 @@
+"""add note revisions table
+
+Revision ID: b6d2f0e8a513
+Revises: 4c7e1a9b2d36
+Create Date: 2026-10-18 21:03:27.540116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d2f0e8a513'
+down_revision: Union[str, None] = '4c7e1a9b2d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _id_type(dialect_name):
+    if dialect_name == 'postgresql':
+        return postgresql.UUID(as_uuid=False)
+    return sa.LargeBinary()
+
+
+def upgrade() -> None:
+    # History starts empty; notes get revisions from their next update on
+    op.create_table(
+        'note_revisions',
+        sa.Column('note_id', _id_type(op.get_bind().dialect.name),
+                  sa.ForeignKey('notes.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('revision', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('title', sa.String(255), nullable=False),
+        sa.Column('tags', sa.Text(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('delta', sa.Text(), nullable=True),
+        sa.Column('content_length', sa.Integer(), nullable=False),
+        sa.Column('saved_at', sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('note_revisions')
@@ -0,0 +1,110 @@
+"""add tags and note_tags tables
+
+Revision ID: c51d8e3a7f20
+Revises: a7c4e2f91b03
+Create Date: 2026-10-18 11:48:05.772614
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51d8e3a7f20'
+down_revision: Union[str, None] = 'a7c4e2f91b03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _id_type(dialect_name):
+    if dialect_name == 'postgresql':
+        return postgresql.UUID(as_uuid=False)
+    return sa.String(32)
+
+
+def _new_id(dialect_name):
+    value = uuid.uuid4()
+    return str(value) if dialect_name == 'postgresql' else value.hex
+
+
+def _parse_tags(tags):
+    names = []
+    for name in (tags or '').split(','):
+        name = name.strip().lower()[:255]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    dialect_name = bind.dialect.name
+    id_type = _id_type(dialect_name)
+
+    tags = op.create_table(
+        'tags',
+        sa.Column('id', id_type, primary_key=True),
+        sa.Column('user_id', id_type, sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('name', sa.String(255), nullable=False),
+        sa.UniqueConstraint('user_id', 'name', name='uq_tags_user_name'),
+    )
+    note_tags = op.create_table(
+        'note_tags',
+        sa.Column('note_id', id_type, sa.ForeignKey('notes.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('tag_id', id_type, sa.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    )
+    op.create_index('idx_note_tags_tag_note', 'note_tags', ['tag_id', 'note_id'])
+
+    # Backfill from the comma-separated notes.tags column, one batch of notes
+    # at a time in primary key order so memory stays bounded on large tables.
+    notes = sa.table('notes', sa.column('id'), sa.column('user_id'), sa.column('tags'))
+    dialect_insert = postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+    last_id = None
+    while True:
+        query = sa.select(notes.c.id, notes.c.user_id, notes.c.tags).where(notes.c.tags != '')
+        if last_id is not None:
+            query = query.where(notes.c.id > last_id)
+        rows = bind.execute(query.order_by(notes.c.id).limit(BATCH_SIZE)).all()
+        if not rows:
+            break
+
+        names_by_user = {}
+        for row in rows:
+            names_by_user.setdefault(row.user_id, set()).update(_parse_tags(row.tags))
+
+        tag_ids = {}
+        for user_id, names in names_by_user.items():
+            if not names:
+                continue
+            bind.execute(
+                dialect_insert(tags).on_conflict_do_nothing(),
+                [{'id': _new_id(dialect_name), 'user_id': user_id, 'name': name} for name in names],
+            )
+            for tag_id, name in bind.execute(
+                sa.select(tags.c.id, tags.c.name).where(
+                    tags.c.user_id == user_id, tags.c.name.in_(names)
+                )
+            ):
+                tag_ids[(user_id, name)] = tag_id
+
+        links = [
+            {'note_id': row.id, 'tag_id': tag_ids[(row.user_id, name)]}
+            for row in rows
+            for name in _parse_tags(row.tags)
+        ]
+        if links:
+            bind.execute(dialect_insert(note_tags).on_conflict_do_nothing(), links)
+
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_index('idx_note_tags_tag_note', table_name='note_tags')
+    op.drop_table('note_tags')
+    op.drop_table('tags')
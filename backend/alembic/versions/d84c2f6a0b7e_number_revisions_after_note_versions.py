@@ -0,0 +1,38 @@
+"""number revisions after note versions
+
+Revision ID: d84c2f6a0b7e
+Revises: 6b1e7d3f9a24
+Create Date: 2026-10-19 00:48:13.905362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd84c2f6a0b7e'
+down_revision: Union[str, None] = '6b1e7d3f9a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # New revisions are numbered with the version they replace. Revisions
+    # saved before were counted per note, and notes got version 1 when the
+    # column was added, so move each such note's version past its newest
+    # revision number
+    op.execute("""
+        UPDATE notes SET version = (
+            SELECT max(revision) + 1 FROM note_revisions WHERE note_revisions.note_id = notes.id
+        )
+        WHERE version <= (
+            SELECT max(revision) FROM note_revisions WHERE note_revisions.note_id = notes.id
+        )
+    """)
+
+
+def downgrade() -> None:
+    # Versions only need to stay ahead of revision numbers; nothing to undo
+    pass
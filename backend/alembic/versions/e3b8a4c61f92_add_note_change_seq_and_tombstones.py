@@ -0,0 +1,51 @@
+"""add note change_seq and tombstones
+
+Revision ID: e3b8a4c61f92
+Revises: 9d2f6b1e4a57
+Create Date: 2026-10-18 16:40:12.331905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b8a4c61f92'
+down_revision: Union[str, None] = '9d2f6b1e4a57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _id_type(dialect_name):
+    if dialect_name == 'postgresql':
+        return postgresql.UUID(as_uuid=False)
+    return sa.LargeBinary()
+
+
+def upgrade() -> None:
+    id_type = _id_type(op.get_bind().dialect.name)
+
+    # Existing notes start at change_seq 0; a full sync (no since) returns them
+    op.add_column('users', sa.Column('change_seq', sa.BigInteger(), nullable=False, server_default='0'))
+    op.add_column('notes', sa.Column('change_seq', sa.BigInteger(), nullable=False, server_default='0'))
+    op.create_index('idx_notes_user_change_seq', 'notes', ['user_id', 'change_seq'])
+
+    op.create_table(
+        'note_tombstones',
+        sa.Column('note_id', id_type, primary_key=True),
+        sa.Column('user_id', id_type, sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('change_seq', sa.BigInteger(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('idx_note_tombstones_user_change_seq', 'note_tombstones', ['user_id', 'change_seq'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_note_tombstones_user_change_seq', table_name='note_tombstones')
+    op.drop_table('note_tombstones')
+    op.drop_index('idx_notes_user_change_seq', table_name='notes')
+    op.drop_column('notes', 'change_seq')
+    op.drop_column('users', 'change_seq')
@@ -0,0 +1,163 @@
+# Write-invalidated cache of serialized note list responses
+#
+# Entries are grouped per user. crud marks the users whose notes a
+# transaction wrote, and the Session hook below drops their entries once the
+# transaction commits, so a cached list is never older than the last commit
+# made through this process. The TTL bounds staleness from writes made by
+# other processes when the backend is not shared.
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set, Tuple
+from uuid import UUID
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+
+# Serialized body and its ETag
+CachedList = Tuple[bytes, str]
+
+_WRITTEN_USERS = "notes_cache_written_users"
+
+
+class CacheBackend:
+    """
+    Storage for cached note lists, keyed by user and an opaque per-request key.
+    
+    Readers take generation(user_id) before querying the database and pass it
+    to set(); set() must drop the value if the user's entries were
+    invalidated in between, or a slow reader would cache a list from before
+    the write. Methods are called on the request path and must be fast.
+    """
+
+    def get(self, user_id: UUID, key: Hashable) -> Optional[CachedList]:
+        raise NotImplementedError
+
+    def generation(self, user_id: UUID) -> int:
+        raise NotImplementedError
+
+    def set(self, user_id: UUID, key: Hashable, value: CachedList, generation: int) -> None:
+        raise NotImplementedError
+
+    def invalidate(self, user_id: UUID) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class LocalLRUCache(CacheBackend):
+    """In-process LRU cache with a TTL; max_entries=0 disables it"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[UUID, Hashable], Tuple[float, CachedList]]" = OrderedDict()
+        self._keys_by_user: Dict[UUID, Set[Hashable]] = {}
+        # Generations come from one counter; users without an entry in
+        # _generations are at _generation_floor
+        self._counter = itertools.count(1)
+        self._generations: Dict[UUID, int] = {}
+        self._generation_floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, user_id: UUID, key: Hashable) -> Optional[CachedList]:
+        with self._lock:
+            entry = self._entries.get((user_id, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(user_id, key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end((user_id, key))
+            self.hits += 1
+            return value
+
+    def generation(self, user_id: UUID) -> int:
+        with self._lock:
+            return self._generations.get(user_id, self._generation_floor)
+
+    def set(self, user_id: UUID, key: Hashable, value: CachedList, generation: int) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if self._generations.get(user_id, self._generation_floor) != generation:
+                return
+            self._entries[user_id, key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end((user_id, key))
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                (evicted_user, evicted_key), _ = self._entries.popitem(last=False)
+                self._forget_key(evicted_user, evicted_key)
+                self.evictions += 1
+
+    def invalidate(self, user_id: UUID) -> None:
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, ()):
+                del self._entries[user_id, key]
+            self._generations[user_id] = next(self._counter)
+            # Bound the generation table: raising the floor past every issued
+            # generation rejects any set() still in flight, which only costs a fill
+            if len(self._generations) > max(self.max_entries, 1024):
+                self._generations.clear()
+                self._generation_floor = next(self._counter)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, user_id: UUID, key: Hashable) -> None:
+        del self._entries[user_id, key]
+        self._forget_key(user_id, key)
+
+    def _forget_key(self, user_id: UUID, key: Hashable) -> None:
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+
+notes_cache: CacheBackend = LocalLRUCache(settings.notes_cache_size, settings.notes_cache_ttl)
+
+
+def set_notes_cache(backend: CacheBackend) -> None:
+    """Swap the cache backend, e.g. for an external cache shared by several workers"""
+    global notes_cache
+    notes_cache = backend
+
+
+def invalidate_on_commit(db: Session, user_id: UUID) -> None:
+    """Drop the user's cached lists when the session commits"""
+    db.info.setdefault(_WRITTEN_USERS, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_users(session: Session) -> None:
+    for user_id in session.info.pop(_WRITTEN_USERS, ()):
+        notes_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_users(session: Session) -> None:
+    session.info.pop(_WRITTEN_USERS, None)
@@ -0,0 +1,39 @@
+# Batched background rewrite of stored note content
+#
+#   python -m app.compress_notes [--batch-size 500] [--pause 0.05]
+#
+# Re-encodes every note with the current CONTENT_COMPRESSION settings, one
+# committed batch at a time, and fills in content_length on rows written
+# before it existed; with CONTENT_COMPRESSION=off it decompresses instead.
+# It can run against a live database and be stopped at any point: notes
+# written meanwhile are skipped, and a rerun passes over finished rows
+# without writing them.
+
+import argparse
+import time
+
+from app import crud
+from app.database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress or decompress stored note content")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches")
+    args = parser.parse_args()
+
+    visited = rewritten = 0
+    after = None
+    with SessionLocal() as db:
+        while True:
+            read, written, after = crud.recompress_notes_batch(db, after, args.batch_size)
+            visited += read
+            rewritten += written
+            print(f"{visited} notes visited, {rewritten} rewritten", flush=True)
+            if after is None:
+                break
+            time.sleep(args.pause)
+
+
+if __name__ == "__main__":
+    main()
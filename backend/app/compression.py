@@ -0,0 +1,77 @@
+# Opt-in compression of long note bodies at rest
+#
+# A compressed note keeps the first characters of its content in
+# notes.content (enough for summary previews) and the whole text compressed
+# in notes.content_blob, behind a one-byte codec tag. notes.content_length
+# holds the full length in characters either way. Readers always check
+# content_blob, so notes stay readable after compression is switched off.
+
+import zlib
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+_ZLIB_TAG = b"z"
+_ZSTD_TAG = b"s"
+
+
+def resolve_codec(codec: str) -> Optional[str]:
+    """The codec to write with: None when off, zlib when zstd is not installed"""
+    if codec == "off":
+        return None
+    if codec == "zstd" and zstandard is None:
+        return "zlib"
+    return codec
+
+
+def compress(text: str, codec: str) -> bytes:
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        return _ZSTD_TAG + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return _ZLIB_TAG + zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(blob: bytes) -> str:
+    tag, payload = blob[:1], blob[1:]
+    if tag == _ZSTD_TAG:
+        if zstandard is None:
+            raise RuntimeError("Note content is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    return zlib.decompress(payload).decode("utf-8")
+
+
+def encode_content(content: str, codec: Optional[str], min_bytes: int, prefix_length: int) -> dict:
+    """
+    Column values storing `content`: compressed when a codec is given, the
+    text is at least `min_bytes` long and compressing actually saves space
+    """
+    values = {"content": content, "content_blob": None, "content_length": len(content)}
+    if codec is None:
+        return values
+
+    size = len(content.encode("utf-8"))
+    if size < min_bytes:
+        return values
+    blob = compress(content, codec)
+    if len(blob) + prefix_length >= size:
+        return values
+
+    values.update(content=content[:prefix_length], content_blob=blob)
+    return values
+
+
+def note_content(note) -> str:
+    """Full content of a note row or object, decompressing it if needed"""
+    blob = getattr(note, "content_blob", None)
+    return note.content if blob is None else decompress(blob)
+
+
+def sql_note_content(content: Optional[str], blob: Optional[bytes]) -> Optional[str]:
+    """note_content for SQL, registered on SQLite connections for the search triggers"""
+    return content if blob is None else decompress(blob)
@@ -1,16 +1,70 @@
  # Configuration and settings
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal
 
 
 class Settings(BaseSettings):
     database_url: str
+    # Serve requests through the AsyncSession path (asyncpg / aiosqlite)
+    async_database: bool = False
+    # Schema handling at worker startup: "check" fails fast unless the database
+    # is at the Alembic head (checked once per deployment), "create_all"
+    # creates missing tables (local development only), "off" does neither
+    schema_startup: Literal["check", "create_all", "off"] = "check"
+    # Pooled connections each worker opens at startup, 0 disables warm-up
+    db_pool_warmup: int = 2
+    # Connection pool; size it against the threadpool and worker count
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Server-side statement timeout in milliseconds (PostgreSQL), 0 disables
+    db_statement_timeout_ms: int = 30000
+    # Serialized note lists cached per process; 0 entries disables the cache
+    notes_cache_size: int = 1024
+    notes_cache_ttl: float = 30.0
+    # Compress note content of at least this many bytes at rest: "off",
+    # "zlib" or "zstd" (zlib when the zstandard package is missing). SQLite
+    # only, and rejected on PostgreSQL, whose search vector needs the full
+    # text in notes.content; there the migrations switch the column's TOAST
+    # compression to lz4 instead
+    content_compression: Literal["off", "zlib", "zstd"] = "off"
+    content_compression_min_bytes: int = 2048
+    # Revision retention, applied by `python -m app.prune_revisions`: revisions
+    # older than this many days are dropped (0 keeps them) and at most this
+    # many are kept per note
+    revision_retention_days: int = 90
+    revision_max_per_note: int = 100
+    # Tombstones of deleted notes older than this many days are dropped by
+    # `python -m app.prune_tombstones`; delta syncs from before them must
+    # start over with a full sync
+    tombstone_retention_days: int = 30
+    # Read replicas for the list and detail reads (a JSON list in the
+    # environment); empty sends every read to the primary
+    replica_database_urls: List[str] = []
+    # After a write, the user's reads stay on the primary this long, on any
+    # worker (see app.replicas); keep it at or above replica_max_lag
+    replica_pin_seconds: float = 5.0
+    # Replicas unreachable or further behind than this many seconds get no reads
+    replica_max_lag: float = 5.0
+    replica_health_interval: float = 2.0
     cors_origins: List[str] = ["http://localhost:5173", "http://localhost:3000"]
     
     class Config:
         env_file = ".env"
         case_sensitive = False
+    
+    @model_validator(mode="after")
+    def _check_content_compression(self) -> "Settings":
+        if self.content_compression != "off" and self.database_url.startswith("postgresql"):
+            raise ValueError(
+                "CONTENT_COMPRESSION is SQLite only; PostgreSQL compresses notes.content "
+                "itself (lz4 TOAST compression, see the migrations)"
+            )
+        return self
 
 
 settings = Settings()
\ No newline at end of file
@@ -1,10 +1,23 @@
 # Database operations
 
+import re
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, or_, func
+from sqlalchemy import (desc, or_, func, tuple_, text, table, column, literal_column, Float,
+                        select, insert, update, delete, bindparam)
+from sqlalchemy.engine import Row
+from sqlalchemy.dialects import postgresql, sqlite
 from app import models, schemas
-from uuid import UUID
-from typing import List, Optional
+from app.compression import encode_content, note_content, resolve_codec
+from app.config import settings
+from app.pagination import encode_cursor, decode_cursor
+from app.exports import EXPORT_FIELDS
+from app.events import queue_note_event
+from app.cache import invalidate_on_commit
+from app.replicas import pin_on_commit
+from app.revisions import (REVISION_FIELDS, REVISION_THIN_AFTER, REVISION_THIN_BUCKET,
+                           SNAPSHOT_INTERVAL, encode_revision, is_snapshot, rebuild)
+from uuid import UUID, uuid4
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 
 
@@ -21,13 +34,101 @@ def get_user_by_id(db: Session, user_id: UUID) -> Optional[models.User]:
 
 def create_user(db: Session, email: str) -> models.User:
     """Create new user"""
-    user = models.User(email=email)
+    user = models.User(id=uuid4(), email=email)
     db.add(user)
+    pin_on_commit(db, user.id)
     db.commit()
     db.refresh(user)
     return user
 
 
+# Tags
+def parse_tags(tags: str) -> List[str]:
+    """Split the comma-separated tags string into unique, normalized tag names"""
+    names = []
+    for name in tags.split(","):
+        name = name.strip().lower()[:255]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def _insert_ignore_duplicates(db: Session, table):
+    """INSERT that silently skips rows violating a unique constraint"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing()
+    return sqlite.insert(table).on_conflict_do_nothing()
+
+
+def _link_note_tags(db: Session, user_id: UUID, tags_by_note: Dict[UUID, str]) -> None:
+    """Create the tags used by new notes and link each note to its tags"""
+    names_by_note = {note_id: parse_tags(tags) for note_id, tags in tags_by_note.items()}
+    names = sorted({name for note_names in names_by_note.values() for name in note_names})
+    if not names:
+        return
+    
+    db.execute(
+        _insert_ignore_duplicates(db, models.Tag.__table__),
+        [{"id": uuid4(), "user_id": user_id, "name": name} for name in names]
+    )
+    tag_ids = dict(db.execute(
+        select(models.Tag.name, models.Tag.id).where(
+            models.Tag.user_id == user_id,
+            models.Tag.name.in_(names)
+        )
+    ).all())
+    db.execute(
+        insert(models.note_tags),
+        [
+            {"note_id": note_id, "tag_id": tag_ids[name]}
+            for note_id, note_names in names_by_note.items()
+            for name in note_names
+        ]
+    )
+
+
+def _sync_note_tags(db: Session, note_id: UUID, user_id: UUID, tags: str) -> None:
+    """Replace a note's rows in note_tags with the tags from its tags string"""
+    db.execute(delete(models.note_tags).where(models.note_tags.c.note_id == note_id))
+    _link_note_tags(db, user_id, {note_id: tags})
+
+
+def _notes_with_tags(user_id: UUID, names: List[str], match_all: bool):
+    """Subquery of note IDs carrying all (or any) of the given tags"""
+    query = (
+        select(models.note_tags.c.note_id)
+        .join(models.Tag, models.Tag.id == models.note_tags.c.tag_id)
+        .where(models.Tag.user_id == user_id, models.Tag.name.in_(names))
+    )
+    if match_all:
+        query = query.group_by(models.note_tags.c.note_id).having(
+            func.count(models.note_tags.c.tag_id) == len(names)
+        )
+    return query
+
+
+def get_tag_counts(
+    db: Session,
+    user_id: UUID,
+    status: Optional[str] = None
+) -> List[Tuple[str, int]]:
+    """Count a user's notes per tag, most used first, without loading the notes"""
+    query = (
+        select(models.Tag.name, func.count(models.note_tags.c.note_id).label("count"))
+        .join(models.note_tags, models.note_tags.c.tag_id == models.Tag.id)
+        .where(models.Tag.user_id == user_id)
+        .group_by(models.Tag.name)
+        .order_by(desc("count"), models.Tag.name)
+    )
+    
+    if status:
+        query = query.join(models.Note, models.Note.id == models.note_tags.c.note_id).where(
+            models.Note.status == status
+        )
+    
+    return db.execute(query).all()
+
+
 # Note CRUD
 def get_note_by_id(db: Session, note_id: UUID, user_id: UUID) -> Optional[models.Note]:
     """Get a specific note by ID for a user"""
@@ -37,13 +138,18 @@ def get_note_by_id(db: Session, note_id: UUID, user_id: UUID) -> Optional[models
     ).first()
 
 
-def get_notes_by_user(
-    db: Session, 
-    user_id: UUID, 
+def notes_by_user_query(
+    db: Session,
+    user_id: UUID,
     status: Optional[str] = None,
-    is_favorite: Optional[bool] = None
-) -> List[models.Note]:
-    """Get all notes for a user, optionally filtered by status and favorite"""
+    is_favorite: Optional[bool] = None,
+    tags: Optional[List[str]] = None,
+    match_all_tags: bool = True
+):
+    """
+    Build the (unordered) query for a user's notes, optionally filtered.
+    `tags` keeps notes carrying all of the tags, or any of them if match_all_tags is False.
+    """
     query = db.query(models.Note).filter(models.Note.user_id == user_id)
     
     if status:
@@ -52,144 +158,954 @@ def get_notes_by_user(
     if is_favorite is not None:
         query = query.filter(models.Note.is_favorite == is_favorite)
     
-    return query.order_by(desc(models.Note.created_at)).all()
+    names = parse_tags(",".join(tags)) if tags else []
+    if names:
+        query = query.filter(models.Note.id.in_(_notes_with_tags(user_id, names, match_all_tags)))
+    
+    return query
 
 
-def get_recent_notes_by_user(db: Session, user_id: UUID) -> List[models.Note]:
-    """Get notes for a user that were created or updated in the last 24 hours."""
+def recent_notes_query(db: Session, user_id: UUID):
+    """Build the query for notes created or updated in the last 24 hours"""
     twenty_four_hours_ago = datetime.now(timezone.utc) - timedelta(days=1)
     
-    query = db.query(models.Note).filter(
+    return db.query(models.Note).filter(
         models.Note.user_id == user_id,
         or_(
             models.Note.created_at >= twenty_four_hours_ago,
             models.Note.updated_at >= twenty_four_hours_ago
         )
     )
-    
-    return query.order_by(desc(models.Note.created_at)).all()
-
 
 
-def create_note(db: Session, note: schemas.NoteCreate, user_id: UUID) -> models.Note:
-    """Create a new note"""
-    db_note = models.Note(
-        user_id=user_id,
-        title=note.title,
-        content=note.content,
-        tags=note.tags,
-        is_favorite=note.is_favorite,
-        status="active"
-    )
-    db.add(db_note)
-    db.commit()
-    db.refresh(db_note)
-    return db_note
+def _newest_first(query):
+    return query.order_by(desc(models.Note.created_at), desc(models.Note.id))
 
 
-def update_note(
+def get_notes_by_user(
     db: Session, 
-    note_id: UUID, 
     user_id: UUID, 
-    note_update: schemas.NoteUpdate
-) -> Optional[models.Note]:
-    """Update note title and/or content"""
-    db_note = get_note_by_id(db, note_id, user_id)
-    
-    if not db_note:
-        return None
-    
-    update_data = note_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_note, key, value)
-    
-    db.commit()
-    db.refresh(db_note)
-    return db_note
+    status: Optional[str] = None,
+    is_favorite: Optional[bool] = None,
+    tags: Optional[List[str]] = None,
+    match_all_tags: bool = True
+) -> List[models.Note]:
+    """Get all notes for a user, optionally filtered by status, favorite and tags"""
+    query = notes_by_user_query(
+        db,
+        user_id,
+        status=status,
+        is_favorite=is_favorite,
+        tags=tags,
+        match_all_tags=match_all_tags
+    )
+    return _newest_first(query).all()
 
 
-def update_note_status(
-    db: Session,
-    note_id: UUID,
-    user_id: UUID,
-    status: str
-) -> Optional[models.Note]:
-    """Update note status (archive/unarchive)"""
-    db_note = get_note_by_id(db, note_id, user_id)
-    
-    if not db_note:
-        return None
-    
-    db_note.status = status
-    db.commit()
-    db.refresh(db_note)
-    return db_note
+def get_recent_notes_by_user(db: Session, user_id: UUID) -> List[models.Note]:
+    """Get notes for a user that were created or updated in the last 24 hours."""
+    return _newest_first(recent_notes_query(db, user_id)).all()
 
 
+# Rows fetched per round trip while streaming an export
+EXPORT_BATCH_SIZE = 1000
 
 
+def export_notes_query(user_id: UUID):
+    """All of a user's notes oldest-first, as plain rows for streaming"""
+    notes = models.Note.__table__
+    return (
+        select(*(notes.c[name] for name in EXPORT_FIELDS), notes.c.content_blob)
+        .where(notes.c.user_id == user_id)
+        .order_by(notes.c.created_at, notes.c.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
 
-def delete_notes_by_ids(db: Session, note_ids: List[UUID], user_id: UUID) -> int:
 
+def iter_export_batches(db: Session, user_id: UUID) -> Iterator[List[Row]]:
+    """
+    Stream a user's notes in batches of EXPORT_BATCH_SIZE. yield_per uses a
+    server-side cursor where the driver has one, so memory stays flat.
+    """
+    result = db.execute(export_notes_query(user_id))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+# Characters of content included in a note summary
+PREVIEW_LENGTH = 200
+
+
+def summarize(query):
+    """
+    Project a note query onto the summary columns. Content is cut down to a
+    preview by the database, so the full text is never transferred.
+    """
+    return query.with_entities(
+        models.Note.id,
+        models.Note.user_id,
+        models.Note.title,
+        models.Note.tags,
+        models.Note.status,
+        models.Note.is_favorite,
+        models.Note.created_at,
+        models.Note.updated_at,
+        # A compressed note keeps at least PREVIEW_LENGTH plain characters in content
+        func.substr(models.Note.content, 1, PREVIEW_LENGTH).label("preview"),
+        func.coalesce(models.Note.content_length, func.length(models.Note.content)).label("content_length")
+    )
 
-    """Permanently delete multiple notes by their IDs for a specific user."""
 
+def fetch_notes(
+    query,
+    limit: Optional[int] = None,
+    after: Optional[str] = None
+) -> Tuple[list, Optional[str]]:
+    """
+    Run a note query newest-first: every row, or one keyset page when `limit` is given.
+    Returns the rows and the cursor of the next page (None when there is none).
+    """
+    if limit is None:
+        return _newest_first(query).all(), None
+    return get_notes_page(query, limit, after)
+
+
+def get_notes_fingerprint(query, user_id: UUID) -> Optional[Tuple[int, int]]:
+    """
+    The user's change_seq and the row count of a note query, from one query;
+    None if the user does not exist. change_seq advances with every write to
+    the user's notes, however close together or however their transactions
+    overlap, and the count also catches notes leaving the time-based recent list.
+    """
+    change_seq = select(models.User.change_seq).where(models.User.id == user_id).scalar_subquery()
+    count, current = query.with_entities(func.count(models.Note.id), change_seq).one()
+    return None if current is None else (current, count)
+
+
+def get_note_updated_at(db: Session, note_id: UUID, user_id: UUID) -> Optional[datetime]:
+    """Get only the updated_at of a user's note, for revalidating cached copies"""
+    return db.scalar(
+        select(models.Note.updated_at).where(
+            models.Note.id == note_id,
+            models.Note.user_id == user_id
+        )
+    )
 
-    
 
+def get_note_version(db: Session, note_id: UUID, user_id: UUID) -> Optional[int]:
+    """Get only the version of a user's note, for its ETag"""
+    return db.scalar(
+        select(models.Note.version).where(
+            models.Note.id == note_id,
+            models.Note.user_id == user_id
+        )
+    )
 
-    # Query for the notes to be deleted to ensure they belong to the user
 
+def get_notes_page(
+    query,
+    limit: int,
+    after: Optional[str] = None
+) -> Tuple[List[models.Note], Optional[str]]:
+    """
+    Fetch one page of a note query newest-first using keyset pagination.
+    Returns the notes and the cursor for the next page (None on the last page).
+    Raises pagination.InvalidCursor for a malformed `after` token.
+    """
+    if after:
+        created_at, note_id = decode_cursor(after)
+        query = query.filter(
+            tuple_(models.Note.created_at, models.Note.id) < (created_at, note_id)
+        )
+    
+    # Fetch one extra row to learn whether another page exists
+    notes = _newest_first(query).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(notes) > limit:
+        notes = notes[:limit]
+        next_cursor = encode_cursor(notes[-1].created_at, notes[-1].id)
+    
+    return notes, next_cursor
 
-    notes_to_delete = db.query(models.Note).filter(
 
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
 
-        models.Note.id.in_(note_ids),
+# Lightweight handle on the SQLite FTS5 shadow table created in models.py
+notes_fts = table("notes_fts", column("note_id"))
 
 
-        models.Note.user_id == user_id
+def _fts5_match_expression(q: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: every word must match, last word as a prefix"""
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
 
 
-    ).all()
+def search_notes(
+    db: Session,
+    user_id: UUID,
+    q: str,
+    status: Optional[str] = None,
+    is_favorite: Optional[bool] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> List[Tuple[models.Note, float, str]]:
+    """
+    Full-text search over a user's note titles, content and tags.
+    Returns (note, rank, snippet) tuples, best match first; a higher rank is better.
+    """
+    query = notes_by_user_query(db, user_id, status=status, is_favorite=is_favorite)
+    
+    if db.get_bind().dialect.name == "postgresql":
+        tsquery = func.websearch_to_tsquery("english", q)
+        search_vector = literal_column("notes.search_vector")
+        rank = func.ts_rank_cd(search_vector, tsquery)
+        snippet = func.ts_headline(
+            "english",
+            models.Note.content,
+            tsquery,
+            f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxFragments=2"
+        )
+        query = query.filter(search_vector.op("@@")(tsquery))
+    else:
+        match = _fts5_match_expression(q)
+        if match is None:
+            return []
+        # bm25() is lower-is-better; weights favour title, then tags, then content
+        rank = literal_column("-bm25(notes_fts, 0.0, 10.0, 1.0, 5.0)", Float)
+        snippet = literal_column(
+            f"snippet(notes_fts, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 16)"
+        )
+        query = query.join(notes_fts, notes_fts.c.note_id == models.Note.id).filter(
+            text("notes_fts MATCH :match")
+        ).params(match=match)
+    
+    return (
+        query.add_columns(rank.label("rank"), snippet.label("snippet"))
+        .order_by(desc("rank"), desc(models.Note.created_at))
+        .limit(limit)
+        .offset(offset)
+        .all()
+    )
 
 
+# Change notification
+def _notes_written(
+    db: Session,
+    user_id: UUID,
+    type: str,
+    notes: list = (),
+    deleted_ids: List[UUID] = (),
+    change_seq: Optional[int] = None
+) -> None:
+    """
+    Once the write commits: publish the change event, drop the user's cached
+    lists and keep the user's reads on the primary until replicas catch up
+    """
+    queue_note_event(db, user_id, type, notes=notes, deleted_ids=deleted_ids, change_seq=change_seq)
+    invalidate_on_commit(db, user_id)
+    pin_on_commit(db, user_id)
+
+
+# Delta sync
+def _next_change_seq(db: Session, user_id: UUID) -> Optional[int]:
+    """
+    Advance the user's change sequence and return the new value. The row lock
+    taken by the UPDATE is held until commit, so a user's writes commit in
+    sequence order. Returns None if the user does not exist.
+    """
+    users = models.User.__table__
+    return db.execute(
+        update(users)
+        .where(users.c.id == user_id)
+        # Keep updated_at; this is bookkeeping, not a change to the user
+        .values(change_seq=users.c.change_seq + 1, updated_at=users.c.updated_at)
+        .returning(users.c.change_seq)
+    ).scalar()
+
+
+def _record_tombstones(db: Session, user_id: UUID, note_ids: List[UUID], change_seq: Optional[int]) -> None:
+    """
+    Record deleted notes under `change_seq` and queue their delete event. The
+    caller advances change_seq before deleting, so the user's row is locked
+    before the notes' rows, in the same order as every other write.
+    """
+    if not note_ids:
+        return
+    db.execute(
+        insert(models.NoteTombstone.__table__),
+        [{"note_id": note_id, "user_id": user_id, "change_seq": change_seq} for note_id in note_ids]
+    )
+    _notes_written(db, user_id, "deleted", deleted_ids=note_ids, change_seq=change_seq)
+
 
+def _update_event_type(values: dict) -> str:
+    """Event type of a note update: status and favorite toggles get their own"""
+    if values.keys() == {"status"}:
+        return "status"
+    if values.keys() == {"is_favorite"}:
+        return "favorite"
+    return "updated"
 
 
-    if not notes_to_delete:
+class SyncTokenExpired(Exception):
+    """The tombstones a delta sync from this change_seq needs have been pruned"""
+    
+    def __init__(self, sync_floor: int):
+        super().__init__(f"Delta sync needs since >= {sync_floor}")
+        self.sync_floor = sync_floor
 
 
+def get_changes(
+    db: Session,
+    user_id: UUID,
+    since: Optional[int] = None
+) -> Optional[Tuple[List[models.Note], List[UUID], int]]:
+    """
+    Notes written and IDs of notes deleted after change_seq `since` (every
+    note when `since` is None), plus the change_seq to pass next time.
+    Returns None if the user does not exist, and raises SyncTokenExpired if
+    `since` is below the user's sync_floor.
+    
+    The user's change_seq is read first. Writes commit in sequence order, so
+    every change up to that value is already visible to the queries that
+    follow; anything newer is left for the next call.
+    """
+    user = db.execute(
+        select(models.User.change_seq, models.User.sync_floor).where(models.User.id == user_id)
+    ).first()
+    if user is None:
+        return None
+    current = user.change_seq
+    if since is not None and since < user.sync_floor:
+        raise SyncTokenExpired(user.sync_floor)
+    
+    notes = db.query(models.Note).filter(
+        models.Note.user_id == user_id,
+        models.Note.change_seq <= current
+    )
+    deleted_ids = []
+    if since is not None:
+        notes = notes.filter(models.Note.change_seq > since)
+        tombstones = models.NoteTombstone
+        deleted_ids = db.scalars(
+            select(tombstones.note_id)
+            .where(
+                tombstones.user_id == user_id,
+                tombstones.change_seq > since,
+                tombstones.change_seq <= current
+            )
+            .order_by(tombstones.change_seq)
+        ).all()
+    
+    return notes.order_by(models.Note.change_seq).all(), deleted_ids, current
+
+
+def prune_tombstones_batch(db: Session, batch_size: int, now: Optional[datetime] = None) -> int:
+    """
+    Delete up to `batch_size` tombstones older than tombstone_retention_days
+    and commit, first raising each affected user's sync_floor to the newest
+    change_seq deleted. Users are updated before their tombstones are
+    touched, the same lock order as every note write. Returns how many
+    tombstones were deleted.
+    """
+    now = now or datetime.now(timezone.utc)
+    tombstones = models.NoteTombstone.__table__
+    users = models.User.__table__
+    
+    rows = db.execute(
+        select(tombstones.c.note_id, tombstones.c.user_id, tombstones.c.change_seq)
+        .where(tombstones.c.deleted_at < now - timedelta(days=settings.tombstone_retention_days))
+        .order_by(tombstones.c.deleted_at)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        db.commit()
         return 0
+    
+    floors = {}
+    for row in rows:
+        floors[row.user_id] = max(floors.get(row.user_id, 0), row.change_seq)
+    for user_id in sorted(floors):
+        db.execute(
+            update(users)
+            .where(users.c.id == user_id, users.c.sync_floor < floors[user_id])
+            .values(sync_floor=floors[user_id])
+        )
+    note_ids = [row.note_id for row in rows]
+    for start in range(0, len(note_ids), ID_CHUNK_SIZE):
+        db.execute(delete(tombstones).where(tombstones.c.note_id.in_(note_ids[start:start + ID_CHUNK_SIZE])))
+    
+    db.commit()
+    return len(rows)
 
 
+# Content storage
+def content_values(db: Session, content: str) -> dict:
+    """
+    The content, content_blob and content_length values that store `content`,
+    compressed if settings.content_compression is on and it is long enough.
+    PostgreSQL builds its search vector from notes.content, so there it is
+    always stored as text and compressed by TOAST (settings rejects the
+    option on PostgreSQL URLs).
+    """
+    codec = None
+    if db.get_bind().dialect.name != "postgresql":
+        codec = resolve_codec(settings.content_compression)
+    return encode_content(content, codec, settings.content_compression_min_bytes, PREVIEW_LENGTH)
 
 
+def _stored_values(db: Session, values: dict) -> dict:
+    """Column values for an update, with any new content encoded for storage"""
+    if "content" not in values:
+        return values
+    return {**values, **content_values(db, values["content"])}
 
-    # Get the count before deleting
 
+def recompress_notes_batch(
+    db: Session,
+    after: Optional[UUID],
+    batch_size: int
+) -> Tuple[int, int, Optional[UUID]]:
+    """
+    Re-encode up to `batch_size` notes, in id order after `after`, with the
+    current compression settings and commit them. A note written since it
+    was read is left alone; updated_at and change_seq are not touched, as
+    the content itself does not change. Returns how many notes were read and
+    rewritten, and the id to continue after (None once all were visited).
+    """
+    notes = models.Note.__table__
+    query = select(
+        notes.c.id, notes.c.content, notes.c.content_blob, notes.c.content_length, notes.c.change_seq
+    ).order_by(notes.c.id).limit(batch_size)
+    if after is not None:
+        query = query.where(notes.c.id > after)
+    rows = db.execute(query).all()
+    
+    rewrites = []
+    for row in rows:
+        values = content_values(db, note_content(row))
+        if values != {"content": row.content, "content_blob": row.content_blob, "content_length": row.content_length}:
+            rewrites.append({
+                "note_id": row.id,
+                "read_change_seq": row.change_seq,
+                **{f"new_{name}": value for name, value in values.items()}
+            })
+    
+    if rewrites:
+        db.execute(
+            update(notes)
+            .where(notes.c.id == bindparam("note_id"), notes.c.change_seq == bindparam("read_change_seq"))
+            .values(
+                content=bindparam("new_content"),
+                content_blob=bindparam("new_content_blob"),
+                content_length=bindparam("new_content_length"),
+                updated_at=notes.c.updated_at
+            ),
+            rewrites
+        )
+    db.commit()
+    return len(rows), len(rewrites), rows[-1].id if len(rows) == batch_size else None
+
+
+# Revision history
+def _last_snapshot(notes):
+    """Column for a notes query: the number of the note's newest snapshot revision"""
+    revisions = models.NoteRevision
+    return (
+        select(func.max(revisions.revision))
+        .where(revisions.note_id == notes.c.id, revisions.delta.is_(None))
+        .scalar_subquery()
+        .label("last_snapshot")
+    )
 
-    delete_count = len(notes_to_delete)
 
+def _save_revisions(db: Session, replaced: List[Tuple[Row, Row]]) -> None:
+    """
+    Save each (previous, updated) pair's previous version as a revision,
+    stored as a delta from the updated version or as a snapshot. Previous
+    rows carry the _last_snapshot column.
+    
+    A revision is numbered after the version it saves. Versions only go up,
+    so numbers are never reused, even once pruning has removed every
+    revision of a note; updates that save no revision leave gaps.
+    """
+    values = []
+    for previous, updated in replaced:
+        content = note_content(previous)
+        newer = note_content(updated)
+        if (previous.title, content, previous.tags) == (updated.title, newer, updated.tags):
+            continue
+        number = previous.version
+        values.append({
+            "note_id": previous.id,
+            "revision": number,
+            "title": previous.title,
+            "tags": previous.tags,
+            "content_length": len(content),
+            "saved_at": previous.updated_at,
+            **encode_revision(newer, content, is_snapshot(number, previous.last_snapshot))
+        })
+    if values:
+        db.execute(insert(models.NoteRevision.__table__), values)
+
+
+def get_note_revisions(db: Session, note_id: UUID, user_id: UUID) -> Optional[List[Row]]:
+    """A note's revisions newest first, without content; None if the note does not exist for this user"""
+    if get_note_updated_at(db, note_id, user_id) is None:
+        return None
+    
+    revisions = models.NoteRevision
+    return db.execute(
+        select(revisions.revision, revisions.title, revisions.tags, revisions.content_length, revisions.saved_at)
+        .where(revisions.note_id == note_id)
+        .order_by(revisions.revision.desc())
+    ).all()
 
 
+def get_note_revision(db: Session, note_id: UUID, user_id: UUID, revision: int) -> Optional[dict]:
+    """
+    Rebuild one revision of a user's note. Returns None if the note or the
+    revision does not exist.
+    
+    The revision's delta applies to the next newer version, whose delta
+    applies to the one after, up to the nearest snapshot or the note itself.
+    A snapshot is stored at least every SNAPSHOT_INTERVAL revisions, so that
+    walk reads at most SNAPSHOT_INTERVAL rows.
+    """
+    notes = models.Note.__table__
+    note = db.execute(
+        select(notes.c.id).where(notes.c.id == note_id, notes.c.user_id == user_id)
+    ).first()
+    if note is None:
+        return None
+    
+    revisions = models.NoteRevision.__table__
+    query = select(revisions).where(
+        revisions.c.note_id == note_id,
+        revisions.c.revision >= revision
+    ).order_by(revisions.c.revision)
+    rows = db.execute(query.limit(SNAPSHOT_INTERVAL)).all()
+    if not rows or rows[0].revision != revision:
+        return None
+    
+    snapshot = next((i for i, row in enumerate(rows) if row.delta is None), None)
+    if snapshot is None and len(rows) == SNAPSHOT_INTERVAL:
+        # Not expected, but never rebuild from an incomplete chain
+        rows = db.execute(query).all()
+        snapshot = next((i for i, row in enumerate(rows) if row.delta is None), None)
+    
+    if snapshot is None:
+        head = db.execute(select(notes.c.content, notes.c.content_blob).where(notes.c.id == note_id)).first()
+        content = rebuild(reversed(rows), note_content(head))[-1]
+    else:
+        content = rebuild(reversed(rows[:snapshot + 1]), "")[-1]
+    
+    found = rows[0]
+    return {
+        "revision": found.revision,
+        "title": found.title,
+        "tags": found.tags,
+        "content_length": found.content_length,
+        "saved_at": found.saved_at,
+        "content": content,
+    }
+
+
+def restore_note_revision(db: Session, note_id: UUID, user_id: UUID, revision: int) -> Optional[Row]:
+    """
+    Make a revision the note's current version. This is an ordinary update,
+    so the version it replaces is saved as a revision in turn.
+    """
+    restored = get_note_revision(db, note_id, user_id, revision)
+    if restored is None:
+        return None
+    
+    return update_note(db, note_id, user_id, schemas.NoteUpdate(
+        title=restored["title"],
+        content=restored["content"],
+        tags=restored["tags"]
+    ))
+
+
+def _revisions_to_keep(
+    revisions: List[Row],
+    now: datetime,
+    retention: Optional[timedelta],
+    max_per_note: int
+) -> List[int]:
+    """
+    Revision numbers kept from a note's revisions (newest first): at most
+    `max_per_note`, none older than `retention`, and of those older than
+    REVISION_THIN_AFTER only the newest in each REVISION_THIN_BUCKET
+    """
+    kept = []
+    buckets = set()
+    for row in revisions[:max_per_note]:
+        age = now - _as_utc(row.saved_at)
+        if retention is not None and age > retention:
+            break
+        if age > REVISION_THIN_AFTER:
+            bucket = int(_as_utc(row.saved_at).timestamp() // REVISION_THIN_BUCKET.total_seconds())
+            if bucket in buckets:
+                continue
+            buckets.add(bucket)
+        kept.append(row.revision)
+    return kept
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _rewrite_revisions(db: Session, note_id: UUID, user_id: UUID, kept: List[int]) -> None:
+    """
+    Replace a note's revisions with the `kept` ones (newest first), each
+    re-encoded against the next newer kept version. Runs under the user's
+    row lock so no update adds a revision meanwhile.
+    """
+    users = models.User.__table__
+    db.execute(select(users.c.id).where(users.c.id == user_id).with_for_update())
+    notes = models.Note.__table__
+    note = db.execute(select(notes.c.content, notes.c.content_blob).where(notes.c.id == note_id)).first()
+    if note is None:
+        return
+    head = note_content(note)
+    revisions = models.NoteRevision.__table__
+    rows = db.execute(
+        select(revisions).where(revisions.c.note_id == note_id).order_by(revisions.c.revision.desc())
+    ).all()
+    contents = dict(zip((row.revision for row in rows), rebuild(rows, head)))
+    kept_numbers = set(kept)
+    kept_rows = [row for row in rows if row.revision in kept_numbers]
+    
+    records = []
+    newer = head
+    for index, row in enumerate(kept_rows):
+        content = contents[row.revision]
+        # Every SNAPSHOT_INTERVAL-th kept revision, counting from the oldest
+        snapshot = (len(kept_rows) - index) % SNAPSHOT_INTERVAL == 0
+        records.append({**row._asdict(), **encode_revision(newer, content, snapshot)})
+        newer = content
+    
+    db.execute(delete(revisions).where(revisions.c.note_id == note_id))
+    if records:
+        db.execute(insert(revisions), records)
 
 
-    for note in notes_to_delete:
+def prune_revisions_batch(
+    db: Session,
+    after: Optional[UUID],
+    batch_size: int,
+    now: Optional[datetime] = None
+) -> Tuple[int, int, Optional[UUID]]:
+    """
+    Apply revision retention to up to `batch_size` notes, in id order after
+    `after`, and commit. Dropping only the oldest revisions is a plain
+    DELETE, as no other revision is rebuilt from them; thinning in the
+    middle re-encodes the note's remaining revisions. Returns how many notes
+    were visited and how many revisions deleted, and the id to continue
+    after (None once all were visited).
+    """
+    now = now or datetime.now(timezone.utc)
+    retention = timedelta(days=settings.revision_retention_days) if settings.revision_retention_days else None
+    revisions = models.NoteRevision.__table__
+    notes = models.Note.__table__
+    
+    query = select(revisions.c.note_id).distinct().order_by(revisions.c.note_id).limit(batch_size)
+    if after is not None:
+        query = query.where(revisions.c.note_id > after)
+    note_ids = db.scalars(query).all()
+    if not note_ids:
+        db.commit()
+        return 0, 0, None
+    
+    by_note = {}
+    for row in db.execute(
+        select(revisions.c.note_id, revisions.c.revision, revisions.c.saved_at, notes.c.user_id)
+        .join(notes, notes.c.id == revisions.c.note_id)
+        .where(revisions.c.note_id.in_(note_ids))
+        .order_by(revisions.c.note_id, revisions.c.revision.desc())
+    ):
+        by_note.setdefault(row.note_id, []).append(row)
+    
+    deleted = 0
+    for note_id, rows in by_note.items():
+        kept = _revisions_to_keep(rows, now, retention, settings.revision_max_per_note)
+        if len(kept) == len(rows):
+            continue
+        deleted += len(rows) - len(kept)
+        if kept == [row.revision for row in rows[:len(kept)]]:
+            oldest_kept = kept[-1] if kept else rows[0].revision + 1
+            db.execute(delete(revisions).where(
+                revisions.c.note_id == note_id,
+                revisions.c.revision < oldest_kept
+            ))
+        else:
+            _rewrite_revisions(db, note_id, rows[0].user_id, kept)
+    
+    db.commit()
+    return len(note_ids), deleted, note_ids[-1] if len(note_ids) == batch_size else None
 
 
-        db.delete(note)
+def create_note(db: Session, note: schemas.NoteCreate, user_id: UUID) -> models.Note:
+    """Create a new note"""
+    db_note = models.Note(
+        change_seq=_next_change_seq(db, user_id),
+        user_id=user_id,
+        title=note.title,
+        **content_values(db, note.content),
+        tags=note.tags,
+        is_favorite=note.is_favorite,
+        status="active"
+    )
+    db.add(db_note)
+    db.flush()
+    _link_note_tags(db, user_id, {db_note.id: db_note.tags})
+    _notes_written(db, user_id, "created", notes=[db_note])
+    db.commit()
+    db.refresh(db_note)
+    return db_note
 
 
+# Rows per multi-row INSERT; 500 rows x 10 columns stays well under the bind
+# parameter limits of SQLite and PostgreSQL
+INSERT_CHUNK_SIZE = 500
 
 
+def create_notes_bulk(
+    db: Session,
+    notes: List[schemas.NoteCreate],
+    user_id: UUID
+) -> List[Row]:
+    """
+    Create many notes for a user with one multi-row INSERT ... RETURNING per
+    chunk, all inside one transaction. Returns the created rows in input order.
+    """
+    notes_table = models.Note.__table__
+    change_seq = _next_change_seq(db, user_id)
+    created = []
+    
+    for start in range(0, len(notes), INSERT_CHUNK_SIZE):
+        values = [
+            {
+                "id": uuid4(),
+                "user_id": user_id,
+                "title": note.title,
+                **content_values(db, note.content),
+                "tags": note.tags,
+                "is_favorite": note.is_favorite,
+                "status": "active",
+                "change_seq": change_seq,
+            }
+            for note in notes[start:start + INSERT_CHUNK_SIZE]
+        ]
+        rows = {
+            row.id: row
+            for row in db.execute(insert(notes_table).values(values).returning(*notes_table.c))
+        }
+        _link_note_tags(db, user_id, {value["id"]: value["tags"] for value in values})
+        created.extend(rows[value["id"]] for value in values)
+    
+    if created:
+        _notes_written(db, user_id, "created", notes=created)
+    db.commit()
+    return created
+
+
+class VersionConflict(Exception):
+    """The note exists, but not at any of the versions the update was conditional on"""
+    
+    def __init__(self, version: int):
+        super().__init__(f"Note is at version {version}")
+        self.version = version
+
+
+def _update_note_returning(
+    db: Session,
+    note_id: UUID,
+    user_id: UUID,
+    values: dict,
+    if_versions: Optional[List[int]] = None
+) -> Optional[Row]:
+    """
+    Apply `values` to a user's note in a single UPDATE ... RETURNING round trip.
+    Returns the updated row, or None if the note does not exist for this user.
+    
+    With `if_versions`, the UPDATE only matches the note at one of those
+    versions, so a concurrent write in between makes it miss instead of
+    being overwritten. Only then is the note looked up again, to raise
+    VersionConflict rather than return None.
+    """
+    notes = models.Note.__table__
+    
+    if not values:
+        row = db.execute(
+            select(*notes.c).where(notes.c.id == note_id, notes.c.user_id == user_id)
+        ).first()
+        if row is not None and if_versions is not None and row.version not in if_versions:
+            raise VersionConflict(row.version)
+        return row
+    
+    change_seq = _next_change_seq(db, user_id)
+    rows = _update_notes(db, [note_id], user_id, values, change_seq, if_versions)
+    if rows:
+        return rows[0]
+    if if_versions is not None:
+        version = get_note_version(db, note_id, user_id)
+        if version is not None:
+            raise VersionConflict(version)
+    return None
+
+
+def _update_notes(
+    db: Session,
+    note_ids: List[UUID],
+    user_id: UUID,
+    values: dict,
+    change_seq: Optional[int],
+    if_versions: Optional[List[int]] = None
+) -> List[Row]:
+    """
+    Apply `values` to the user's notes among `note_ids` with one
+    UPDATE ... RETURNING that also bumps their version; with `if_versions`,
+    only notes at one of those versions are updated. When title, content or
+    tags change, the versions being replaced are read first and saved as
+    revisions. The caller has already advanced the user's change_seq, whose
+    row lock keeps other writes to the user's notes out until commit, so
+    that read is current.
+    """
+    notes = models.Note.__table__
+    condition = notes.c.id.in_(note_ids) & (notes.c.user_id == user_id)
+    previous = {}
+    if REVISION_FIELDS & values.keys():
+        previous = {row.id: row for row in db.execute(select(*notes.c, _last_snapshot(notes)).where(condition))}
+        if not previous:
+            return []
+    
+    if if_versions is not None:
+        condition &= notes.c.version.in_(if_versions)
+    rows = db.execute(
+        update(notes)
+        .where(condition)
+        .values(**_stored_values(db, values), change_seq=change_seq, version=notes.c.version + 1)
+        .returning(*notes.c)
+    ).all()
+    if previous:
+        _save_revisions(db, [(previous[row.id], row) for row in rows])
+    return rows
 
+
+def update_note(
+    db: Session, 
+    note_id: UUID, 
+    user_id: UUID, 
+    note_update: schemas.NoteUpdate,
+    if_versions: Optional[List[int]] = None
+) -> Optional[Row]:
+    """
+    Update note title and/or content, optionally only if the note is at one
+    of `if_versions` (raises VersionConflict otherwise)
+    """
+    update_data = note_update.model_dump(exclude_unset=True)
+    db_note = _update_note_returning(db, note_id, user_id, update_data, if_versions)
+    
+    if not db_note:
+        return None
+    
+    if "tags" in update_data:
+        _sync_note_tags(db, note_id, user_id, db_note.tags)
+    
+    if update_data:
+        _notes_written(db, user_id, _update_event_type(update_data), notes=[db_note])
     db.commit()
+    return db_note
 
 
+def update_note_status(
+    db: Session,
+    note_id: UUID,
+    user_id: UUID,
+    status: str
+) -> Optional[Row]:
+    """Update note status (archive/unarchive)"""
+    db_note = _update_note_returning(db, note_id, user_id, {"status": status})
+    
+    if not db_note:
+        return None
     
+    _notes_written(db, user_id, "status", notes=[db_note])
+    db.commit()
+    return db_note
 
 
-    return delete_count
+# IDs per statement for set-based UPDATE/DELETE; keeps each one well under
+# the bind parameter limits of SQLite and PostgreSQL
+ID_CHUNK_SIZE = 1000
+
+
+def update_notes_bulk(
+    db: Session,
+    note_ids: List[UUID],
+    user_id: UUID,
+    values: dict
+) -> List[Row]:
+    """
+    Apply the same changes to many of a user's notes with set-based
+    UPDATE ... RETURNING statements, in one transaction.
+    Returns the updated rows; IDs that do not exist or belong to another user are ignored.
+    """
+    unique_ids = list(dict.fromkeys(note_ids))
+    change_seq = _next_change_seq(db, user_id) if unique_ids else None
+    updated = []
+    
+    for start in range(0, len(unique_ids), ID_CHUNK_SIZE):
+        chunk = unique_ids[start:start + ID_CHUNK_SIZE]
+        rows = _update_notes(db, chunk, user_id, values, change_seq)
+        
+        if "tags" in values and rows:
+            updated_ids = [row.id for row in rows]
+            db.execute(delete(models.note_tags).where(models.note_tags.c.note_id.in_(updated_ids)))
+            _link_note_tags(db, user_id, {note_id: values["tags"] for note_id in updated_ids})
+        
+        updated.extend(rows)
+    
+    if updated:
+        _notes_written(db, user_id, _update_event_type(values), notes=updated)
+    db.commit()
+    return updated
+
+
+def delete_notes_by_ids(db: Session, note_ids: List[UUID], user_id: UUID) -> List[UUID]:
+    """
+    Permanently delete multiple notes by their IDs for a specific user.
+    Returns the IDs that were actually deleted; IDs that do not exist or
+    belong to another user are ignored.
+    """
+    notes = models.Note.__table__
+    unique_ids = list(dict.fromkeys(note_ids))
+    change_seq = _next_change_seq(db, user_id) if unique_ids else None
+    deleted_ids = []
+    
+    for start in range(0, len(unique_ids), ID_CHUNK_SIZE):
+        chunk = unique_ids[start:start + ID_CHUNK_SIZE]
+        deleted_ids.extend(db.scalars(
+            delete(notes)
+            .where(notes.c.id.in_(chunk), notes.c.user_id == user_id)
+            .returning(notes.c.id)
+        ))
+    
+    _record_tombstones(db, user_id, deleted_ids, change_seq)
+    db.commit()
+    return deleted_ids
 
 
 
@@ -219,9 +1135,15 @@ def delete_note_permanently(db: Session, note_id: UUID, user_id: UUID) -> bool:
     
 
 
+    change_seq = _next_change_seq(db, user_id)
+
+
     db.delete(db_note)
 
 
+    _record_tombstones(db, user_id, [note_id], change_seq)
+
+
     db.commit()
 
 
@@ -0,0 +1,257 @@
+# Async database operations
+#
+# Each function runs the matching sync function from app.crud on the
+# AsyncSession's underlying Session via run_sync. The SQL is awaited on the
+# event loop through the async driver instead of blocking a threadpool slot,
+# and both paths share one implementation of every query.
+
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import crud, models, schemas
+from uuid import UUID
+from typing import AsyncIterator, List, Optional, Tuple
+from datetime import datetime
+
+
+# User CRUD
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
+    """Get user by email"""
+    return await db.run_sync(crud.get_user_by_email, email)
+
+
+async def get_user_by_id(db: AsyncSession, user_id: UUID) -> Optional[models.User]:
+    """Get user by ID"""
+    return await db.run_sync(crud.get_user_by_id, user_id)
+
+
+async def create_user(db: AsyncSession, email: str) -> models.User:
+    """Create new user"""
+    return await db.run_sync(crud.create_user, email)
+
+
+# Tags
+async def get_tag_counts(
+    db: AsyncSession,
+    user_id: UUID,
+    status: Optional[str] = None
+) -> List[Tuple[str, int]]:
+    """Count a user's notes per tag, most used first, without loading the notes"""
+    return await db.run_sync(crud.get_tag_counts, user_id, status=status)
+
+
+# Note CRUD
+async def get_note_by_id(db: AsyncSession, note_id: UUID, user_id: UUID) -> Optional[models.Note]:
+    """Get a specific note by ID for a user"""
+    return await db.run_sync(crud.get_note_by_id, note_id, user_id)
+
+
+async def get_notes_by_user(
+    db: AsyncSession,
+    user_id: UUID,
+    status: Optional[str] = None,
+    is_favorite: Optional[bool] = None,
+    tags: Optional[List[str]] = None,
+    match_all_tags: bool = True
+) -> List[models.Note]:
+    """Get all notes for a user, optionally filtered by status, favorite and tags"""
+    return await db.run_sync(
+        crud.get_notes_by_user,
+        user_id,
+        status=status,
+        is_favorite=is_favorite,
+        tags=tags,
+        match_all_tags=match_all_tags
+    )
+
+
+async def get_recent_notes_by_user(db: AsyncSession, user_id: UUID) -> List[models.Note]:
+    """Get notes for a user that were created or updated in the last 24 hours."""
+    return await db.run_sync(crud.get_recent_notes_by_user, user_id)
+
+
+async def get_notes_fingerprint_by_user(
+    db: AsyncSession,
+    user_id: UUID,
+    status: Optional[str] = None,
+    is_favorite: Optional[bool] = None,
+    tags: Optional[List[str]] = None,
+    match_all_tags: bool = True
+) -> Optional[Tuple[int, int]]:
+    """The user's change_seq and their matching note count, see crud.get_notes_fingerprint"""
+    def fingerprint(session):
+        return crud.get_notes_fingerprint(crud.notes_by_user_query(
+            session,
+            user_id,
+            status=status,
+            is_favorite=is_favorite,
+            tags=tags,
+            match_all_tags=match_all_tags
+        ), user_id)
+
+    return await db.run_sync(fingerprint)
+
+
+async def get_recent_notes_fingerprint(db: AsyncSession, user_id: UUID) -> Optional[Tuple[int, int]]:
+    """The user's change_seq and their recent note count"""
+    def fingerprint(session):
+        return crud.get_notes_fingerprint(crud.recent_notes_query(session, user_id), user_id)
+
+    return await db.run_sync(fingerprint)
+
+
+async def get_note_updated_at(db: AsyncSession, note_id: UUID, user_id: UUID) -> Optional[datetime]:
+    """Get only the updated_at of a user's note"""
+    return await db.run_sync(crud.get_note_updated_at, note_id, user_id)
+
+
+async def get_note_version(db: AsyncSession, note_id: UUID, user_id: UUID) -> Optional[int]:
+    """Get only the version of a user's note"""
+    return await db.run_sync(crud.get_note_version, note_id, user_id)
+
+
+async def fetch_notes_by_user(
+    db: AsyncSession,
+    user_id: UUID,
+    summary: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    status: Optional[str] = None,
+    is_favorite: Optional[bool] = None,
+    tags: Optional[List[str]] = None,
+    match_all_tags: bool = True
+) -> Tuple[list, Optional[str]]:
+    """Fetch a user's notes (optionally as summaries, optionally one page), see crud.fetch_notes"""
+    def fetch(session):
+        query = crud.notes_by_user_query(
+            session,
+            user_id,
+            status=status,
+            is_favorite=is_favorite,
+            tags=tags,
+            match_all_tags=match_all_tags
+        )
+        return crud.fetch_notes(crud.summarize(query) if summary else query, limit, after)
+
+    return await db.run_sync(fetch)
+
+
+async def fetch_recent_notes(
+    db: AsyncSession,
+    user_id: UUID,
+    summary: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[str] = None
+) -> Tuple[list, Optional[str]]:
+    """Fetch a user's recent notes (optionally as summaries, optionally one page)"""
+    def fetch(session):
+        query = crud.recent_notes_query(session, user_id)
+        return crud.fetch_notes(crud.summarize(query) if summary else query, limit, after)
+
+    return await db.run_sync(fetch)
+
+
+async def iter_export_batches(db: AsyncSession, user_id: UUID) -> AsyncIterator[List[Row]]:
+    """Stream a user's notes in batches, see crud.iter_export_batches"""
+    result = await db.stream(crud.export_notes_query(user_id))
+    async for batch in result.partitions():
+        yield batch
+
+
+async def search_notes(
+    db: AsyncSession,
+    user_id: UUID,
+    q: str,
+    status: Optional[str] = None,
+    is_favorite: Optional[bool] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> List[Tuple[models.Note, float, str]]:
+    """Full-text search over a user's notes, see crud.search_notes"""
+    return await db.run_sync(
+        crud.search_notes,
+        user_id,
+        q,
+        status=status,
+        is_favorite=is_favorite,
+        limit=limit,
+        offset=offset
+    )
+
+
+async def get_changes(
+    db: AsyncSession,
+    user_id: UUID,
+    since: Optional[int] = None
+) -> Optional[Tuple[List[models.Note], List[UUID], int]]:
+    """Notes written and deleted since a change_seq, see crud.get_changes (raises crud.SyncTokenExpired)"""
+    return await db.run_sync(crud.get_changes, user_id, since=since)
+
+
+async def create_note(db: AsyncSession, note: schemas.NoteCreate, user_id: UUID) -> models.Note:
+    """Create a new note"""
+    return await db.run_sync(crud.create_note, note, user_id)
+
+
+async def create_notes_bulk(
+    db: AsyncSession,
+    notes: List[schemas.NoteCreate],
+    user_id: UUID
+) -> List[Row]:
+    """Create many notes for a user in one transaction, see crud.create_notes_bulk"""
+    return await db.run_sync(crud.create_notes_bulk, notes, user_id)
+
+
+async def update_note(
+    db: AsyncSession,
+    note_id: UUID,
+    user_id: UUID,
+    note_update: schemas.NoteUpdate,
+    if_versions: Optional[List[int]] = None
+) -> Optional[Row]:
+    """Update note title and/or content, optionally only if the note is at one of `if_versions`"""
+    return await db.run_sync(crud.update_note, note_id, user_id, note_update, if_versions)
+
+
+async def get_note_revisions(db: AsyncSession, note_id: UUID, user_id: UUID) -> Optional[List[Row]]:
+    """A note's revisions newest first, without content; None if the note does not exist for this user"""
+    return await db.run_sync(crud.get_note_revisions, note_id, user_id)
+
+
+async def get_note_revision(db: AsyncSession, note_id: UUID, user_id: UUID, revision: int) -> Optional[dict]:
+    """Rebuild one revision of a user's note; None if the note or the revision does not exist"""
+    return await db.run_sync(crud.get_note_revision, note_id, user_id, revision)
+
+
+async def restore_note_revision(db: AsyncSession, note_id: UUID, user_id: UUID, revision: int) -> Optional[Row]:
+    """Make a revision the note's current version"""
+    return await db.run_sync(crud.restore_note_revision, note_id, user_id, revision)
+
+
+async def update_note_status(
+    db: AsyncSession,
+    note_id: UUID,
+    user_id: UUID,
+    status: str
+) -> Optional[Row]:
+    """Update note status (archive/unarchive)"""
+    return await db.run_sync(crud.update_note_status, note_id, user_id, status)
+
+
+async def update_notes_bulk(
+    db: AsyncSession,
+    note_ids: List[UUID],
+    user_id: UUID,
+    values: dict
+) -> List[Row]:
+    """Apply the same changes to many of a user's notes, see crud.update_notes_bulk"""
+    return await db.run_sync(crud.update_notes_bulk, note_ids, user_id, values)
+
+
+async def delete_notes_by_ids(db: AsyncSession, note_ids: List[UUID], user_id: UUID) -> List[UUID]:
+    """Permanently delete multiple notes by their IDs for a specific user."""
+    return await db.run_sync(crud.delete_notes_by_ids, note_ids, user_id)
+
+
+async def delete_note_permanently(db: AsyncSession, note_id: UUID, user_id: UUID) -> bool:
+    """Permanently delete a note"""
+    return await db.run_sync(crud.delete_note_permanently, note_id, user_id)
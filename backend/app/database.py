@@ -1,20 +1,201 @@
 # Database connection and session
 
-from sqlalchemy import create_engine
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.sqlite.aiosqlite import AsyncAdapt_aiosqlite_connection
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.compression import sql_note_content
 
-engine = create_engine(settings.database_url)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(database_url: str) -> str:
+    """Swap the sync driver in a database URL for its asyncio counterpart"""
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]).render_as_string(hide_password=False)
+
+
+class PoolStats:
+    """Checkout wait times recorded by one connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": self.total_wait / attempts * 1000 if attempts else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+
+
+class _CheckoutTimingMixin:
+    """Time how long each checkout waits for a free connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(database_url: str, is_async: bool = False) -> dict:
+    """Pool and timeout keyword arguments for create_engine/create_async_engine"""
+    backend = make_url(database_url).get_backend_name()
+    if backend == "sqlite":
+        # SQLite picks its own pool per file/memory database and has no
+        # server-side statement timeout
+        return {}
+    
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    
+    if backend == "postgresql" and settings.db_statement_timeout_ms:
+        timeout = str(settings.db_statement_timeout_ms)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    
+    return options
+
+
+def pool_status(engine) -> dict:
+    """Saturation and checkout wait times of an engine's connection pool"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    
+    max_overflow = max(pool._max_overflow, 0)
+    capacity = pool.size() + max_overflow
+    status = {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": max_overflow,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": pool.checkedout() / capacity if capacity else 0.0,
+    }
+    if isinstance(pool, _CheckoutTimingMixin):
+        status.update(pool.stats.snapshot())
+    return status
+
+
+# Engines whose pools a forked worker must not share with its parent
+_fork_safe_engines = weakref.WeakSet()
+
+
+def dispose_after_fork(engine: Engine) -> Engine:
+    """Give a forked child fresh pools instead of the parent's open connections"""
+    _fork_safe_engines.add(engine)
+    return engine
+
+
+def _dispose_inherited_pools() -> None:
+    # close=False leaves the sockets to the parent, which still owns them
+    for fork_safe_engine in list(_fork_safe_engines):
+        fork_safe_engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_inherited_pools)
+
+
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async engine is only built when enabled so the sync deployment does not
+# need asyncpg/aiosqlite installed.
+async_engine = create_async_engine(
+    to_async_url(settings.database_url),
+    **engine_options(settings.database_url, is_async=True)
+) if settings.async_database else None
+dispose_after_fork(engine)
+if async_engine is not None:
+    dispose_after_fork(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
+@event.listens_for(Engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite ignores ON DELETE CASCADE unless foreign keys are switched on per connection"""
+    if isinstance(dbapi_connection, (sqlite3.Connection, AsyncAdapt_aiosqlite_connection)):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+        # Used by the notes_fts triggers to index compressed note content
+        dbapi_connection.create_function("note_content", 2, sql_note_content, deterministic=True)
+
+
 def get_db():
     """Dependency for getting database session"""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,47 @@
+# ETag helpers for conditional GET (If-None-Match / 304 Not Modified) and
+# conditional writes (If-Match / 412 Precondition Failed)
+
+import hashlib
+from typing import List, Optional
+from fastapi import Request, Response
+
+# Let clients keep a copy but revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag derived from the values that determine a representation"""
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header covers this ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so a W/ prefix does not matter
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def if_match_tags(request: Request) -> Optional[List[str]]:
+    """
+    The entity tags an If-Match header accepts, or None when the header is
+    missing or "*" (any current version). If-Match uses strong comparison,
+    so weak tags are left out: they never match.
+    """
+    header = request.headers.get("if-match")
+    if not header or header.strip() == "*":
+        return None
+    return [tag.strip() for tag in header.split(",") if not tag.strip().startswith("W/")]
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
@@ -0,0 +1,212 @@
+# Note change events, published after commit and streamed to clients over SSE
+#
+# crud queues an event next to every note write. The Session hooks below turn
+# the queue into schemas.NoteEvent right before commit and hand the events to
+# the broker once the commit has succeeded; a rollback drops them.
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Sequence, Set
+from uuid import UUID
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import schemas
+
+# Events buffered per subscriber before it counts as too slow to keep up
+SUBSCRIBER_QUEUE_SIZE = 256
+# Seconds between SSE comments that keep idle connections open through proxies
+KEEPALIVE_INTERVAL = 15.0
+
+_PENDING = "pending_note_events"
+_READY = "ready_note_events"
+
+
+class Subscription:
+    """
+    One SSE client's bounded queue of events. When the queue overflows the
+    client is cut off with a resync marker instead of blocking the publisher
+    or buffering without limit; it catches up through GET /notes/changes.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, note_event: schemas.NoteEvent) -> None:
+        """Queue an event from any thread"""
+        self._loop.call_soon_threadsafe(self._put, note_event)
+
+    def _put(self, note_event: schemas.NoteEvent) -> None:
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(note_event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    async def get(self) -> Optional[schemas.NoteEvent]:
+        """Next event, or None once the subscriber has fallen behind"""
+        return await self._queue.get()
+
+
+class EventBroker:
+    """
+    Fans note events out to subscribers.
+    
+    publish() is called from the committing thread and must not block.
+    LocalEventBroker only reaches subscribers in this process. To share
+    events between workers, subclass SharedEventBroker instead.
+    """
+
+    def has_listeners(self, user_id: UUID) -> bool:
+        """
+        Whether events for this user need to be built at all. A broker that
+        publishes to other workers cannot know and must answer True.
+        """
+        return True
+
+    def publish(self, user_id: UUID, note_event: schemas.NoteEvent) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, user_id: UUID):
+        """Async context manager yielding a Subscription to a user's events"""
+        raise NotImplementedError
+
+
+class LocalEventBroker(EventBroker):
+    """In-process broker; skips building events for users with no subscriber here"""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: Dict[UUID, Set[Subscription]] = {}
+
+    def has_listeners(self, user_id: UUID) -> bool:
+        return user_id in self._subscribers
+
+    def publish(self, user_id: UUID, note_event: schemas.NoteEvent) -> None:
+        self.deliver(user_id, note_event)
+
+    def deliver(self, user_id: UUID, note_event: schemas.NoteEvent) -> None:
+        """Hand an event to this process's subscribers for the user"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.deliver(note_event)
+            except RuntimeError:
+                # The subscriber's event loop has shut down
+                self._remove(user_id, subscription)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: UUID) -> AsyncIterator[Subscription]:
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._remove(user_id, subscription)
+
+    def _remove(self, user_id: UUID, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+
+class SharedEventBroker(LocalEventBroker):
+    """
+    Base for brokers that share events between workers: send each event to
+    the shared backend (e.g. Redis pub/sub) in publish(), and feed what the
+    backend receives to deliver() from a listener in each worker. Every
+    write is published, as its subscribers may be on another worker.
+    """
+
+    def has_listeners(self, user_id: UUID) -> bool:
+        return True
+
+    def publish(self, user_id: UUID, note_event: schemas.NoteEvent) -> None:
+        raise NotImplementedError
+
+
+broker: EventBroker = LocalEventBroker()
+
+
+def set_broker(new_broker: EventBroker) -> None:
+    """Swap the broker, e.g. for a shared backend when running several workers"""
+    global broker
+    broker = new_broker
+
+
+def queue_note_event(
+    db: Session,
+    user_id: UUID,
+    type: str,
+    notes: Sequence = (),
+    deleted_ids: Sequence[UUID] = (),
+    change_seq: Optional[int] = None
+) -> None:
+    """Queue an event to publish when the session commits"""
+    db.info.setdefault(_PENDING, []).append((user_id, type, list(notes), list(deleted_ids), change_seq))
+
+
+@event.listens_for(Session, "before_commit")
+def _build_note_events(session: Session) -> None:
+    # Built while the session can still load attributes; after commit the
+    # ORM objects are expired
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    ready = session.info.setdefault(_READY, [])
+    for user_id, type, notes, deleted_ids, change_seq in pending:
+        if not broker.has_listeners(user_id):
+            continue
+        if change_seq is None:
+            change_seq = max(note.change_seq for note in notes)
+        ready.append((user_id, schemas.NoteEvent(
+            type=type,
+            change_seq=change_seq,
+            notes=[schemas.NoteResponse.model_validate(note) for note in notes],
+            deleted_ids=deleted_ids
+        )))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_note_events(session: Session) -> None:
+    for user_id, note_event in session.info.pop(_READY, ()):
+        broker.publish(user_id, note_event)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_note_events(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+    session.info.pop(_READY, None)
+
+
+def format_sse(note_event: schemas.NoteEvent) -> str:
+    return f"id: {note_event.change_seq}\nevent: {note_event.type}\ndata: {note_event.model_dump_json()}\n\n"
+
+
+async def sse_stream(user_id: UUID) -> AsyncIterator[str]:
+    """Server-sent events for a user's note changes, until the client disconnects or falls behind"""
+    async with broker.subscribe(user_id) as subscription:
+        # Sends the response headers right away
+        yield ": connected\n\n"
+        while True:
+            try:
+                note_event = await asyncio.wait_for(subscription.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if note_event is None:
+                yield "event: resync\ndata: {}\n\n"
+                return
+            yield format_sse(note_event)
@@ -0,0 +1,73 @@
+# Encoders for streamed note exports (NDJSON or CSV, optionally gzipped)
+#
+# An encoder turns one batch of rows at a time into bytes, so an export never
+# holds more than a batch in memory however many notes the user has.
+
+import csv
+import io
+import json
+import zlib
+from typing import Iterable
+from app.compression import note_content
+
+EXPORT_FIELDS = ("id", "title", "content", "tags", "status", "is_favorite", "created_at", "updated_at")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def export_record(row) -> dict:
+    """JSON-ready fields of an exported note row"""
+    return {
+        "id": str(row.id),
+        "title": row.title,
+        "content": note_content(row),
+        "tags": row.tags,
+        "status": row.status,
+        "is_favorite": row.is_favorite,
+        "created_at": row.created_at.isoformat(),
+        "updated_at": row.updated_at.isoformat(),
+    }
+
+
+class ExportEncoder:
+    def __init__(self, format: str, compress: bool = False):
+        self.format = format
+        # wbits=31 writes a gzip container rather than a bare zlib stream
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    @property
+    def media_type(self) -> str:
+        return "application/gzip" if self._compressor else MEDIA_TYPES[self.format]
+
+    def filename(self, stem: str) -> str:
+        return f"{stem}.{self.format}" + (".gz" if self._compressor else "")
+
+    def start(self) -> bytes:
+        if self.format == "csv":
+            return self._output(self._csv(EXPORT_FIELDS))
+        return b""
+
+    def encode(self, rows: Iterable) -> bytes:
+        if self.format == "csv":
+            text = "".join(
+                self._csv(export_record(row)[field] for field in EXPORT_FIELDS) for row in rows
+            )
+        else:
+            text = "".join(json.dumps(export_record(row), ensure_ascii=False) + "\n" for row in rows)
+        return self._output(text)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush() if self._compressor else b""
+
+    def _output(self, text: str) -> bytes:
+        data = text.encode("utf-8")
+        return self._compressor.compress(data) if self._compressor else data
+
+    @staticmethod
+    def _csv(values) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue()
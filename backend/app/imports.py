@@ -0,0 +1,113 @@
+# Incremental NDJSON note imports (optionally gzipped)
+#
+# The upload is decompressed and split into lines as it arrives, and valid
+# notes are inserted and committed one chunk at a time, so an import never
+# holds more than a chunk of notes in memory however large the upload is.
+
+import zlib
+from typing import Any, AsyncIterator, Awaitable, Callable, List
+from pydantic import ValidationError
+from app import schemas
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_LINE_BYTES = 1024 * 1024
+MAX_REPORTED_ERRORS = 100
+# Cap on bytes inflated per step, so a small gzip body cannot expand all at once
+INFLATE_STEP = 64 * 1024
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class InvalidImport(ValueError):
+    """Raised when an upload cannot be decoded into NDJSON lines"""
+
+
+async def _decoded(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Pass the body through, inflating it first if it starts with the gzip magic"""
+    head = b""
+    async for chunk in chunks:
+        head += chunk
+        if len(head) >= len(GZIP_MAGIC):
+            break
+    
+    if not head.startswith(GZIP_MAGIC):
+        if head:
+            yield head
+        async for chunk in chunks:
+            yield chunk
+        return
+    
+    decompressor = zlib.decompressobj(wbits=31)
+    data = head
+    try:
+        while data is not None:
+            while data:
+                out = decompressor.decompress(data, INFLATE_STEP)
+                data = decompressor.unconsumed_tail
+                if decompressor.eof and decompressor.unused_data:
+                    # Concatenated gzip members, as written by `cat a.gz b.gz`
+                    data = decompressor.unused_data
+                    decompressor = zlib.decompressobj(wbits=31)
+                if out:
+                    yield out
+            data = await anext(chunks, None)
+    except zlib.error as e:
+        raise InvalidImport(f"Invalid gzip data: {e}")
+    
+    if not decompressor.eof:
+        raise InvalidImport("Truncated gzip data")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a (possibly gzipped) byte stream into lines as it arrives"""
+    buffer = b""
+    async for data in _decoded(chunks):
+        *lines, buffer = (buffer + data).split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > MAX_LINE_BYTES:
+            raise InvalidImport(f"Line longer than {MAX_LINE_BYTES} bytes")
+    if buffer:
+        yield buffer
+
+
+async def run_import(
+    lines: AsyncIterator[bytes],
+    insert: Callable[[List[schemas.NoteCreate]], Awaitable[Any]],
+    progress: schemas.ImportProgress,
+    resume_from: int = 0
+) -> schemas.ImportProgress:
+    """
+    Validate each line as a NoteCreate and insert the valid ones IMPORT_CHUNK_SIZE
+    at a time. `progress` is updated after every committed chunk, so a caller
+    that hits an error can still report how far the import got; lines up to
+    `resume_from` are skipped, which lets an interrupted import carry on.
+    """
+    chunk = []
+    progress.committed_lines = resume_from
+    line_number = 0
+    
+    async for line in lines:
+        line_number += 1
+        if line_number <= resume_from:
+            continue
+        if line.strip():
+            try:
+                chunk.append(schemas.NoteCreate.model_validate_json(line))
+            except ValidationError as e:
+                progress.failed += 1
+                if len(progress.errors) < MAX_REPORTED_ERRORS:
+                    progress.errors.append(schemas.ImportLineError(
+                        line=line_number,
+                        errors=[{"loc": err["loc"], "msg": err["msg"], "type": err["type"]} for err in e.errors()]
+                    ))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            await insert(chunk)
+            progress.imported += len(chunk)
+            progress.committed_lines = line_number
+            chunk = []
+    
+    if chunk:
+        await insert(chunk)
+        progress.imported += len(chunk)
+    progress.committed_lines = max(line_number, resume_from)
+    return progress
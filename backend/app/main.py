@@ -1,10 +1,12 @@
 # FastAPI application entry point
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.database import engine, Base
-from app.routers import auth, notes
+from app.database import engine, async_engine, Base, pool_status
+from app import cache, metrics, startup
+from app.replicas import replica_set, ReadYourWritesMiddleware
+from app.routers import auth, notes, async_auth, async_notes
 
 app = FastAPI(
     title="Notes API",
@@ -13,8 +15,33 @@ app = FastAPI(
 )
 
 @app.on_event("startup")
-def on_startup():
-    Base.metadata.create_all(bind=engine)
+async def on_startup():
+    if settings.schema_startup == "check":
+        startup.ensure_schema_current(engine)
+    elif settings.schema_startup == "create_all":
+        Base.metadata.create_all(bind=engine)
+    
+    # Only the engine that serves requests is worth warming
+    warm_connections = min(settings.db_pool_warmup, settings.db_pool_size)
+    if async_engine is not None:
+        await startup.warm_up_async(async_engine, warm_connections)
+    else:
+        startup.warm_up(engine, warm_connections)
+    replica_set.start_health_checks(settings.replica_health_interval)
+
+@app.on_event("shutdown")
+def on_shutdown():
+    replica_set.stop_health_checks()
+
+metrics.instrument_engine(engine)
+if async_engine is not None:
+    metrics.instrument_engine(async_engine.sync_engine)
+for replica in replica_set.replicas:
+    metrics.instrument_engine(replica.engine)
+    if replica.async_engine is not None:
+        metrics.instrument_engine(replica.async_engine.sync_engine)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -25,9 +52,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
-app.include_router(auth.router)
-app.include_router(notes.router)
+# Include routers; the async database path serves the same routes
+if settings.async_database:
+    app.include_router(async_auth.router)
+    app.include_router(async_notes.router)
+else:
+    app.include_router(auth.router)
+    app.include_router(notes.router)
 
 
 @app.get("/")
@@ -43,4 +74,33 @@ def root():
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/health/db")
+def database_health():
+    """Connection pool saturation and checkout wait times, and read replica health"""
+    report = {"engine": pool_status(engine)}
+    if async_engine is not None:
+        report["async_engine"] = pool_status(async_engine.sync_engine)
+    if replica_set.replicas:
+        report["replicas"] = replica_set.status()
+    return report
+
+
+@app.get("/health/cache")
+def cache_health():
+    """Note list cache size and hit/miss/eviction counters"""
+    return cache.notes_cache.stats()
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Request, SQL, connection pool and cache metrics in Prometheus text format"""
+    pools = {"sync": pool_status(engine)}
+    if async_engine is not None:
+        pools["async"] = pool_status(async_engine.sync_engine)
+    for index, replica in enumerate(replica_set.replicas):
+        pools[f"replica{index}"] = pool_status(replica.engine)
+    body = metrics.render(metrics.pool_metrics(pools) + metrics.cache_metrics(cache.notes_cache.stats()))
+    return Response(body, media_type=metrics.CONTENT_TYPE)
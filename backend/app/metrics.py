@@ -0,0 +1,224 @@
+# Prometheus text-format metrics: request latency per route and SQL per request
+#
+# MetricsMiddleware is plain ASGI so it adds one dict lookup and a couple of
+# clock reads per request, and keeps working for streaming responses. The
+# engine hooks charge each statement to the request running it through a
+# ContextVar, which follows the request into threadpool workers and the
+# AsyncSession greenlet.
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [count per bucket (last is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status code",
+                   ("method", "route", "status"))
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route template",
+                            ("method", "route"), LATENCY_BUCKETS)
+REQUEST_STATEMENTS = Histogram("http_request_db_statements", "SQL statements executed per request",
+                               ("method", "route"), STATEMENT_BUCKETS)
+REQUEST_DB_TIME = Histogram("http_request_db_duration_seconds", "Time spent executing SQL per request",
+                            ("method", "route"), LATENCY_BUCKETS)
+STATEMENTS = Counter("db_statements_total", "SQL statements executed")
+STATEMENT_TIME = Counter("db_statement_duration_seconds_total", "Time spent executing SQL")
+
+REGISTRY = [REQUESTS, REQUEST_LATENCY, REQUEST_STATEMENTS, REQUEST_DB_TIME, STATEMENTS, STATEMENT_TIME]
+
+
+class RequestDbStats:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+_request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+# The start time lives on the statement's execution context rather than the
+# pooled connection, so a statement that raises leaves nothing behind
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_metrics_start", None)
+    elapsed = 0.0 if start is None else time.perf_counter() - start
+    STATEMENTS.inc()
+    STATEMENT_TIME.inc(amount=elapsed)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += elapsed
+
+
+def instrument_engine(engine) -> None:
+    """Count statements and SQL time on a (sync) Engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """Record latency, status and SQL statements of every HTTP request per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        stats = RequestDbStats()
+        token = _request_db_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_db_stats.reset(token)
+            # The router stores the matched route in the scope; label by its
+            # template so /notes/{note_id} is one series, not one per note
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else "unmatched")
+            REQUESTS.inc(labels + (status_code,))
+            REQUEST_LATENCY.observe(labels, elapsed)
+            REQUEST_STATEMENTS.observe(labels, stats.statements)
+            REQUEST_DB_TIME.observe(labels, stats.seconds)
+
+
+def render_samples(name: str, kind: str, documentation: str, samples: Dict[str, float]) -> List[str]:
+    """One metric family from pre-formatted label strings ('' for none) to values"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples.items():
+        lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+    return lines
+
+
+# database.pool_status key -> (metric name, type, help, scale)
+POOL_METRICS = {
+    "size": ("db_pool_size", "gauge", "Connections the pool keeps open", 1),
+    "max_overflow": ("db_pool_max_overflow", "gauge", "Connections allowed beyond the pool size", 1),
+    "checked_out": ("db_pool_checked_out", "gauge", "Connections in use", 1),
+    "checked_in": ("db_pool_checked_in", "gauge", "Idle connections in the pool", 1),
+    "overflow": ("db_pool_overflow", "gauge", "Overflow connections open", 1),
+    "saturation": ("db_pool_saturation", "gauge", "Checked-out share of pool size plus overflow", 1),
+    "checkouts": ("db_pool_checkouts_total", "counter", "Connection checkouts", 1),
+    "timeouts": ("db_pool_checkout_timeouts_total", "counter", "Checkouts that timed out waiting", 1),
+    "avg_wait_ms": ("db_pool_checkout_wait_avg_seconds", "gauge", "Average checkout wait", 0.001),
+    "max_wait_ms": ("db_pool_checkout_wait_max_seconds", "gauge", "Longest checkout wait", 0.001),
+}
+
+
+def pool_metrics(statuses: Dict[str, dict]) -> List[str]:
+    """Render database.pool_status() results, keyed by engine label"""
+    lines = []
+    for key, (name, kind, documentation, scale) in POOL_METRICS.items():
+        samples = {
+            f'engine="{engine}"': status[key] * scale
+            for engine, status in statuses.items() if key in status
+        }
+        if samples:
+            lines.extend(render_samples(name, kind, documentation, samples))
+    return lines
+
+
+def cache_metrics(stats: dict) -> List[str]:
+    """Render cache.CacheBackend.stats()"""
+    lines = []
+    for key, value in stats.items():
+        if key in ("entries", "max_entries"):
+            lines.extend(render_samples(f"notes_cache_{key}", "gauge", f"Note list cache {key}", {"": value}))
+        else:
+            lines.extend(render_samples(f"notes_cache_{key}_total", "counter", f"Note list cache {key}", {"": value}))
+    return lines
+
+
+def render(extra: Sequence[str] = ()) -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(extra)
+    return "\n".join(lines) + "\n"
@@ -1,47 +1,104 @@
 # SQLAlchemy ORM models
 import uuid
-from sqlalchemy import (Column, String, Text, ForeignKey, DateTime,
-                        CheckConstraint, Index, TypeDecorator, Boolean)
+from functools import lru_cache
+from sqlalchemy import (Column, String, Text, ForeignKey, DateTime, Table,
+                        CheckConstraint, Index, TypeDecorator, Boolean, DDL, event,
+                        UniqueConstraint, LargeBinary, BINARY, BigInteger, Integer)
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
 
+# UUIDs are immutable, so result rows can share instances. A list query
+# repeats the same user_id on every row; caching skips rebuilding it each time.
+@lru_cache(maxsize=4096)
+def _uuid_from_bytes(value: bytes) -> uuid.UUID:
+    return uuid.UUID(bytes=value)
+
+
+@lru_cache(maxsize=4096)
+def _uuid_from_hex(value: str) -> uuid.UUID:
+    return uuid.UUID(hex=value)
+
+
 class GUID(TypeDecorator):
     """Platform-independent GUID type.
 
-    Uses PostgreSQL's UUID type, otherwise uses
-    CHAR(32), storing as stringified hex values.
+    Uses PostgreSQL's UUID type, otherwise stores the 16 raw bytes
+    (BLOB on SQLite, BINARY(16) elsewhere). GUID(binary=False) keeps the
+    older CHAR(32) storage as stringified hex values.
     """
     impl = String(32)
     cache_ok = True
 
+    def __init__(self, binary: bool = True):
+        super().__init__()
+        self.binary = binary
+
     def load_dialect_impl(self, dialect):
         if dialect.name == 'postgresql':
             return dialect.type_descriptor(PG_UUID(as_uuid=True))
-        else:
+        elif not self.binary:
             return dialect.type_descriptor(String(32))
-
-    def process_bind_param(self, value, dialect):
-        if value is None:
-            return value
-        elif dialect.name == 'postgresql':
-            return str(value)
+        elif dialect.name == 'sqlite':
+            return dialect.type_descriptor(LargeBinary())
         else:
-            if not isinstance(value, uuid.UUID):
-                return "%.32x" % uuid.UUID(value).int
-            else:
-                # hexstring
-                return "%.32x" % value.int
-
-    def process_result_value(self, value, dialect):
-        if value is None:
-            return value
+            return dialect.type_descriptor(BINARY(16))
+
+    # bind_processor/result_processor are overridden rather than
+    # process_bind_param/process_result_value so the dialect and storage mode
+    # are resolved once per compiled statement, not once per value.
+    def bind_processor(self, dialect):
+        if dialect.name == 'postgresql':
+            impl_process = self.load_dialect_impl(dialect).bind_processor(dialect)
+
+            def process(value):
+                if value is not None and value.__class__ is not uuid.UUID:
+                    value = uuid.UUID(value)
+                return impl_process(value) if impl_process else value
+
+        elif self.binary:
+            def process(value):
+                if value is None:
+                    return value
+                if value.__class__ is not uuid.UUID:
+                    value = uuid.UUID(value)
+                return value.bytes
+
         else:
-            if not isinstance(value, uuid.UUID):
-                value = uuid.UUID(value)
-            return value
+            def process(value):
+                if value is None:
+                    return value
+                if value.__class__ is not uuid.UUID:
+                    value = uuid.UUID(value)
+                return value.hex
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        if dialect.name == 'postgresql':
+            return self.load_dialect_impl(dialect).result_processor(dialect, coltype)
+
+        convert = _uuid_from_bytes if self.binary else _uuid_from_hex
+
+        def process(value):
+            return None if value is None else convert(value)
+
+        return process
+
+
+# SQLite's CURRENT_TIMESTAMP has no fractional seconds, so bind datetimes the
+# same way; otherwise a round-tripped created_at never compares equal to the
+# stored value and keyset pagination skips or repeats rows.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d "
+                       "%(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
 
 
 class User(Base):
@@ -49,8 +106,13 @@ class User(Base):
     
     id = Column(GUID, primary_key=True, default=uuid.uuid4)
     email = Column(String(255), unique=True, nullable=False, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # Last value handed out by crud._next_change_seq for this user's notes
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # Highest change_seq whose tombstones were pruned; a delta sync from
+    # before it could miss deletes, so GET /notes/changes refuses it
+    sync_floor = Column(BigInteger, nullable=False, default=0, server_default="0")
+    created_at = Column(Timestamp, server_default=func.now(), nullable=False)
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now(), nullable=False)
     
     notes = relationship("Note", back_populates="user", cascade="all, delete-orphan")
 
@@ -61,12 +123,21 @@ class Note(Base):
     id = Column(GUID, primary_key=True, default=uuid.uuid4)
     user_id = Column(GUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(255), nullable=False)
+    # With compression on (see app.compression), a long note keeps only a
+    # preview-length prefix here and its full text compressed in content_blob
     content = Column(Text, nullable=False, default="")
+    content_blob = Column(LargeBinary, nullable=True)
+    # Full content length in characters; NULL on rows written before it existed
+    content_length = Column(Integer, nullable=True)
     tags = Column(Text, nullable=False, default="")
     status = Column(String(20), nullable=False, default="active")
     is_favorite = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # The user's change_seq as of the last write to this note, for delta sync
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # Bumped by every UPDATE; the note's ETag, checked against If-Match
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    created_at = Column(Timestamp, server_default=func.now(), nullable=False)
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now(), nullable=False)
     
     user = relationship("User", back_populates="notes")
     
@@ -75,4 +146,119 @@ class Note(Base):
         Index("idx_notes_user_id", "user_id"),
         Index("idx_notes_user_status", "user_id", "status"),
         Index("idx_notes_created_at", "created_at"),
-    )
\ No newline at end of file
+        # Serves the updated_at filter of the recent notes list
+        Index("idx_notes_user_updated", "user_id", "updated_at"),
+        # Serves keyset pagination of a user's notes newest-first
+        Index("idx_notes_user_created_id", user_id, created_at.desc(), id.desc()),
+        # Serves GET /notes/changes
+        Index("idx_notes_user_change_seq", "user_id", "change_seq"),
+    )
+
+
+
+class NoteTombstone(Base):
+    """Record of a deleted note, so clients syncing by change_seq learn of the delete"""
+    __tablename__ = "note_tombstones"
+    
+    note_id = Column(GUID, primary_key=True)
+    user_id = Column(GUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(Timestamp, server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index("idx_note_tombstones_user_change_seq", "user_id", "change_seq"),
+    )
+
+
+class NoteRevision(Base):
+    """An earlier version of a note, saved when an update replaced it (see app.revisions)"""
+    __tablename__ = "note_revisions"
+    
+    note_id = Column(GUID, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    revision = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String(255), nullable=False)
+    tags = Column(Text, nullable=False, default="")
+    # Exactly one is set: the full text of a snapshot, or the delta that
+    # rebuilds this version from the next newer one
+    content = Column(Text, nullable=True)
+    delta = Column(Text, nullable=True)
+    content_length = Column(Integer, nullable=False)
+    # When this version was written (the note's updated_at back then)
+    saved_at = Column(Timestamp, nullable=False)
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+    
+    id = Column(GUID, primary_key=True, default=uuid.uuid4)
+    user_id = Column(GUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String(255), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "name", name="uq_tags_user_name"),
+    )
+
+
+# Normalized form of Note.tags, kept in sync by crud. The primary key serves
+# "tags of a note"; idx_note_tags_tag_note serves "notes with a tag".
+note_tags = Table(
+    "note_tags",
+    Base.metadata,
+    Column("note_id", GUID, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", GUID, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("idx_note_tags_tag_note", "tag_id", "note_id"),
+)
+
+# Full-text search over title, content and tags. The index lives outside the
+# mapped columns so ORM queries never load it: PostgreSQL gets a generated
+# tsvector column with a GIN index, SQLite a trigger-maintained FTS5 table.
+# The SQLite triggers index the full text of compressed notes through the
+# note_content() function that app.database registers on every connection.
+NOTES_SEARCH_DDL = {
+    "postgresql": [
+        """
+        ALTER TABLE notes ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(tags, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(content, '')), 'C')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_notes_search_vector ON notes USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+            note_id UNINDEXED, title, content, tags, tokenize = 'porter unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+            INSERT INTO notes_fts (note_id, title, content, tags)
+            VALUES (new.id, new.title, note_content(new.content, new.content_blob), new.tags);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS notes_fts_delete AFTER DELETE ON notes BEGIN
+            DELETE FROM notes_fts WHERE note_id = old.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS notes_fts_update AFTER UPDATE OF title, content, content_blob, tags ON notes BEGIN
+            DELETE FROM notes_fts WHERE note_id = old.id;
+            INSERT INTO notes_fts (note_id, title, content, tags)
+            VALUES (new.id, new.title, note_content(new.content, new.content_blob), new.tags);
+        END
+        """,
+    ],
+}
+
+for _dialect, _statements in NOTES_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Note.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+
+event.listen(
+    Note.__table__,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS notes_fts").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,27 @@
+# Opaque keyset cursors for note lists
+
+import base64
+import json
+from datetime import datetime
+from uuid import UUID
+from typing import Tuple
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(created_at: datetime, note_id: UUID) -> str:
+    """Encode the (created_at, id) position of a note as an opaque token"""
+    raw = json.dumps([created_at.isoformat(), note_id.hex], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a token produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, note_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), UUID(hex=note_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid pagination cursor")
@@ -0,0 +1,37 @@
+# Batched retention job for note revision history
+#
+#   python -m app.prune_revisions [--batch-size 200] [--pause 0.05]
+#
+# Applies REVISION_RETENTION_DAYS and REVISION_MAX_PER_NOTE to every note's
+# revisions and thins revisions older than a day to one per hour, one
+# committed batch of notes at a time. Safe to run against a live database
+# and to stop at any point; a rerun leaves already pruned notes unchanged.
+
+import argparse
+import time
+
+from app import crud
+from app.database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune and compact note revision history")
+    parser.add_argument("--batch-size", type=int, default=200, help="Notes per batch")
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches")
+    args = parser.parse_args()
+
+    visited = deleted = 0
+    after = None
+    with SessionLocal() as db:
+        while True:
+            notes, removed, after = crud.prune_revisions_batch(db, after, args.batch_size)
+            visited += notes
+            deleted += removed
+            print(f"{visited} notes visited, {deleted} revisions deleted", flush=True)
+            if after is None:
+                break
+            time.sleep(args.pause)
+
+
+if __name__ == "__main__":
+    main()
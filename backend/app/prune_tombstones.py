@@ -0,0 +1,35 @@
+# Batched retention job for the tombstones of deleted notes
+#
+#   python -m app.prune_tombstones [--batch-size 1000] [--pause 0.05]
+#
+# Drops tombstones older than TOMBSTONE_RETENTION_DAYS, one committed batch
+# at a time, and raises each affected user's sync_floor so GET /notes/changes
+# answers 410 to a `since` that would have needed them. Safe to run against
+# a live database and to stop at any point.
+
+import argparse
+import time
+
+from app import crud
+from app.database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune tombstones of deleted notes")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Tombstones per batch")
+    parser.add_argument("--pause", type=float, default=0.05, help="Seconds to sleep between batches")
+    args = parser.parse_args()
+
+    deleted = 0
+    with SessionLocal() as db:
+        while True:
+            removed = crud.prune_tombstones_batch(db, args.batch_size)
+            deleted += removed
+            print(f"{deleted} tombstones deleted", flush=True)
+            if removed < args.batch_size:
+                break
+            time.sleep(args.pause)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+# Read-replica routing for read-only endpoints
+#
+# List and detail reads go round-robin to the healthy replicas in
+# settings.replica_database_urls; every write stays on the primary. After a
+# user's write commits, that user's reads stay on the primary for
+# replica_pin_seconds so they see their own write before it has replicated.
+# The pin travels with the client: ReadYourWritesMiddleware sets a cookie
+# holding the commit time on the response to the write, and whichever worker
+# gets the next read keeps it on the primary until the window has passed.
+# Workers on different hosts compare wall-clock times, so keep their clocks
+# in sync. The worker that took the write also pins the user in process, for
+# clients that do not send cookies back.
+#
+# A background thread checks each replica every replica_health_interval and
+# stops sending it reads while it is unreachable or lags by more than
+# replica_max_lag; with no healthy replica, reads fall back to the primary.
+
+import itertools
+import math
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from uuid import UUID
+from fastapi import Cookie, Depends, Query
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.config import settings
+from app.database import engine_options, to_async_url, pool_status, dispose_after_fork, get_db, get_async_db
+
+_WRITTEN_USERS = "replica_pin_written_users"
+
+# Cookie carrying the wall-clock time of the client's last committed write
+WRITE_COOKIE = "notes_last_write"
+
+# Seconds since the last replayed transaction, or 0 while the replica has
+# replayed everything it received (an idle primary sends nothing to replay)
+PG_REPLICATION_LAG = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def replication_lag(connection: Connection) -> float:
+    """How far behind the primary a replica is, in seconds"""
+    if connection.dialect.name == "postgresql":
+        return float(connection.execute(PG_REPLICATION_LAG).scalar())
+    # SQLite has no replication; a readable file is never behind
+    connection.execute(text("SELECT 1"))
+    return 0.0
+
+
+class Replica:
+    """One read replica with its own engines and last health check"""
+
+    def __init__(self, url: str, is_async: bool = False):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = dispose_after_fork(create_engine(url, **engine_options(url)))
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_engine = create_async_engine(
+            to_async_url(url), **engine_options(url, is_async=True)
+        ) if is_async else None
+        if self.async_engine is not None:
+            dispose_after_fork(self.async_engine.sync_engine)
+        self.AsyncSessionLocal = async_sessionmaker(
+            bind=self.async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+        # No reads until the first health check passes
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    def check(self, max_lag: float) -> bool:
+        """Measure the replica's lag and mark it healthy if it is reachable and within max_lag"""
+        try:
+            with self.engine.connect() as connection:
+                self.lag = replication_lag(connection)
+        except SQLAlchemyError as e:
+            self.healthy, self.lag, self.error = False, None, type(e).__name__
+        else:
+            self.healthy = self.lag <= max_lag
+            self.error = None if self.healthy else "lagging"
+        self.checked_at = time.time()
+        return self.healthy
+
+    def evict(self, error: str) -> None:
+        """Stop reads until the next health check finds the replica usable again"""
+        self.healthy, self.error = False, error
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag": self.lag,
+            "error": self.error,
+            "checked_at": self.checked_at,
+            "pool": pool_status(self.engine),
+        }
+
+    def dispose(self) -> None:
+        self.engine.dispose()
+        if self.async_engine is not None:
+            self.async_engine.sync_engine.dispose()
+
+
+class ReplicaSet:
+    """Chooses where each read goes: a healthy replica in turn, or the primary"""
+
+    def __init__(
+        self,
+        urls: List[str],
+        pin_seconds: float = 5.0,
+        max_lag: float = 5.0,
+        is_async: bool = False
+    ):
+        self.replicas = [Replica(url, is_async) for url in urls]
+        self.pin_seconds = pin_seconds
+        self.max_lag = max_lag
+        self._pins: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def pin(self, user_id: UUID) -> None:
+        """Keep the user's reads on the primary for pin_seconds"""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._pins) > 10000:
+                self._pins = {user: until for user, until in self._pins.items() if until > now}
+            self._pins[user_id] = now + self.pin_seconds
+
+    def is_pinned(self, user_id: UUID, written_at: Optional[float] = None) -> bool:
+        """Whether the user wrote within pin_seconds, here or at `written_at` (from the client's cookie)"""
+        if written_at is not None and time.time() - written_at < self.pin_seconds:
+            return True
+        until = self._pins.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def choose(self, user_id: UUID, written_at: Optional[float] = None) -> Optional[Replica]:
+        """The replica to serve this user's read from, or None for the primary"""
+        if not self.replicas or self.is_pinned(user_id, written_at):
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    def check_health(self) -> None:
+        for replica in self.replicas:
+            replica.check(self.max_lag)
+
+    def start_health_checks(self, interval: float) -> None:
+        if not self.replicas or self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                self.check_health()
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop_health_checks(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def status(self) -> dict:
+        return {
+            "replicas": [replica.status() for replica in self.replicas],
+            "pinned_users": sum(1 for until in list(self._pins.values()) if until > time.monotonic()),
+        }
+
+    def dispose(self) -> None:
+        self.stop_health_checks()
+        for replica in self.replicas:
+            replica.dispose()
+
+
+replica_set = ReplicaSet(
+    settings.replica_database_urls,
+    pin_seconds=settings.replica_pin_seconds,
+    max_lag=settings.replica_max_lag,
+    is_async=settings.async_database
+)
+
+
+def pin_on_commit(db: Session, user_id: UUID) -> None:
+    """Keep the user's reads on the primary for a while once the session commits"""
+    db.info.setdefault(_WRITTEN_USERS, set()).add(user_id)
+
+
+class RequestWrite:
+    __slots__ = ("committed_at",)
+
+    def __init__(self):
+        self.committed_at: Optional[float] = None
+
+
+# Set by ReadYourWritesMiddleware; follows the request into threadpool
+# workers and the AsyncSession greenlet, like app.metrics' request stats
+_request_write: ContextVar[Optional[RequestWrite]] = ContextVar("request_write", default=None)
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_written_users(session: Session) -> None:
+    written = session.info.pop(_WRITTEN_USERS, ())
+    for user_id in written:
+        replica_set.pin(user_id)
+    request_write = _request_write.get()
+    if written and request_write is not None:
+        request_write.committed_at = time.time()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_users(session: Session) -> None:
+    session.info.pop(_WRITTEN_USERS, None)
+
+
+class ReadYourWritesMiddleware:
+    """Set WRITE_COOKIE on responses to requests that committed a write, while replicas are configured"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_set.replicas:
+            return await self.app(scope, receive, send)
+        
+        request_write = RequestWrite()
+        token = _request_write.set(request_write)
+
+        async def send_with_cookie(message):
+            # Writes commit before the response starts, including streamed imports
+            if message["type"] == "http.response.start" and request_write.committed_at is not None:
+                cookie = (
+                    f"{WRITE_COOKIE}={request_write.committed_at:.3f}; "
+                    f"Max-Age={math.ceil(replica_set.pin_seconds)}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _request_write.reset(token)
+
+
+def _written_at(cookie: Optional[str]) -> Optional[float]:
+    try:
+        return float(cookie) if cookie else None
+    except ValueError:
+        return None
+
+
+def _evict_if_disconnected(replica: Replica, e: DBAPIError) -> None:
+    if e.connection_invalidated:
+        replica.evict("disconnected")
+
+
+def get_read_db(
+    user_id: UUID = Query(..., description="User ID"),
+    last_write: Optional[str] = Cookie(None, alias=WRITE_COOKIE, include_in_schema=False),
+    db: Session = Depends(get_db)
+):
+    """Dependency for a read-only session: a replica, or the primary session while the user is pinned"""
+    replica = replica_set.choose(user_id, _written_at(last_write))
+    if replica is None:
+        yield db
+        return
+
+    read_db = replica.SessionLocal()
+    try:
+        yield read_db
+    except DBAPIError as e:
+        _evict_if_disconnected(replica, e)
+        raise
+    finally:
+        read_db.close()
+
+
+async def get_async_read_db(
+    user_id: UUID = Query(..., description="User ID"),
+    last_write: Optional[str] = Cookie(None, alias=WRITE_COOKIE, include_in_schema=False),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Async counterpart of get_read_db"""
+    replica = replica_set.choose(user_id, _written_at(last_write))
+    if replica is None:
+        yield db
+        return
+
+    async with replica.AsyncSessionLocal() as read_db:
+        try:
+            yield read_db
+        except DBAPIError as e:
+            _evict_if_disconnected(replica, e)
+            raise
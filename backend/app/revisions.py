@@ -0,0 +1,83 @@
+# Line-based deltas for note revision history
+#
+# Revisions are stored newest-to-oldest as backward deltas: each one holds
+# the edits that turn the next newer version (or the note itself, for the
+# newest revision) back into that revision. Saving a revision therefore
+# only needs the text before and after the update, never older history.
+# Every SNAPSHOT_INTERVAL revisions one is stored in full instead, so any
+# revision is rebuilt from at most SNAPSHOT_INTERVAL deltas.
+
+import difflib
+import json
+from datetime import timedelta
+from typing import List, Optional
+
+SNAPSHOT_INTERVAL = 20
+
+# Retention keeps only the newest revision per bucket once revisions are
+# this old, so bursts of autosaves thin out to one per hour
+REVISION_THIN_AFTER = timedelta(days=1)
+REVISION_THIN_BUCKET = timedelta(hours=1)
+
+# Fields an update must change for the previous version to become a revision
+REVISION_FIELDS = frozenset({"title", "content", "tags"})
+
+
+def make_delta(base: str, target: str) -> str:
+    """
+    Edits turning `base` into `target`: a JSON list whose [start, end] items
+    copy lines of `base` and whose string items are literal text
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j1 < j2:
+            ops.append("".join(target_lines[j1:j2]))
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_delta(base: str, delta: str) -> str:
+    """Rebuild the target text of make_delta(base, target)"""
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(delta):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return "".join(parts)
+
+
+def is_snapshot(revision: int, last_snapshot: Optional[int]) -> bool:
+    """Whether revision number `revision` is stored in full, given the newest snapshot before it"""
+    return revision - (last_snapshot or 0) >= SNAPSHOT_INTERVAL
+
+
+def encode_revision(newer: str, content: str, snapshot: bool) -> dict:
+    """
+    The content/delta column values for a revision whose next newer version
+    is `newer`; stored in full when it is a snapshot or a delta would not be
+    smaller than the text
+    """
+    if not snapshot:
+        delta = make_delta(newer, content)
+        if len(delta) < len(content):
+            return {"content": None, "delta": delta}
+    return {"content": content, "delta": None}
+
+
+def rebuild(newest_first: List, head: str) -> List[str]:
+    """
+    Contents of consecutive revisions given newest first, starting from the
+    text of the version right above the first one (the note or a newer revision)
+    """
+    contents = []
+    current = head
+    for row in newest_first:
+        current = row.content if row.delta is None else apply_delta(current, row.delta)
+        contents.append(current)
+    return contents
@@ -0,0 +1,43 @@
+# Authentication endpoints on the async database path
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import schemas, crud_async
+from app.database import get_async_db
+
+router = APIRouter(prefix="/auth", tags=["authentication"])
+
+
+@router.post("/login", response_model=schemas.UserResponse, status_code=status.HTTP_200_OK)
+async def login(user_login: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    """
+    Login with email only.
+    Returns user data if email exists, raises 404 if not found.
+    """
+    user = await crud_async.get_user_by_email(db, email=user_login.email)
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found. Please check your email address."
+        )
+    
+    return user
+
+
+@router.post("/register", response_model=schemas.UserResponse, status_code=status.HTTP_201_CREATED)
+async def register(user_login: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    """
+    Register a new user with email.
+    Returns 400 if email already exists.
+    """
+    existing_user = await crud_async.get_user_by_email(db, email=user_login.email)
+    
+    if existing_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered."
+        )
+    
+    user = await crud_async.create_user(db, email=user_login.email)
+    return user
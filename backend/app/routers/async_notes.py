@@ -0,0 +1,551 @@
+# Notes CRUD endpoints on the async database path
+#
+# Mirrors app/routers/notes.py route for route; main.py mounts one or the
+# other depending on settings.async_database.
+
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List, Literal, Optional
+from uuid import UUID
+from app import schemas, crud, crud_async, events, cache
+from app.database import get_async_db
+from app.replicas import get_async_read_db
+from app.etags import etag_matches, set_etag, not_modified
+from app.exports import ExportEncoder
+from app.pagination import InvalidCursor
+from app.routers.notes import (MAX_PAGE_SIZE, MAX_BATCH_SIZE, SSE_HEADERS, NoteListResponse, NoteView,
+                               is_paginated, page_size, invalid_cursor, render_notes,
+                               build_search_page, build_changes, validate_batch, list_etag, note_etag,
+                               if_match_versions, version_conflict, sync_token_expired, cached_list, cache_list,
+                               export_response, import_upload)
+
+router = APIRouter(prefix="/notes", tags=["notes"])
+
+
+async def _list_notes(fetch_fn, view: str, limit: Optional[int], after: Optional[str], etag: str, **kwargs) -> Response:
+    """Fetch and render a note list request through a crud_async fetch function"""
+    try:
+        notes, next_cursor = await fetch_fn(
+            summary=view == "summary", limit=page_size(limit, after), after=after, **kwargs
+        )
+    except InvalidCursor as e:
+        raise invalid_cursor(e)
+    
+    return render_notes(notes, next_cursor, view, is_paginated(limit, after), etag)
+
+
+async def _require_user(db: AsyncSession, user_id: UUID) -> None:
+    user = await crud_async.get_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+
+@router.get("/", response_model=NoteListResponse)
+async def get_notes(
+    request: Request,
+    user_id: UUID = Query(..., description="User ID"),
+    note_status: Optional[str] = Query(None, alias="status", description="Filter by status: active or archived"),
+    tag: Optional[List[str]] = Query(None, description="Filter by tag; repeat for several tags"),
+    tag_match: Literal["all", "any"] = Query("all", description="Require all of the tags or any of them"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns a cursor page instead of the full list"),
+    after: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    view: NoteView = Query("full", description="summary returns a content preview instead of the full content"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get all notes for a user.
+    Optionally filter by status (active/archived) and by tags.
+    Pass `limit` and/or `after` to page through the notes newest-first.
+    Honors If-None-Match with 304 Not Modified.
+    """
+    if note_status and note_status not in ["active", "archived"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Status must be 'active' or 'archived'"
+        )
+    
+    cached = cached_list(request, user_id)
+    if cached is not None:
+        return cached
+    generation = cache.notes_cache.generation(user_id)
+    
+    filters = dict(status=note_status, tags=tag, match_all_tags=tag_match == "all")
+    
+    fingerprint = await crud_async.get_notes_fingerprint_by_user(db, user_id=user_id, **filters)
+    if fingerprint is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    etag = list_etag(request, fingerprint)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    response = await _list_notes(
+        crud_async.fetch_notes_by_user, view, limit, after, etag, db=db, user_id=user_id, **filters
+    )
+    return cache_list(request, user_id, response, generation)
+
+
+@router.post("/batch", response_model=schemas.BatchCreateResponse, status_code=status.HTTP_201_CREATED)
+async def create_notes_batch(
+    payload: List[Any] = Body(..., max_length=MAX_BATCH_SIZE),
+    user_id: UUID = Query(..., description="User ID"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create many notes for a user in one transaction.
+    Items that fail validation are reported by index; the valid ones are still created.
+    """
+    await _require_user(db, user_id)
+    
+    notes, errors = validate_batch(payload)
+    created = await crud_async.create_notes_bulk(db, notes=notes, user_id=user_id) if notes else []
+    
+    return schemas.BatchCreateResponse(created=created, errors=errors)
+
+
+@router.patch("/batch", response_model=List[schemas.NoteResponse])
+async def update_notes_batch(
+    batch_update: schemas.NoteBatchUpdate,
+    user_id: UUID = Query(..., description="User ID"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Apply the same changes (fields and/or status) to a batch of notes.
+    Returns the notes that were updated.
+    """
+    values = batch_update.model_dump(exclude_unset=True, exclude={"note_ids"})
+    if not values:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No changes given"
+        )
+    
+    return await crud_async.update_notes_bulk(db, note_ids=batch_update.note_ids, user_id=user_id, values=values)
+
+
+@router.get("/tags", response_model=List[schemas.TagCount])
+async def get_tag_counts(
+    user_id: UUID = Query(..., description="User ID"),
+    status: Optional[Literal["active", "archived"]] = Query(None, description="Only count notes with this status"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get every tag a user has used with the number of notes carrying it.
+    """
+    return [
+        schemas.TagCount(name=name, count=count)
+        for name, count in await crud_async.get_tag_counts(db, user_id=user_id, status=status)
+    ]
+
+
+@router.get("/search", response_model=schemas.NoteSearchPage)
+async def search_notes(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text"),
+    user_id: UUID = Query(..., description="User ID"),
+    status: Optional[Literal["active", "archived"]] = Query(None, description="Filter by status: active or archived"),
+    is_favorite: Optional[bool] = Query(None, description="Filter by favorite flag"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Full-text search over a user's notes (title, content and tags).
+    Results are ranked best match first and include a highlighted snippet.
+    """
+    rows = await crud_async.search_notes(
+        db,
+        user_id=user_id,
+        q=q,
+        status=status,
+        is_favorite=is_favorite,
+        limit=limit + 1,
+        offset=offset
+    )
+    return build_search_page(rows, limit, offset)
+
+
+async def _export_chunks(db: AsyncSession, user_id: UUID, encoder: ExportEncoder):
+    # get_async_db closes the session once the handler returns, before the
+    # body is sent; it reconnects for the export query and is closed again here
+    try:
+        header = encoder.start()
+        if header:
+            yield header
+        async for batch in crud_async.iter_export_batches(db, user_id):
+            yield encoder.encode(batch)
+        yield encoder.finish()
+    finally:
+        await db.close()
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_notes(
+    user_id: UUID = Query(..., description="User ID"),
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="ndjson (one JSON note per line) or csv"),
+    gzip: bool = Query(False, description="Compress the export with gzip"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Download all of a user's notes, oldest first, as a streamed NDJSON or CSV file.
+    Notes are read and written in batches, so memory stays flat however many there are.
+    """
+    await _require_user(db, user_id)
+    
+    encoder = ExportEncoder(format, compress=gzip)
+    return export_response(_export_chunks(db, user_id, encoder), encoder)
+
+
+@router.post("/import", response_model=schemas.ImportProgress)
+async def import_notes(
+    request: Request,
+    user_id: UUID = Query(..., description="User ID"),
+    resume_from: int = Query(0, ge=0, description="Skip this many lines, e.g. committed_lines of an interrupted import"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import notes from an NDJSON upload (one note per line, as in POST /notes/),
+    optionally gzipped. The body is read as it arrives and notes are committed
+    in chunks, so memory stays flat however large the upload is. Invalid lines
+    are reported by line number; the valid ones are still imported.
+    """
+    await _require_user(db, user_id)
+    
+    async def insert(notes):
+        await crud_async.create_notes_bulk(db, notes=notes, user_id=user_id)
+    
+    return await import_upload(request, insert, resume_from)
+
+
+@router.get("/changes", response_model=schemas.NoteChanges)
+async def get_note_changes(
+    user_id: UUID = Query(..., description="User ID"),
+    since: Optional[int] = Query(None, ge=0, description="next_since from the previous sync; omit for a full sync"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the notes created or updated and the IDs of notes deleted since the
+    last sync. Pass the returned `next_since` as `since` on the next call.
+    A 410 means the deletes since `since` were pruned; sync again without it.
+    """
+    try:
+        changes = await crud_async.get_changes(db, user_id=user_id, since=since)
+    except crud.SyncTokenExpired:
+        raise sync_token_expired()
+    if changes is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return build_changes(since, *changes)
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_note_events(
+    user_id: UUID = Query(..., description="User ID"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Server-sent events for a user's note changes: created, updated, status,
+    favorite and deleted, each sent after its write commits. The event id is
+    the change_seq; after a disconnect or a resync event, catch up with
+    GET /notes/changes?since=<last id>.
+    """
+    await _require_user(db, user_id)
+    
+    return StreamingResponse(events.sse_stream(user_id), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/{note_id}", response_model=schemas.NoteResponse)
+async def get_note(
+    note_id: UUID,
+    request: Request,
+    response: Response,
+    user_id: UUID = Query(..., description="User ID"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get a specific note by ID for a user.
+    Honors If-None-Match with 304 Not Modified.
+    """
+    if request.headers.get("if-none-match"):
+        version = await crud_async.get_note_version(db, note_id=note_id, user_id=user_id)
+        if version is not None and etag_matches(request, note_etag(version)):
+            return not_modified(note_etag(version))
+    
+    note = await crud_async.get_note_by_id(db, note_id=note_id, user_id=user_id)
+    
+    if not note:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Note not found"
+        )
+    
+    set_etag(response, note_etag(note.version))
+    return note
+
+
+@router.post("/", response_model=schemas.NoteResponse, status_code=status.HTTP_201_CREATED)
+async def create_note(
+    note: schemas.NoteCreate,
+    user_id: UUID = Query(..., description="User ID"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create a new note for a user.
+    """
+    await _require_user(db, user_id)
+    
+    return await crud_async.create_note(db, note=note, user_id=user_id)
+
+
+@router.patch("/{note_id}", response_model=schemas.NoteResponse)
+async def update_note(
+    note_id: UUID,
+    note_update: schemas.NoteUpdate,
+    request: Request,
+    response: Response,
+    user_id: UUID = Query(..., description="User ID"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Update note title and/or content.
+    With If-Match, only if the note is still at that ETag; 412 otherwise.
+    """
+    try:
+        updated_note = await crud_async.update_note(
+            db,
+            note_id=note_id,
+            user_id=user_id,
+            note_update=note_update,
+            if_versions=if_match_versions(request)
+        )
+    except crud.VersionConflict as e:
+        raise version_conflict(e)
+    
+    if not updated_note:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Note not found"
+        )
+    
+    set_etag(response, note_etag(updated_note.version))
+    return updated_note
+
+
+@router.patch("/{note_id}/status", response_model=schemas.NoteResponse)
+async def update_note_status(
+    note_id: UUID,
+    status_update: schemas.NoteStatusUpdate,
+    user_id: UUID = Query(..., description="User ID"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Update note status (archive/unarchive).
+    """
+    updated_note = await crud_async.update_note_status(
+        db,
+        note_id=note_id,
+        user_id=user_id,
+        status=status_update.status
+    )
+    
+    if not updated_note:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Note not found"
+        )
+    
+    return updated_note
+
+
+@router.patch("/{note_id}/favorite", response_model=schemas.NoteResponse)
+async def toggle_favorite_note(
+    note_id: UUID,
+    favorite_update: schemas.NoteFavoriteUpdate,
+    user_id: UUID = Query(..., description="User ID"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Update note's favorite status.
+    """
+    note_update_schema = schemas.NoteUpdate(is_favorite=favorite_update.is_favorite)
+    updated_note = await crud_async.update_note(db, note_id=note_id, user_id=user_id, note_update=note_update_schema)
+    
+    if not updated_note:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Note not found"
+        )
+    
+    return updated_note
+
+
+@router.get("/{note_id}/revisions", response_model=List[schemas.NoteRevisionSummary])
+async def get_note_revisions(
+    note_id: UUID,
+    user_id: UUID = Query(..., description="User ID"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    List a note's earlier versions, newest first, without their content.
+    """
+    revisions = await crud_async.get_note_revisions(db, note_id=note_id, user_id=user_id)
+    
+    if revisions is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Note not found"
+        )
+    
+    return revisions
+
+
+@router.get("/{note_id}/revisions/{revision}", response_model=schemas.NoteRevision)
+async def get_note_revision(
+    note_id: UUID,
+    revision: int,
+    user_id: UUID = Query(..., description="User ID"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get one earlier version of a note, content included.
+    """
+    found = await crud_async.get_note_revision(db, note_id=note_id, user_id=user_id, revision=revision)
+    
+    if found is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Revision not found"
+        )
+    
+    return found
+
+
+@router.post("/{note_id}/revisions/{revision}/restore", response_model=schemas.NoteResponse)
+async def restore_note_revision(
+    note_id: UUID,
+    revision: int,
+    user_id: UUID = Query(..., description="User ID"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Restore an earlier version of a note; the current version becomes a revision.
+    """
+    restored = await crud_async.restore_note_revision(db, note_id=note_id, user_id=user_id, revision=revision)
+    
+    if restored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Revision not found"
+        )
+    
+    return restored
+
+
+@router.get("/favorites/", response_model=NoteListResponse)
+async def get_favorite_notes(
+    request: Request,
+    user_id: UUID = Query(..., description="User ID"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns a cursor page instead of the full list"),
+    after: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    view: NoteView = Query("full", description="summary returns a content preview instead of the full content"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get all favorite notes for a user.
+    Honors If-None-Match with 304 Not Modified.
+    """
+    cached = cached_list(request, user_id)
+    if cached is not None:
+        return cached
+    generation = cache.notes_cache.generation(user_id)
+    
+    fingerprint = await crud_async.get_notes_fingerprint_by_user(db, user_id=user_id, is_favorite=True)
+    if fingerprint is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    etag = list_etag(request, fingerprint)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    response = await _list_notes(
+        crud_async.fetch_notes_by_user, view, limit, after, etag, db=db, user_id=user_id, is_favorite=True
+    )
+    return cache_list(request, user_id, response, generation)
+
+
+@router.get("/recent/", response_model=NoteListResponse)
+async def get_recent_notes(
+    request: Request,
+    user_id: UUID = Query(..., description="User ID"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns a cursor page instead of the full list"),
+    after: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    view: NoteView = Query("full", description="summary returns a content preview instead of the full content"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Get all recent notes for a user (created or updated in the last 24 hours).
+    Honors If-None-Match with 304 Not Modified.
+    """
+    fingerprint = await crud_async.get_recent_notes_fingerprint(db, user_id=user_id)
+    if fingerprint is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    etag = list_etag(request, fingerprint)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return await _list_notes(crud_async.fetch_recent_notes, view, limit, after, etag, db=db, user_id=user_id)
+
+
+@router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_note_permanently(
+    note_id: UUID,
+    user_id: UUID = Query(..., description="User ID"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Permanently delete a single note.
+    """
+    success = await crud_async.delete_note_permanently(db, note_id=note_id, user_id=user_id)
+    
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Note not found"
+        )
+    
+    return
+
+
+@router.delete("/batch/", response_model=schemas.BatchDeleteResponse, status_code=status.HTTP_200_OK)
+async def delete_notes_batch(
+    user_id: UUID,
+    note_ids: List[UUID],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Permanently delete a batch of notes.
+    """
+    await _require_user(db, user_id)
+    
+    deleted_ids = await crud_async.delete_notes_by_ids(db, note_ids=note_ids, user_id=user_id)
+    
+    return schemas.BatchDeleteResponse(
+        detail=f"Successfully deleted {len(deleted_ids)} notes.",
+        deleted_ids=deleted_ids
+    )
@@ -1,24 +1,262 @@
 # Notes CRUD endpoints
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Literal, Optional, Tuple, Union
 from uuid import UUID
-from app import schemas, crud
+from app import schemas, crud, events, cache, imports
 from app.database import get_db
+from app.replicas import get_read_db
+from app.etags import make_etag, etag_matches, if_match_tags, set_etag, not_modified
+from app.exports import ExportEncoder
+from app.pagination import InvalidCursor
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_BATCH_SIZE = 5000
 
-@router.get("/", response_model=List[schemas.NoteResponse])
+# Keep proxies from caching or buffering the event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+NoteListResponse = Union[
+    schemas.NotePage,
+    schemas.NoteSummaryPage,
+    List[schemas.NoteResponse],
+    List[schemas.NoteSummary]
+]
+
+NoteView = Literal["full", "summary"]
+
+# List responses are validated and serialized here rather than by FastAPI's
+# response_model, which would have to try each member of NoteListResponse
+_LIST_ADAPTERS = {
+    ("full", False): TypeAdapter(List[schemas.NoteResponse]),
+    ("summary", False): TypeAdapter(List[schemas.NoteSummary]),
+    ("full", True): TypeAdapter(schemas.NotePage),
+    ("summary", True): TypeAdapter(schemas.NoteSummaryPage),
+}
+
+
+def page_size(limit: Optional[int], after: Optional[str]) -> Optional[int]:
+    """Rows to fetch for a list request: None for the full list, else the page size"""
+    return (limit or DEFAULT_PAGE_SIZE) if is_paginated(limit, after) else None
+
+
+def invalid_cursor(e: InvalidCursor) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=str(e)
+    )
+
+
+def render_notes(
+    notes: list,
+    next_cursor: Optional[str],
+    view: str,
+    paginated: bool,
+    etag: str
+) -> Response:
+    """Serialize a list of notes (or one page of them) as a JSON response carrying its ETag"""
+    adapter = _LIST_ADAPTERS[view, paginated]
+    data = {"items": notes, "next_cursor": next_cursor} if paginated else notes
+    response = Response(
+        adapter.dump_json(adapter.validate_python(data, from_attributes=True)),
+        media_type="application/json"
+    )
+    set_etag(response, etag)
+    return response
+
+
+def _list_notes(query, view: str, limit: Optional[int], after: Optional[str], etag: str) -> Response:
+    """Fetch and render a note list request in the requested view"""
+    if view == "summary":
+        query = crud.summarize(query)
+    
+    try:
+        notes, next_cursor = crud.fetch_notes(query, page_size(limit, after), after)
+    except InvalidCursor as e:
+        raise invalid_cursor(e)
+    
+    return render_notes(notes, next_cursor, view, is_paginated(limit, after), etag)
+
+
+def is_paginated(limit: Optional[int], after: Optional[str]) -> bool:
+    """Whether a list request asked for a cursor page rather than the full list"""
+    return limit is not None or after is not None
+
+
+def list_etag(request: Request, fingerprint) -> str:
+    """
+    ETag of a list response: the request's query plus the change_seq/count
+    fingerprint of the notes it covers, so an unchanged list is detected
+    without loading or serializing any note.
+    """
+    return make_etag(request.url.path, request.url.query, *fingerprint)
+
+
+def _list_cache_key(request: Request) -> Tuple[str, str]:
+    return request.url.path, request.url.query
+
+
+def cached_list(request: Request, user_id: UUID) -> Optional[Response]:
+    """Serve a list request from the notes cache; None on a miss"""
+    cached = cache.notes_cache.get(user_id, _list_cache_key(request))
+    if cached is None:
+        return None
+    
+    body, etag = cached
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response = Response(body, media_type="application/json")
+    set_etag(response, etag)
+    return response
+
+
+def cache_list(request: Request, user_id: UUID, response: Response, generation: int) -> Response:
+    """Store a rendered list response, unless the user's notes changed since `generation`"""
+    cache.notes_cache.set(
+        user_id, _list_cache_key(request), (response.body, response.headers["ETag"]), generation
+    )
+    return response
+
+
+def note_etag(version: int) -> str:
+    """ETag of a single note: its version, which every write bumps"""
+    return f'"{version}"'
+
+
+def if_match_versions(request: Request) -> Optional[List[int]]:
+    """Note versions an If-Match header accepts; None when any version will do"""
+    tags = if_match_tags(request)
+    if tags is None:
+        return None
+    # Tags that are not note ETags match no version
+    return [int(tag[1:-1]) for tag in tags if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit()]
+
+
+def version_conflict(e: crud.VersionConflict) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Note has been modified since it was read",
+        headers={"ETag": note_etag(e.version)}
+    )
+
+
+def sync_token_expired() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_410_GONE,
+        detail="Sync token expired; sync again without since"
+    )
+
+
+def validate_batch(payload: List[Any]) -> Tuple[List[schemas.NoteCreate], List[schemas.BatchItemError]]:
+    """Validate each batch item on its own so one bad item does not reject the rest"""
+    notes, errors = [], []
+    for index, item in enumerate(payload):
+        try:
+            notes.append(schemas.NoteCreate.model_validate(item))
+        except ValidationError as e:
+            errors.append(schemas.BatchItemError(
+                index=index,
+                errors=[{"loc": err["loc"], "msg": err["msg"], "type": err["type"]} for err in e.errors()]
+            ))
+    return notes, errors
+
+
+def build_search_page(rows, limit: int, offset: int) -> schemas.NoteSearchPage:
+    """Shape search rows fetched with limit + 1 into one page of results"""
+    items = [
+        schemas.NoteSearchResult(
+            **schemas.NoteResponse.model_validate(note).model_dump(),
+            rank=rank,
+            snippet=snippet or ""
+        )
+        for note, rank, snippet in rows[:limit]
+    ]
+    next_offset = offset + limit if len(rows) > limit else None
+    
+    return schemas.NoteSearchPage(items=items, next_offset=next_offset)
+
+
+def build_changes(since: Optional[int], notes, deleted_ids, current: int) -> schemas.NoteChanges:
+    """Shape a delta sync result, rejecting tokens this user was never issued"""
+    if since is not None and since > current:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown sync token; sync again without since"
+        )
+    
+    return schemas.NoteChanges(notes=notes, deleted_ids=deleted_ids, next_since=current)
+
+
+@router.get("/", response_model=NoteListResponse)
 def get_notes(
+    request: Request,
     user_id: UUID = Query(..., description="User ID"),
-    status: Optional[str] = Query(None, description="Filter by status: active or archived"),
-    db: Session = Depends(get_db)
+    note_status: Optional[str] = Query(None, alias="status", description="Filter by status: active or archived"),
+    tag: Optional[List[str]] = Query(None, description="Filter by tag; repeat for several tags"),
+    tag_match: Literal["all", "any"] = Query("all", description="Require all of the tags or any of them"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns a cursor page instead of the full list"),
+    after: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    view: NoteView = Query("full", description="summary returns a content preview instead of the full content"),
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all notes for a user.
-    Optionally filter by status (active/archived).
+    Optionally filter by status (active/archived) and by tags.
+    Pass `limit` and/or `after` to page through the notes newest-first.
+    Honors If-None-Match with 304 Not Modified.
+    """
+    # Validate status parameter if provided
+    if note_status and note_status not in ["active", "archived"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Status must be 'active' or 'archived'"
+        )
+    
+    cached = cached_list(request, user_id)
+    if cached is not None:
+        return cached
+    generation = cache.notes_cache.generation(user_id)
+    
+    query = crud.notes_by_user_query(
+        db,
+        user_id=user_id,
+        status=note_status,
+        tags=tag,
+        match_all_tags=tag_match == "all"
+    )
+    
+    # Fails for an unknown user before any 304 can be served
+    fingerprint = crud.get_notes_fingerprint(query, user_id)
+    if fingerprint is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    etag = list_etag(request, fingerprint)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return cache_list(request, user_id, _list_notes(query, view, limit, after, etag), generation)
+
+
+@router.post("/batch", response_model=schemas.BatchCreateResponse, status_code=status.HTTP_201_CREATED)
+def create_notes_batch(
+    payload: List[Any] = Body(..., max_length=MAX_BATCH_SIZE),
+    user_id: UUID = Query(..., description="User ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    Create many notes for a user in one transaction.
+    Items that fail validation are reported by index; the valid ones are still created.
     """
     # Verify user exists
     user = crud.get_user_by_id(db, user_id)
@@ -28,26 +266,223 @@ def get_notes(
             detail="User not found"
         )
     
-    # Validate status parameter if provided
-    if status and status not in ["active", "archived"]:
+    notes, errors = validate_batch(payload)
+    created = crud.create_notes_bulk(db, notes=notes, user_id=user_id) if notes else []
+    
+    return schemas.BatchCreateResponse(created=created, errors=errors)
+
+
+@router.patch("/batch", response_model=List[schemas.NoteResponse])
+def update_notes_batch(
+    batch_update: schemas.NoteBatchUpdate,
+    user_id: UUID = Query(..., description="User ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    Apply the same changes (fields and/or status) to a batch of notes.
+    Returns the notes that were updated.
+    """
+    values = batch_update.model_dump(exclude_unset=True, exclude={"note_ids"})
+    if not values:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Status must be 'active' or 'archived'"
+            detail="No changes given"
+        )
+    
+    return crud.update_notes_bulk(db, note_ids=batch_update.note_ids, user_id=user_id, values=values)
+
+
+@router.get("/tags", response_model=List[schemas.TagCount])
+def get_tag_counts(
+    user_id: UUID = Query(..., description="User ID"),
+    status: Optional[Literal["active", "archived"]] = Query(None, description="Only count notes with this status"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get every tag a user has used with the number of notes carrying it.
+    """
+    return [
+        schemas.TagCount(name=name, count=count)
+        for name, count in crud.get_tag_counts(db, user_id=user_id, status=status)
+    ]
+
+
+@router.get("/search", response_model=schemas.NoteSearchPage)
+def search_notes(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text"),
+    user_id: UUID = Query(..., description="User ID"),
+    status: Optional[Literal["active", "archived"]] = Query(None, description="Filter by status: active or archived"),
+    is_favorite: Optional[bool] = Query(None, description="Filter by favorite flag"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Full-text search over a user's notes (title, content and tags).
+    Results are ranked best match first and include a highlighted snippet.
+    """
+    rows = crud.search_notes(
+        db,
+        user_id=user_id,
+        q=q,
+        status=status,
+        is_favorite=is_favorite,
+        limit=limit + 1,
+        offset=offset
+    )
+    return build_search_page(rows, limit, offset)
+
+
+def export_response(chunks, encoder: ExportEncoder) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{encoder.filename("notes")}"'}
+    )
+
+
+def _export_chunks(db: Session, user_id: UUID, encoder: ExportEncoder):
+    # get_db closes the session once the handler returns, before the body is
+    # sent; it reconnects for the export query and is closed again here
+    try:
+        header = encoder.start()
+        if header:
+            yield header
+        for batch in crud.iter_export_batches(db, user_id):
+            yield encoder.encode(batch)
+        yield encoder.finish()
+    finally:
+        db.close()
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_notes(
+    user_id: UUID = Query(..., description="User ID"),
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="ndjson (one JSON note per line) or csv"),
+    gzip: bool = Query(False, description="Compress the export with gzip"),
+    db: Session = Depends(get_db)
+):
+    """
+    Download all of a user's notes, oldest first, as a streamed NDJSON or CSV file.
+    Notes are read and written in batches, so memory stays flat however many there are.
+    """
+    user = crud.get_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
         )
     
-    notes = crud.get_notes_by_user(db, user_id=user_id, status=status)
-    return notes
+    encoder = ExportEncoder(format, compress=gzip)
+    return export_response(_export_chunks(db, user_id, encoder), encoder)
+
+
+async def import_upload(request: Request, insert, resume_from: int) -> schemas.ImportProgress:
+    """Import the NDJSON request body through `insert`, reporting how far it got on failure"""
+    progress = schemas.ImportProgress()
+    try:
+        return await imports.run_import(imports.iter_lines(request.stream()), insert, progress, resume_from)
+    except imports.InvalidImport as e:
+        raise import_failed(status.HTTP_400_BAD_REQUEST, str(e), progress)
+    except SQLAlchemyError:
+        raise import_failed(status.HTTP_500_INTERNAL_SERVER_ERROR, "Import interrupted by a database error", progress)
+
+
+def import_failed(status_code: int, message: str, progress: schemas.ImportProgress) -> HTTPException:
+    # Every chunk up to committed_lines is already saved; sending the same
+    # upload again with resume_from=committed_lines picks up after it
+    return HTTPException(status_code=status_code, detail={"message": message, **progress.model_dump()})
+
+
+@router.post("/import", response_model=schemas.ImportProgress)
+async def import_notes(
+    request: Request,
+    user_id: UUID = Query(..., description="User ID"),
+    resume_from: int = Query(0, ge=0, description="Skip this many lines, e.g. committed_lines of an interrupted import"),
+    db: Session = Depends(get_db)
+):
+    """
+    Import notes from an NDJSON upload (one note per line, as in POST /notes/),
+    optionally gzipped. The body is read as it arrives and notes are committed
+    in chunks, so memory stays flat however large the upload is. Invalid lines
+    are reported by line number; the valid ones are still imported.
+    """
+    user = await run_in_threadpool(crud.get_user_by_id, db, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    async def insert(notes):
+        await run_in_threadpool(crud.create_notes_bulk, db, notes, user_id)
+    
+    return await import_upload(request, insert, resume_from)
+
+
+@router.get("/changes", response_model=schemas.NoteChanges)
+def get_note_changes(
+    user_id: UUID = Query(..., description="User ID"),
+    since: Optional[int] = Query(None, ge=0, description="next_since from the previous sync; omit for a full sync"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the notes created or updated and the IDs of notes deleted since the
+    last sync. Pass the returned `next_since` as `since` on the next call.
+    A 410 means the deletes since `since` were pruned; sync again without it.
+    """
+    try:
+        changes = crud.get_changes(db, user_id=user_id, since=since)
+    except crud.SyncTokenExpired:
+        raise sync_token_expired()
+    if changes is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return build_changes(since, *changes)
+
+
+@router.get("/stream", response_class=StreamingResponse)
+def stream_note_events(
+    user_id: UUID = Query(..., description="User ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-sent events for a user's note changes: created, updated, status,
+    favorite and deleted, each sent after its write commits. The event id is
+    the change_seq; after a disconnect or a resync event, catch up with
+    GET /notes/changes?since=<last id>.
+    """
+    user = crud.get_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    return StreamingResponse(events.sse_stream(user_id), media_type="text/event-stream", headers=SSE_HEADERS)
 
 
 @router.get("/{note_id}", response_model=schemas.NoteResponse)
 def get_note(
     note_id: UUID,
+    request: Request,
+    response: Response,
     user_id: UUID = Query(..., description="User ID"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get a specific note by ID for a user.
+    Honors If-None-Match with 304 Not Modified.
     """
+    # Revalidate a cached copy from its version alone before loading the note
+    if request.headers.get("if-none-match"):
+        version = crud.get_note_version(db, note_id=note_id, user_id=user_id)
+        if version is not None and etag_matches(request, note_etag(version)):
+            return not_modified(note_etag(version))
+    
     note = crud.get_note_by_id(db, note_id=note_id, user_id=user_id)
     
     if not note:
@@ -56,6 +491,7 @@ def get_note(
             detail="Note not found"
         )
     
+    set_etag(response, note_etag(note.version))
     return note
 
 
@@ -84,13 +520,25 @@ def create_note(
 def update_note(
     note_id: UUID,
     note_update: schemas.NoteUpdate,
+    request: Request,
+    response: Response,
     user_id: UUID = Query(..., description="User ID"),
     db: Session = Depends(get_db)
 ):
     """
     Update note title and/or content.
+    With If-Match, only if the note is still at that ETag; 412 otherwise.
     """
-    updated_note = crud.update_note(db, note_id=note_id, user_id=user_id, note_update=note_update)
+    try:
+        updated_note = crud.update_note(
+            db,
+            note_id=note_id,
+            user_id=user_id,
+            note_update=note_update,
+            if_versions=if_match_versions(request)
+        )
+    except crud.VersionConflict as e:
+        raise version_conflict(e)
     
     if not updated_note:
         raise HTTPException(
@@ -98,6 +546,7 @@ def update_note(
             detail="Note not found"
         )
     
+    set_etag(response, note_etag(updated_note.version))
     return updated_note
 
 
@@ -158,83 +607,132 @@ def toggle_favorite_note(
 
 
 
-@router.get("/favorites/", response_model=List[schemas.NoteResponse])
-def get_favorite_notes(
+@router.get("/{note_id}/revisions", response_model=List[schemas.NoteRevisionSummary])
+def get_note_revisions(
+    note_id: UUID,
     user_id: UUID = Query(..., description="User ID"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
-    Get all favorite notes for a user.
+    List a note's earlier versions, newest first, without their content.
     """
-    user = crud.get_user_by_id(db, user_id)
-    if not user:
+    revisions = crud.get_note_revisions(db, note_id=note_id, user_id=user_id)
+    
+    if revisions is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+            detail="Note not found"
         )
     
-    notes = crud.get_notes_by_user(db, user_id=user_id, is_favorite=True)
-    return notes
-
-
-
-
-
-@router.get("/recent/", response_model=List[schemas.NoteResponse])
-
-
-def get_recent_notes(
+    return revisions
 
 
+@router.get("/{note_id}/revisions/{revision}", response_model=schemas.NoteRevision)
+def get_note_revision(
+    note_id: UUID,
+    revision: int,
     user_id: UUID = Query(..., description="User ID"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get one earlier version of a note, content included.
+    """
+    found = crud.get_note_revision(db, note_id=note_id, user_id=user_id, revision=revision)
+    
+    if found is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Revision not found"
+        )
+    
+    return found
 
 
+@router.post("/{note_id}/revisions/{revision}/restore", response_model=schemas.NoteResponse)
+def restore_note_revision(
+    note_id: UUID,
+    revision: int,
+    user_id: UUID = Query(..., description="User ID"),
     db: Session = Depends(get_db)
-
-
 ):
-
-
     """
-
-
-    Get all recent notes for a user (created or updated in the last 24 hours).
-
-
+    Restore an earlier version of a note; the current version becomes a revision.
     """
+    restored = crud.restore_note_revision(db, note_id=note_id, user_id=user_id, revision=revision)
+    
+    if restored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Revision not found"
+        )
+    
+    return restored
 
 
-    user = crud.get_user_by_id(db, user_id)
-
 
-    if not user:
 
 
+@router.get("/favorites/", response_model=NoteListResponse)
+def get_favorite_notes(
+    request: Request,
+    user_id: UUID = Query(..., description="User ID"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns a cursor page instead of the full list"),
+    after: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    view: NoteView = Query("full", description="summary returns a content preview instead of the full content"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get all favorite notes for a user.
+    Honors If-None-Match with 304 Not Modified.
+    """
+    cached = cached_list(request, user_id)
+    if cached is not None:
+        return cached
+    generation = cache.notes_cache.generation(user_id)
+    
+    query = crud.notes_by_user_query(db, user_id=user_id, is_favorite=True)
+    
+    fingerprint = crud.get_notes_fingerprint(query, user_id)
+    if fingerprint is None:
         raise HTTPException(
-
-
             status_code=status.HTTP_404_NOT_FOUND,
-
-
             detail="User not found"
-
-
         )
-
-
     
+    etag = list_etag(request, fingerprint)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return cache_list(request, user_id, _list_notes(query, view, limit, after, etag), generation)
 
 
-    notes = crud.get_recent_notes_by_user(db, user_id=user_id)
-
-
-    return notes
-
-
-
-
-
-
+@router.get("/recent/", response_model=NoteListResponse)
+def get_recent_notes(
+    request: Request,
+    user_id: UUID = Query(..., description="User ID"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns a cursor page instead of the full list"),
+    after: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    view: NoteView = Query("full", description="summary returns a content preview instead of the full content"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get all recent notes for a user (created or updated in the last 24 hours).
+    Honors If-None-Match with 304 Not Modified.
+    """
+    query = crud.recent_notes_query(db, user_id=user_id)
+    
+    fingerprint = crud.get_notes_fingerprint(query, user_id)
+    if fingerprint is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    etag = list_etag(request, fingerprint)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return _list_notes(query, view, limit, after, etag)
 
 
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -297,7 +795,7 @@ def delete_note_permanently(
 
 
 
-@router.delete("/batch/", status_code=status.HTTP_200_OK)
+@router.delete("/batch/", response_model=schemas.BatchDeleteResponse, status_code=status.HTTP_200_OK)
 
 
 def delete_notes_batch(
@@ -354,11 +852,14 @@ def delete_notes_batch(
     # Delete the notes
 
 
-    deleted_count = crud.delete_notes_by_ids(db, note_ids=note_ids, user_id=user_id)
+    deleted_ids = crud.delete_notes_by_ids(db, note_ids=note_ids, user_id=user_id)
 
 
     
 
 
-    return {"detail": f"Successfully deleted {deleted_count} notes."}
+    return schemas.BatchDeleteResponse(
+        detail=f"Successfully deleted {len(deleted_ids)} notes.",
+        deleted_ids=deleted_ids
+    )
 
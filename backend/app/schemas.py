@@ -1,9 +1,10 @@
 # Pydantic schemas for validation
 
-from pydantic import BaseModel, EmailStr, Field
-from typing import Literal
+from pydantic import BaseModel, EmailStr, Field, model_validator
+from typing import Any, Dict, List, Literal, Optional
 from datetime import datetime
 from uuid import UUID
+from app.compression import decompress
 
 
 # User Schemas
@@ -36,6 +37,11 @@ class NoteUpdate(BaseModel):
     is_favorite: bool | None = None
 
 
+class NoteBatchUpdate(NoteUpdate):
+    note_ids: List[UUID] = Field(..., min_length=1, max_length=5000)
+    status: Literal["active", "archived"] | None = None
+
+
 class NoteStatusUpdate(BaseModel):
     status: Literal["active", "archived"]
 
@@ -52,8 +58,116 @@ class NoteResponse(BaseModel):
     tags: str
     status: Literal["active", "archived"]
     is_favorite: bool
+    version: int
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+    
+    @model_validator(mode="before")
+    @classmethod
+    def _decompress_content(cls, data: Any) -> Any:
+        # Notes and rows carry content_blob when their content is stored compressed
+        blob = getattr(data, "content_blob", None)
+        if blob is None:
+            return data
+        values = {name: getattr(data, name) for name in cls.model_fields if hasattr(data, name)}
+        values["content"] = decompress(blob)
+        return values
+
+
+class NoteSummary(BaseModel):
+    id: UUID
+    user_id: UUID
+    title: str
+    tags: str
+    status: Literal["active", "archived"]
+    is_favorite: bool
     created_at: datetime
     updated_at: datetime
+    preview: str
+    content_length: int
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class NoteRevisionSummary(BaseModel):
+    revision: int
+    title: str
+    tags: str
+    content_length: int
+    saved_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class NoteRevision(NoteRevisionSummary):
+    content: str
+
+
+class NotePage(BaseModel):
+    items: List[NoteResponse]
+    next_cursor: Optional[str] = None
+
+
+class NoteSummaryPage(BaseModel):
+    items: List[NoteSummary]
+    next_cursor: Optional[str] = None
+
+
+class BatchItemError(BaseModel):
+    index: int
+    errors: List[Dict[str, Any]]
+
+
+class BatchCreateResponse(BaseModel):
+    created: List[NoteResponse]
+    errors: List[BatchItemError]
+
+
+class ImportLineError(BaseModel):
+    line: int
+    errors: List[Dict[str, Any]]
+
+
+class ImportProgress(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    committed_lines: int = 0
+    errors: List[ImportLineError] = []
+
+
+class BatchDeleteResponse(BaseModel):
+    detail: str
+    deleted_ids: List[UUID]
+
+
+class TagCount(BaseModel):
+    name: str
+    count: int
+
+
+class NoteSearchResult(NoteResponse):
+    rank: float
+    snippet: str
+
+
+class NoteSearchPage(BaseModel):
+    items: List[NoteSearchResult]
+    next_offset: Optional[int] = None
+
+
+class NoteChanges(BaseModel):
+    notes: List[NoteResponse]
+    deleted_ids: List[UUID]
+    next_since: int
+
+
+class NoteEvent(BaseModel):
+    type: Literal["created", "updated", "status", "favorite", "deleted"]
+    change_seq: int
+    notes: List[NoteResponse] = []
+    deleted_ids: List[UUID] = []
@@ -0,0 +1,121 @@
+# Worker startup: schema check and warm-up
+#
+# Each uvicorn/gunicorn worker runs this before serving. The Alembic head
+# check runs once per deployment: the first worker to get the lock checks the
+# database and leaves a marker keyed by the database URL and the migration
+# files, and every later worker on the host skips straight to warming up.
+# Warming opens pool connections and runs the hot read queries once, so
+# SQLAlchemy's compiled-statement cache is filled before the first request.
+# Both caches are per process, so warming runs in every worker, after fork.
+
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from uuid import UUID
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session, configure_mappers
+from app import crud
+
+try:
+    import fcntl
+except ImportError:  # Windows: every worker checks the schema itself
+    fcntl = None
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[1] / "alembic"
+
+
+class SchemaOutOfDate(RuntimeError):
+    """Raised when the database is not at the Alembic head revision the code expects"""
+
+
+def check_schema(engine: Engine) -> None:
+    """Compare the database's Alembic revision against the migration scripts' head"""
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    heads = set(ScriptDirectory(str(ALEMBIC_DIR)).get_heads())
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != heads:
+        raise SchemaOutOfDate(
+            f"Database is at revision {', '.join(sorted(current)) or 'none'} but the code expects "
+            f"{', '.join(sorted(heads))}; run `alembic upgrade head`"
+        )
+
+
+def schema_marker(engine: Engine) -> Path:
+    """Marker file recording that this database was checked against these migrations"""
+    key = hashlib.sha256("\n".join(
+        [engine.url.render_as_string(hide_password=True)] + sorted(os.listdir(ALEMBIC_DIR / "versions"))
+    ).encode()).hexdigest()[:16]
+    return Path(tempfile.gettempdir()) / f"notes-schema-{key}.ok"
+
+
+@contextmanager
+def _file_lock(path: Path):
+    if fcntl is None:
+        yield
+        return
+    with open(path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def ensure_schema_current(engine: Engine) -> None:
+    """check_schema, at most once per deployment across the workers on this host"""
+    marker = schema_marker(engine)
+    if marker.exists():
+        return
+    with _file_lock(marker.with_suffix(".lock")):
+        if marker.exists():
+            return
+        check_schema(engine)
+        marker.touch()
+
+
+def _run_hot_queries(connection: Connection) -> None:
+    # The statements behind the Dashboard and NoteDetail reads, for a user
+    # that does not exist; compiling them is what fills the cache
+    user_id = UUID(int=0)
+    with Session(bind=connection) as db:
+        crud.get_user_by_id(db, user_id)
+        crud.get_note_by_id(db, user_id, user_id)
+        crud.get_notes_fingerprint(crud.notes_by_user_query(db, user_id), user_id)
+        crud.get_tag_counts(db, user_id)
+        for query in (crud.notes_by_user_query(db, user_id), crud.recent_notes_query(db, user_id)):
+            for statement in (query, crud.summarize(query)):
+                crud.fetch_notes(statement)
+                crud.fetch_notes(statement, limit=50)
+        db.rollback()
+
+
+def warm_up(engine: Engine, connections: int) -> None:
+    """Open up to `connections` pooled connections and compile the hot queries"""
+    configure_mappers()
+    if connections <= 0:
+        return
+    held = [engine.connect() for _ in range(connections)]
+    try:
+        _run_hot_queries(held[0])
+    finally:
+        for connection in held:
+            connection.close()
+
+
+async def warm_up_async(engine: AsyncEngine, connections: int) -> None:
+    """warm_up for the async engine"""
+    configure_mappers()
+    if connections <= 0:
+        return
+    held = [await engine.connect() for _ in range(connections)]
+    try:
+        await held[0].run_sync(_run_hot_queries)
+    finally:
+        for connection in held:
+            await connection.close()
@@ -0,0 +1,3 @@
+# Benchmarks for the Notes API; run from the backend directory, e.g.
+#   python -m benchmarks.bench_batch_create --notes 2000
+#   python -m benchmarks.loadtest --duration 30
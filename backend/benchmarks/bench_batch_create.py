@@ -0,0 +1,47 @@
+# Throughput of POST /notes/batch against one POST /notes/ per note
+#
+#   python -m benchmarks.bench_batch_create --notes 2000 [--database-url URL]
+
+import argparse
+
+from faker import Faker
+
+from benchmarks.common import bench_client, timer
+from benchmarks.datagen import note_payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch vs single note creation throughput")
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    fake = Faker()
+    Faker.seed(0)
+    payload = note_payloads(fake, args.notes)
+
+    with bench_client(args.database_url) as client:
+        single_user = client.post("/auth/register", json={"email": fake.email()}).json()["id"]
+        batch_user = client.post("/auth/register", json={"email": fake.email()}).json()["id"]
+
+        with timer() as single:
+            for note in payload:
+                response = client.post(f"/notes/?user_id={single_user}", json=note)
+                response.raise_for_status()
+
+        with timer() as batch:
+            for start in range(0, len(payload), args.batch_size):
+                response = client.post(
+                    f"/notes/batch?user_id={batch_user}",
+                    json=payload[start:start + args.batch_size]
+                )
+                response.raise_for_status()
+
+    for name, result in [("single POST /notes/", single), ("POST /notes/batch", batch)]:
+        print(f"{name:<22} {args.notes / result['seconds']:>10.0f} notes/s  ({result['seconds']:.2f}s)")
+    print(f"speedup: {single['seconds'] / batch['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Storage saved against CPU spent by note content compression
+#
+#   python -m benchmarks.bench_compression [--notes 2000] [--content-chars 8000]
+#
+# First times each codec on generated note bodies of several sizes, then
+# stores the same notes in SQLite with CONTENT_COMPRESSION off and on and
+# compares database size, insert time and the time to load and serialize
+# the full note list.
+
+import argparse
+import os
+import tempfile
+from typing import List
+
+# Imported first: it supplies the DATABASE_URL that app settings require
+from benchmarks.common import timer
+
+from faker import Faker
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import compression, crud, models, schemas
+from app.config import settings
+from app.database import Base
+from benchmarks.datagen import note_payloads
+
+SIZES = (1000, 4000, 16000)
+
+
+def codec_table(fake: Faker, repeat: int) -> None:
+    codecs = ["zlib"] + (["zstd"] if compression.zstandard is not None else [])
+    print(f"{'codec':<6} {'chars':>7} {'ratio':>7} {'compress':>12} {'decompress':>12}")
+    for size in SIZES:
+        texts = [fake.text(max_nb_chars=size) for _ in range(repeat)]
+        raw = sum(len(text.encode()) for text in texts)
+        for codec in codecs:
+            with timer() as packing:
+                blobs = [compression.compress(text, codec) for text in texts]
+            with timer() as unpacking:
+                for blob in blobs:
+                    compression.decompress(blob)
+            print(f"{codec:<6} {size:>7} {raw / sum(map(len, blobs)):>6.1f}x "
+                  f"{packing['seconds'] / repeat * 1e6:>9.0f} us {unpacking['seconds'] / repeat * 1e6:>9.0f} us")
+
+
+def storage_run(codec: str, payload: List[dict], tmpdir: str) -> dict:
+    path = os.path.join(tmpdir, f"{codec}.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    settings.content_compression = codec
+    notes = [schemas.NoteCreate(**note) for note in payload]
+    adapter = TypeAdapter(List[schemas.NoteResponse])
+
+    with SessionLocal() as db:
+        user = crud.create_user(db, f"{codec}@example.com")
+        with timer() as inserting:
+            for start in range(0, len(notes), 1000):
+                crud.create_notes_bulk(db, notes[start:start + 1000], user.id)
+        stored = db.scalar(select(
+            func.sum(func.length(models.Note.content) + func.coalesce(func.length(models.Note.content_blob), 0))
+        ))
+        with timer() as listing:
+            adapter.dump_json(adapter.validate_python(crud.get_notes_by_user(db, user.id), from_attributes=True))
+    engine.dispose()
+
+    return {
+        "file": os.path.getsize(path),
+        "stored": stored,
+        "insert": inserting["seconds"],
+        "list": listing["seconds"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Note content compression: size vs CPU")
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--content-chars", type=int, default=8000)
+    parser.add_argument("--repeat", type=int, default=200, help="Texts per size in the codec table")
+    parser.add_argument("--codec", default="zlib", choices=["zlib", "zstd"])
+    args = parser.parse_args()
+
+    fake = Faker()
+    Faker.seed(0)
+    codec_table(fake, args.repeat)
+
+    payload = note_payloads(fake, args.notes, content_chars=args.content_chars)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        results = {codec: storage_run(codec, payload, tmpdir) for codec in ("off", args.codec)}
+
+    print(f"\n{args.notes} notes of up to {args.content_chars} chars in SQLite")
+    print(f"{'':<6} {'db file':>10} {'content':>10} {'insert':>9} {'list+serialize':>15}")
+    for codec, result in results.items():
+        print(f"{codec:<6} {result['file'] / 2**20:>8.1f}MB {result['stored'] / 2**20:>8.1f}MB "
+              f"{result['insert']:>8.2f}s {result['list']:>14.3f}s")
+
+
+if __name__ == "__main__":
+    main()
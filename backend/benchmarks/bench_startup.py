@@ -0,0 +1,117 @@
+# Worker startup cost: import time of app.main and time from launching
+# uvicorn to the first successful note list request
+#
+#   python -m benchmarks.bench_startup [--runs 5] [--workers 1] [--database-url URL]
+#
+# Compares SCHEMA_STARTUP=create_all (the old behaviour) with "check" on a
+# host that has not checked this deployment yet (cold) and one that has, each
+# with and without pool warm-up. The database is created and stamped at the
+# Alembic head first, so "check" passes.
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.loadtest import BACKEND_DIR, free_port
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+# (label, SCHEMA_STARTUP, DB_POOL_WARMUP, clear the schema marker first)
+SCENARIOS = [
+    ("create_all", "create_all", 0, False),
+    ("check, cold", "check", 0, True),
+    ("check", "check", 0, False),
+    ("check + warm-up", "check", 2, False),
+]
+
+
+def prepare_database(database_url: str) -> str:
+    """Create the schema, stamp it at the Alembic head and return a user ID to query"""
+    os.environ["DATABASE_URL"] = database_url
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy.orm import Session
+    from app import crud, startup
+    from app.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    command.stamp(config, "head")
+    with Session(engine) as db:
+        user_id = crud.create_user(db, f"startup-{time.time_ns()}@example.com").id
+    startup.schema_marker(engine).unlink(missing_ok=True)
+    engine.dispose()
+    return str(user_id)
+
+
+def import_seconds(env: dict) -> float:
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=env)
+    return float(output)
+
+
+def first_request_seconds(env: dict, workers: int, user_id: str) -> float:
+    """Seconds from launching uvicorn until GET /notes/ first returns 200"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/notes/?user_id={user_id}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        while True:
+            try:
+                if httpx.get(url).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            if time.perf_counter() - start > 60:
+                raise RuntimeError("uvicorn did not answer within 60s")
+            time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker import and startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--database-url", default=None, help="Database to start against (default: temporary SQLite)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database_url = args.database_url or f"sqlite:///{tmpdir}/startup.db"
+        user_id = prepare_database(database_url)
+        from app import startup
+        from app.database import engine
+        marker = startup.schema_marker(engine)
+
+        env = dict(os.environ, DATABASE_URL=database_url)
+        imports = [import_seconds(env) for _ in range(args.runs)]
+        print(f"{'import app.main':<20} median {statistics.median(imports) * 1000:7.0f} ms")
+
+        for label, schema_startup, warmup, cold in SCENARIOS:
+            scenario_env = dict(env, SCHEMA_STARTUP=schema_startup, DB_POOL_WARMUP=str(warmup))
+            timings = []
+            for _ in range(args.runs):
+                if cold:
+                    marker.unlink(missing_ok=True)
+                timings.append(first_request_seconds(scenario_env, args.workers, user_id))
+            print(f"{label:<20} median {statistics.median(timings) * 1000:7.0f} ms  "
+                  f"(min {min(timings) * 1000:.0f}, max {max(timings) * 1000:.0f}) to first 200")
+
+
+if __name__ == "__main__":
+    main()
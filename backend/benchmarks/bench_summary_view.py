@@ -0,0 +1,49 @@
+# Payload size and latency of GET /notes/ with view=full against view=summary
+#
+#   python -m benchmarks.bench_summary_view --notes 1000 [--content-chars 5000] [--database-url URL]
+
+import argparse
+
+from faker import Faker
+
+from benchmarks.common import bench_client, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full vs summary note list payloads")
+    parser.add_argument("--notes", type=int, default=1000)
+    parser.add_argument("--content-chars", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    fake = Faker()
+    Faker.seed(0)
+    payload = [
+        {
+            "title": fake.sentence(nb_words=5)[:255],
+            "content": fake.text(max_nb_chars=args.content_chars),
+        }
+        for _ in range(args.notes)
+    ]
+
+    results = {}
+    with bench_client(args.database_url) as client:
+        user_id = client.post("/auth/register", json={"email": fake.email()}).json()["id"]
+        for start in range(0, len(payload), 1000):
+            client.post(f"/notes/batch?user_id={user_id}", json=payload[start:start + 1000]).raise_for_status()
+
+        for view in ("full", "summary"):
+            with timer() as elapsed:
+                for _ in range(args.requests):
+                    response = client.get(f"/notes/?user_id={user_id}&view={view}")
+                    response.raise_for_status()
+            results[view] = (len(response.content), elapsed["seconds"] / args.requests)
+
+    for view, (size, seconds) in results.items():
+        print(f"view={view:<8} {size / 1024:>10.1f} KiB  {seconds * 1000:>8.1f} ms/request")
+    print(f"payload reduction: {results['full'][0] / results['summary'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
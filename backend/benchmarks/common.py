@@ -0,0 +1,66 @@
+# Shared helpers for the benchmark scripts
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+# Settings require a database URL at import time; benchmarks bring their own
+os.environ.setdefault("DATABASE_URL", "sqlite:///./benchmark.db")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import cache
+from app.main import app
+from app.database import Base, get_db
+
+
+@contextmanager
+def bench_client(database_url: str = None):
+    """
+    TestClient for the app against a fresh schema, with the note list cache
+    off so repeated GETs measure the queries rather than cache hits.
+    Defaults to a throwaway SQLite file; pass a PostgreSQL URL to measure that instead.
+    """
+    tmpdir = None
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{tmpdir.name}/bench.db"
+    
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args)
+    Base.metadata.create_all(bind=engine)
+    BenchSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = BenchSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    notes_cache = cache.notes_cache
+    cache.set_notes_cache(cache.LocalLRUCache(0, 0))
+    try:
+        yield TestClient(app)
+    finally:
+        cache.set_notes_cache(notes_cache)
+        del app.dependency_overrides[get_db]
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+
+@contextmanager
+def timer():
+    """Yield a dict whose "seconds" entry is filled in when the block exits"""
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start
@@ -0,0 +1,68 @@
+# Seeded synthetic users and notes for the benchmarks
+
+import random
+import uuid
+from typing import List
+
+import httpx
+from faker import Faker
+
+# Notes per POST /notes/batch while seeding
+SEED_BATCH_SIZE = 1000
+TAG_POOL_SIZE = 50
+
+
+class SeededUser:
+    def __init__(self, user_id: str, note_ids: List[str]):
+        self.id = user_id
+        self.note_ids = note_ids
+
+
+def note_payloads(fake: Faker, count: int, content_chars: int = 500, tags: List[str] = None) -> List[dict]:
+    """Note bodies for POST /notes/ or /notes/batch; about a tenth are favorites"""
+    tags = tags or fake.words(nb=TAG_POOL_SIZE, unique=True)
+    return [
+        {
+            "title": fake.sentence(nb_words=5)[:255],
+            "content": fake.text(max_nb_chars=content_chars) if content_chars >= 5 else "",
+            "tags": ", ".join(random.sample(tags, 2)),
+            "is_favorite": random.random() < 0.1,
+        }
+        for _ in range(count)
+    ]
+
+
+async def seed(
+    client: httpx.AsyncClient,
+    users: int,
+    notes_per_user: int,
+    content_chars: int = 500,
+    seed_value: int = 0
+) -> List[SeededUser]:
+    """Register `users` users and give each `notes_per_user` notes through the API"""
+    Faker.seed(seed_value)
+    random.seed(seed_value)
+    fake = Faker()
+    tags = fake.words(nb=TAG_POOL_SIZE, unique=True)
+    # Unseeded, so emails stay unique when seeding an existing database again;
+    # the index keeps them unique within the run
+    run_tag = uuid.uuid4().hex[:8]
+    seeded = []
+    
+    for index in range(users):
+        email = f"bench-{run_tag}-{index}-{fake.user_name()}@example.com"
+        response = await client.post("/auth/register", json={"email": email})
+        response.raise_for_status()
+        user_id = response.json()["id"]
+        
+        note_ids = []
+        payload = note_payloads(fake, notes_per_user, content_chars, tags)
+        for start in range(0, len(payload), SEED_BATCH_SIZE):
+            response = await client.post(
+                f"/notes/batch?user_id={user_id}", json=payload[start:start + SEED_BATCH_SIZE]
+            )
+            response.raise_for_status()
+            note_ids.extend(note["id"] for note in response.json()["created"])
+        seeded.append(SeededUser(user_id, note_ids))
+    
+    return seeded
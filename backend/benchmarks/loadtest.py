@@ -0,0 +1,249 @@
+# Load test replaying the Dashboard / NoteDetail request mix against a live server
+#
+#   python -m benchmarks.loadtest --users 20 --notes-per-user 200 --concurrency 32 --duration 30
+#   python -m benchmarks.loadtest --database-url postgresql://localhost/notes_bench --workers 4
+#   python -m benchmarks.loadtest --base-url http://localhost:8000 --compare benchmarks/results/before.json
+#
+# Starts uvicorn on a throwaway SQLite file unless --base-url or --database-url
+# says otherwise, seeds it through the API, runs the mix for --duration
+# seconds and writes the report to benchmarks/results/.
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from faker import Faker
+
+from benchmarks.datagen import note_payloads, seed
+from benchmarks.report import build_report, load_report, print_comparison, print_report, save_report
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+RESULTS_DIR = BACKEND_DIR / "benchmarks" / "results"
+
+
+# Each action issues one request for a virtual user, modelled on what the
+# frontend's Dashboard and NoteDetail pages call
+async def dashboard_active(client, user, rng, fake):
+    return await client.get("/notes/", params={"user_id": user.id, "status": "active"})
+
+
+async def dashboard_archived(client, user, rng, fake):
+    return await client.get("/notes/", params={"user_id": user.id, "status": "archived"})
+
+
+async def dashboard_favorites(client, user, rng, fake):
+    return await client.get("/notes/favorites/", params={"user_id": user.id})
+
+
+async def dashboard_recent(client, user, rng, fake):
+    return await client.get("/notes/recent/", params={"user_id": user.id})
+
+
+async def search(client, user, rng, fake):
+    return await client.get("/notes/search", params={"user_id": user.id, "q": fake.word()})
+
+
+async def note_detail(client, user, rng, fake):
+    return await client.get(f"/notes/{rng.choice(user.note_ids)}", params={"user_id": user.id})
+
+
+async def update_note(client, user, rng, fake):
+    return await client.patch(
+        f"/notes/{rng.choice(user.note_ids)}",
+        params={"user_id": user.id},
+        json={"title": fake.sentence(nb_words=4), "content": fake.text(max_nb_chars=400)}
+    )
+
+
+async def toggle_favorite(client, user, rng, fake):
+    return await client.patch(
+        f"/notes/{rng.choice(user.note_ids)}/favorite",
+        params={"user_id": user.id},
+        json={"is_favorite": rng.random() < 0.5}
+    )
+
+
+async def archive_note(client, user, rng, fake):
+    return await client.patch(
+        f"/notes/{rng.choice(user.note_ids)}/status",
+        params={"user_id": user.id},
+        json={"status": rng.choice(["active", "archived"])}
+    )
+
+
+async def create_note(client, user, rng, fake):
+    response = await client.post("/notes/", params={"user_id": user.id}, json=note_payloads(fake, 1)[0])
+    if response.status_code == 201:
+        user.note_ids.append(response.json()["id"])
+    return response
+
+
+async def delete_note(client, user, rng, fake):
+    # Keep every user with notes to read
+    if len(user.note_ids) < 2:
+        return await note_detail(client, user, rng, fake)
+    note_id = user.note_ids.pop(rng.randrange(len(user.note_ids)))
+    return await client.delete(f"/notes/{note_id}", params={"user_id": user.id})
+
+
+# Relative weights: mostly list and detail reads, some edits
+MIX = {
+    dashboard_active: 30,
+    dashboard_archived: 5,
+    dashboard_favorites: 8,
+    dashboard_recent: 8,
+    search: 4,
+    note_detail: 25,
+    update_note: 8,
+    toggle_favorite: 5,
+    archive_note: 2,
+    create_note: 4,
+    delete_note: 1,
+}
+
+
+async def virtual_user(client, user, rng, fake, deadline, record_after, samples):
+    actions, weights = list(MIX), list(MIX.values())
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            return
+        action = rng.choices(actions, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await action(client, user, rng, fake)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if start >= record_after:
+            samples[action.__name__].append((time.perf_counter() - start, ok))
+
+
+async def run_load(base_url: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        seed_start = time.perf_counter()
+        users = await seed(client, args.users, args.notes_per_user, args.content_chars, args.seed)
+        print(f"seeded {args.users} users x {args.notes_per_user} notes in {time.perf_counter() - seed_start:.1f}s")
+        
+        samples = defaultdict(list)
+        start = time.perf_counter()
+        record_after = start + args.warmup
+        deadline = record_after + args.duration
+        await asyncio.gather(*(
+            virtual_user(
+                client, users[i % len(users)], random.Random(args.seed + i), Faker(),
+                deadline, record_after, samples
+            )
+            for i in range(args.concurrency)
+        ))
+    
+    meta = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "base_url": base_url,
+        "database": args.database_url or ("external" if args.base_url else "sqlite (temporary)"),
+        "workers": args.workers,
+        "users": args.users,
+        "notes_per_user": args.notes_per_user,
+        "content_chars": args.content_chars,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "mix": {action.__name__: weight for action, weight in MIX.items()},
+    }
+    return build_report(samples, args.duration, meta)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(database_url: str, workers: int):
+    """Run uvicorn for the app against `database_url` until the block exits"""
+    port = free_port()
+    # The seeded database is built by the app, not by migrations
+    env = dict(os.environ, DATABASE_URL=database_url, SCHEMA_STARTUP="create_all")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{base_url}/health").raise_for_status()
+                break
+            except httpx.HTTPError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Notes API load test")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--notes-per-user", type=int, default=200)
+    parser.add_argument("--content-chars", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32, help="Virtual users issuing requests back to back")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before the measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local server")
+    parser.add_argument("--database-url", default=None, help="Database for the local server (default: temporary SQLite)")
+    parser.add_argument("--base-url", default=None, help="Test an already running server instead")
+    parser.add_argument("--output", default=None, help="Report path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    if args.base_url:
+        report = asyncio.run(run_load(args.base_url, args))
+    else:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            database_url = args.database_url or f"sqlite:///{tmpdir}/loadtest.db"
+            with local_server(database_url, args.workers) as base_url:
+                report = asyncio.run(run_load(base_url, args))
+
+    print_report(report)
+    if args.compare:
+        print_comparison(load_report(args.compare), report)
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json"
+    save_report(report, str(output))
+    print(f"\nreport written to {output}")
+
+
+if __name__ == "__main__":
+    main()
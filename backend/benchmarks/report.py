@@ -0,0 +1,82 @@
+# Latency percentiles and throughput per endpoint, saved as JSON for comparing runs
+
+import json
+from typing import Dict, List, Tuple
+
+# (seconds, ok) per request
+Samples = Dict[str, List[Tuple[float, bool]]]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize_latencies(samples: List[Tuple[float, bool]], duration: float) -> dict:
+    latencies = sorted(seconds for seconds, _ in samples)
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, ok in samples if not ok),
+        "throughput_rps": round(len(samples) / duration, 2) if duration else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def build_report(samples: Samples, duration: float, meta: dict) -> dict:
+    everything = [sample for endpoint_samples in samples.values() for sample in endpoint_samples]
+    return {
+        "meta": meta,
+        "duration_s": round(duration, 2),
+        "total": summarize_latencies(everything, duration),
+        "endpoints": {
+            name: summarize_latencies(endpoint_samples, duration)
+            for name, endpoint_samples in sorted(samples.items())
+        },
+    }
+
+
+def print_report(report: dict) -> None:
+    header = f"{'endpoint':<18} {'requests':>8} {'errors':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, stats in rows:
+        print(
+            f"{name:<18} {stats['requests']:>8} {stats['errors']:>6} {stats['throughput_rps']:>8.1f} "
+            f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}"
+        )
+
+
+def print_comparison(baseline: dict, report: dict) -> None:
+    """p95 latency and throughput of this run relative to a baseline report"""
+    def change(old, new):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\n{'vs baseline':<18} {'p95 ms':>18} {'change':>8} {'rps':>18} {'change':>8}")
+    rows = [(name, stats) for name, stats in report["endpoints"].items()] + [("TOTAL", report["total"])]
+    for name, stats in rows:
+        old = baseline["total"] if name == "TOTAL" else baseline["endpoints"].get(name)
+        if old is None:
+            continue
+        print(
+            f"{name:<18} {old['p95_ms']:>8.2f} -> {stats['p95_ms']:>6.2f} {change(old['p95_ms'], stats['p95_ms']):>8} "
+            f"{old['throughput_rps']:>8.1f} -> {stats['throughput_rps']:>6.1f} "
+            f"{change(old['throughput_rps'], stats['throughput_rps']):>8}"
+        )
+
+
+def save_report(report: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
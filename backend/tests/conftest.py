@@ -1,7 +1,9 @@
 
 import pytest
+from collections import Counter
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
@@ -49,6 +51,49 @@ def client(db_session):
     # Clean up dependency overrides after the test
     del app.dependency_overrides[get_db]
 
+class QueryLog:
+    """SQL statements issued inside a count_queries() block"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __len__(self):
+        return len(self.statements)
+
+    def repeated(self):
+        """Statements issued more than once with identical SQL, the signature of an N+1"""
+        return {sql: n for sql, n in Counter(self.statements).items() if n > 1}
+
+    def assert_within(self, budget):
+        repeated = self.repeated()
+        assert not repeated, "Possible N+1, repeated statements:\n" + "\n".join(
+            f"{n}x {sql}" for sql, n in repeated.items()
+        )
+        assert len(self) <= budget, f"{len(self)} statements, budget is {budget}:\n" + "\n".join(self.statements)
+
+@pytest.fixture
+def count_queries():
+    """
+    Context manager recording the statements the test database receives inside it:
+
+        with count_queries() as queries:
+            client.get(...)
+        queries.assert_within(3)
+    """
+    @contextmanager
+    def recorder():
+        log = QueryLog()
+        def record(conn, cursor, statement, parameters, context, executemany):
+            log.statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield log
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return recorder
+
 @pytest.fixture(autouse=True, scope="session")
 def cleanup_db():
     """
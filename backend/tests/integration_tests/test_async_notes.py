@@ -0,0 +1,97 @@
+import gzip
+import json
+
+import pytest
+from faker import Faker
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import get_async_db, to_async_url
+from app.routers import async_auth, async_notes
+
+pytest.importorskip("aiosqlite")
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+
+fake = Faker()
+
+@pytest.fixture(scope="module")
+def async_client():
+    """
+    TestClient for an app serving the async routers against the test database.
+    Each TestClient runs its own event loop, so connections are not pooled.
+    """
+    engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+    AsyncTestingSessionLocal = async_sessionmaker(
+        bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(async_auth.router)
+    app.include_router(async_notes.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    yield TestClient(app)
+
+def test_async_register_and_login(async_client):
+    email = fake.email()
+
+    response = async_client.post("/auth/register", json={"email": email})
+    assert response.status_code == 201
+
+    response = async_client.post("/auth/login", json={"email": email})
+    assert response.status_code == 200
+    assert response.json()["email"] == email
+
+def test_async_note_lifecycle(async_client):
+    user_id = async_client.post("/auth/register", json={"email": fake.email()}).json()["id"]
+
+    create_response = async_client.post(
+        f"/notes/?user_id={user_id}",
+        json={"title": "Async Note", "content": "Async content", "tags": "async"}
+    )
+    assert create_response.status_code == 201
+    note_id = create_response.json()["id"]
+
+    response = async_client.patch(f"/notes/{note_id}?user_id={user_id}", json={"title": "Renamed"})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Renamed"
+    assert response.headers["etag"] == '"2"'
+
+    response = async_client.patch(f"/notes/{note_id}?user_id={user_id}", json={"title": "Stale"}, headers={"If-Match": '"1"'})
+    assert response.status_code == 412 and response.headers["etag"] == '"2"'
+    revisions = async_client.get(f"/notes/{note_id}/revisions?user_id={user_id}").json()
+    assert [revision["title"] for revision in revisions] == ["Async Note"]
+
+    response = async_client.get(f"/notes/?user_id={user_id}&tag=async&limit=10")
+    assert [note["id"] for note in response.json()["items"]] == [note_id]
+
+    response = async_client.get(f"/notes/?user_id={user_id}&tag=async&view=summary")
+    assert response.json()[0]["preview"] == "Async content"
+
+    response = async_client.delete(f"/notes/{note_id}?user_id={user_id}")
+    assert response.status_code == 204
+    assert async_client.get(f"/notes/{note_id}?user_id={user_id}").status_code == 404
+
+    changes = async_client.get(f"/notes/changes?user_id={user_id}&since=0").json()
+    assert changes["notes"] == [] and changes["deleted_ids"] == [note_id]
+
+def test_async_import_notes(async_client):
+    user_id = async_client.post("/auth/register", json={"email": fake.email()}).json()["id"]
+    body = "\n".join(json.dumps({"title": f"Imported {i}"}) for i in range(3)) + "\n{}\n"
+
+    response = async_client.post(f"/notes/import?user_id={user_id}", content=gzip.compress(body.encode()))
+    assert response.status_code == 200
+    assert response.json()["imported"] == 3
+    assert response.json()["errors"][0]["line"] == 4
+    assert len(async_client.get(f"/notes/?user_id={user_id}").json()) == 3
+
+def test_async_get_notes_unknown_user(async_client):
+    response = async_client.get(f"/notes/?user_id={fake.uuid4()}")
+    assert response.status_code == 404
@@ -0,0 +1,17 @@
+from faker import Faker
+
+fake = Faker()
+
+def test_metrics_label_requests_by_route_template(client):
+    user_id = client.post("/auth/register", json={"email": fake.email()}).json()["id"]
+    for _ in range(2):
+        client.get(f"/notes/{fake.uuid4()}?user_id={user_id}")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/notes/{note_id}",status="404"}' in body
+    assert "http_request_db_statements_bucket" in body
+    assert "notes_cache_hits_total" in body
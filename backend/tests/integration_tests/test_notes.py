@@ -1,7 +1,21 @@
 
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+from uuid import UUID
+
 import pytest
 from faker import Faker
-from app.crud import create_user
+from sqlalchemy import select
+from app.config import settings
+from app.crud import PREVIEW_LENGTH, create_user, prune_tombstones_batch, recompress_notes_batch
+from app.models import Note
+from app import replicas
+from app.cache import LocalLRUCache, notes_cache
+from app.database import Base
 
 fake = Faker()
 
@@ -78,3 +92,494 @@ def test_get_non_existent_note(client, test_user):
     non_existent_uuid = fake.uuid4()
     response = client.get(f"/notes/{non_existent_uuid}?user_id={test_user.id}")
     assert response.status_code == 404
+
+def test_get_notes_paginated(client, test_user):
+    created_ids = set()
+    for i in range(5):
+        response = client.post(
+            f"/notes/?user_id={test_user.id}",
+            json={"title": f"Paged Note {i}", "content": "Paged content"}
+        )
+        created_ids.add(response.json()["id"])
+
+    seen_ids = []
+    cursor = None
+    while True:
+        url = f"/notes/?user_id={test_user.id}&limit=2"
+        if cursor:
+            url += f"&after={cursor}"
+        response = client.get(url)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen_ids.extend(note["id"] for note in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    # Every note appears exactly once across the pages
+    assert len(seen_ids) == len(set(seen_ids))
+    assert set(seen_ids) == created_ids
+
+def test_get_notes_invalid_cursor(client, test_user):
+    response = client.get(f"/notes/?user_id={test_user.id}&limit=2&after=not-a-cursor")
+    assert response.status_code == 400
+
+def test_get_notes_summary_view(client, test_user):
+    content = "x" * 500
+    response = client.post(
+        f"/notes/?user_id={test_user.id}",
+        json={"title": "Long Note", "content": content, "tags": "summary"}
+    )
+    note_id = response.json()["id"]
+
+    response = client.get(f"/notes/?user_id={test_user.id}&tag=summary&view=summary")
+    assert response.status_code == 200
+    notes = response.json()
+    assert [note["id"] for note in notes] == [note_id]
+    assert "content" not in notes[0]
+    assert notes[0]["preview"] == content[:200]
+
+    response = client.get(f"/notes/?user_id={test_user.id}&tag=summary&view=summary&limit=1")
+    page = response.json()
+    assert page["items"][0]["preview"] == content[:200]
+    assert page["next_cursor"] is None
+
+def test_search_notes(client, test_user):
+    client.post(
+        f"/notes/?user_id={test_user.id}",
+        json={"title": "Grocery list", "content": "Buy apples and oranges", "tags": "shopping"}
+    )
+    client.post(
+        f"/notes/?user_id={test_user.id}",
+        json={"title": "Meeting notes", "content": "Discuss the roadmap"}
+    )
+
+    response = client.get(f"/notes/search?user_id={test_user.id}&q=apples")
+    assert response.status_code == 200
+    results = response.json()["items"]
+    assert [note["title"] for note in results] == ["Grocery list"]
+    assert "<mark>apples</mark>" in results[0]["snippet"]
+
+def test_search_notes_respects_status_filter(client, test_user):
+    create_response = client.post(
+        f"/notes/?user_id={test_user.id}",
+        json={"title": "Archived idea", "content": "A searchable thought"}
+    )
+    note_id = create_response.json()["id"]
+    client.patch(
+        f"/notes/{note_id}/status?user_id={test_user.id}",
+        json={"status": "archived"}
+    )
+
+    response = client.get(f"/notes/search?user_id={test_user.id}&q=searchable&status=active")
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+    response = client.get(f"/notes/search?user_id={test_user.id}&q=searchable&status=archived")
+    assert [note["id"] for note in response.json()["items"]] == [note_id]
+
+def test_filter_notes_by_tags(client, test_user):
+    for title, tags in [("Work only", "work"), ("Work and urgent", "work, Urgent"), ("Home", "home")]:
+        client.post(
+            f"/notes/?user_id={test_user.id}",
+            json={"title": title, "tags": tags}
+        )
+
+    response = client.get(f"/notes/?user_id={test_user.id}&tag=work&tag=urgent")
+    assert [note["title"] for note in response.json()] == ["Work and urgent"]
+
+    response = client.get(f"/notes/?user_id={test_user.id}&tag=urgent&tag=home&tag_match=any")
+    assert sorted(note["title"] for note in response.json()) == ["Home", "Work and urgent"]
+
+def test_get_tag_counts(client, test_user):
+    create_response = client.post(
+        f"/notes/?user_id={test_user.id}",
+        json={"title": "Tagged", "tags": "alpha,beta"}
+    )
+    client.post(
+        f"/notes/?user_id={test_user.id}",
+        json={"title": "Also tagged", "tags": "alpha"}
+    )
+
+    response = client.get(f"/notes/tags?user_id={test_user.id}")
+    assert response.status_code == 200
+    assert response.json() == [{"name": "alpha", "count": 2}, {"name": "beta", "count": 1}]
+
+    # Retagging a note moves it between tags
+    note_id = create_response.json()["id"]
+    client.patch(f"/notes/{note_id}?user_id={test_user.id}", json={"tags": "gamma"})
+    response = client.get(f"/notes/tags?user_id={test_user.id}")
+    assert response.json() == [{"name": "alpha", "count": 1}, {"name": "gamma", "count": 1}]
+
+def test_get_notes_unknown_user(client):
+    response = client.get(f"/notes/?user_id={fake.uuid4()}&status=active")
+    assert response.status_code == 404
+
+def test_delete_notes_batch_returns_deleted_ids(client, test_user):
+    note_ids = [
+        client.post(
+            f"/notes/?user_id={test_user.id}",
+            json={"title": f"Batch {i}"}
+        ).json()["id"]
+        for i in range(3)
+    ]
+    missing_id = fake.uuid4()
+
+    response = client.request(
+        "DELETE",
+        f"/notes/batch/?user_id={test_user.id}",
+        json=note_ids[:2] + [missing_id]
+    )
+    assert response.status_code == 200
+    assert sorted(response.json()["deleted_ids"]) == sorted(note_ids[:2])
+
+    remaining = [note["id"] for note in client.get(f"/notes/?user_id={test_user.id}").json()]
+    assert remaining == [note_ids[2]]
+
+def test_create_notes_batch_reports_invalid_items(client, test_user):
+    payload = [
+        {"title": "Imported 1", "content": "First", "tags": "imported"},
+        {"title": ""},
+        {"title": "Imported 2", "is_favorite": True, "tags": "imported, starred"},
+        "not a note",
+    ]
+    response = client.post(f"/notes/batch?user_id={test_user.id}", json=payload)
+    assert response.status_code == 201
+    data = response.json()
+
+    assert [note["title"] for note in data["created"]] == ["Imported 1", "Imported 2"]
+    assert data["created"][1]["is_favorite"] is True
+    assert all(note["status"] == "active" for note in data["created"])
+    assert [error["index"] for error in data["errors"]] == [1, 3]
+
+    response = client.get(f"/notes/tags?user_id={test_user.id}")
+    assert response.json() == [{"name": "imported", "count": 2}, {"name": "starred", "count": 1}]
+
+def test_create_notes_batch_unknown_user(client):
+    response = client.post(f"/notes/batch?user_id={fake.uuid4()}", json=[{"title": "Orphan"}])
+    assert response.status_code == 404
+
+def test_update_notes_batch(client, test_user):
+    note_ids = [
+        client.post(
+            f"/notes/?user_id={test_user.id}",
+            json={"title": f"Select {i}"}
+        ).json()["id"]
+        for i in range(3)
+    ]
+
+    response = client.patch(
+        f"/notes/batch?user_id={test_user.id}",
+        json={"note_ids": note_ids[:2] + [fake.uuid4()], "status": "archived", "is_favorite": True}
+    )
+    assert response.status_code == 200
+    updated = response.json()
+    assert sorted(note["id"] for note in updated) == sorted(note_ids[:2])
+    assert all(note["status"] == "archived" and note["is_favorite"] for note in updated)
+
+    archived = client.get(f"/notes/?user_id={test_user.id}&status=archived").json()
+    assert sorted(note["id"] for note in archived) == sorted(note_ids[:2])
+
+def test_update_notes_batch_requires_changes(client, test_user):
+    response = client.patch(
+        f"/notes/batch?user_id={test_user.id}",
+        json={"note_ids": [fake.uuid4()]}
+    )
+    assert response.status_code == 400
+
+def test_get_notes_conditional(client, test_user):
+    client.post(f"/notes/?user_id={test_user.id}", json={"title": "Cached"})
+
+    response = client.get(f"/notes/?user_id={test_user.id}")
+    etag = response.headers["ETag"]
+
+    response = client.get(f"/notes/?user_id={test_user.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # A new note changes the list's count, so the old ETag no longer matches
+    client.post(f"/notes/?user_id={test_user.id}", json={"title": "Fresh"})
+    response = client.get(f"/notes/?user_id={test_user.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    # Each filter variant has its own ETag
+    response = client.get(f"/notes/favorites/?user_id={test_user.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+def test_list_etags_change_on_every_write(client, test_user, monkeypatch):
+    # Without the list cache, so the ETag check itself is exercised
+    monkeypatch.setattr("app.cache.notes_cache", LocalLRUCache(0, 30))
+    note_id = client.post(f"/notes/?user_id={test_user.id}", json={"title": "Same second"}).json()["id"]
+
+    for path in ("/notes/", "/notes/recent/"):
+        etag = client.get(f"{path}?user_id={test_user.id}").headers["ETag"]
+        # Same count and, on SQLite, very likely the same updated_at second
+        client.patch(f"/notes/{note_id}?user_id={test_user.id}", json={"title": f"Edited {path}"})
+        response = client.get(f"{path}?user_id={test_user.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    # An unknown user is a 404 even for a matching If-None-Match
+    response = client.get(f"/notes/?user_id={fake.uuid4()}", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+
+def test_get_note_conditional(client, test_user):
+    note_id = client.post(f"/notes/?user_id={test_user.id}", json={"title": "Single"}).json()["id"]
+
+    response = client.get(f"/notes/{note_id}?user_id={test_user.id}")
+    etag = response.headers["ETag"]
+
+    response = client.get(f"/notes/{note_id}?user_id={test_user.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.get(f"/notes/{note_id}?user_id={test_user.id}", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+
+def test_get_note_changes(client, test_user):
+    url = f"/notes/changes?user_id={test_user.id}"
+    kept = client.post(f"/notes/?user_id={test_user.id}", json={"title": "Kept"}).json()
+    doomed = client.post(f"/notes/?user_id={test_user.id}", json={"title": "Doomed"}).json()
+
+    response = client.get(url)
+    assert response.status_code == 200
+    full = response.json()
+    assert {note["id"] for note in full["notes"]} == {kept["id"], doomed["id"]}
+    assert full["deleted_ids"] == []
+
+    client.patch(f"/notes/{kept['id']}?user_id={test_user.id}", json={"title": "Kept v2"})
+    client.delete(f"/notes/{doomed['id']}?user_id={test_user.id}")
+
+    delta = client.get(f"{url}&since={full['next_since']}").json()
+    assert [note["title"] for note in delta["notes"]] == ["Kept v2"]
+    assert delta["deleted_ids"] == [doomed["id"]]
+    assert delta["next_since"] > full["next_since"]
+
+    # Nothing new since the last token
+    empty = client.get(f"{url}&since={delta['next_since']}").json()
+    assert empty == {"notes": [], "deleted_ids": [], "next_since": delta["next_since"]}
+
+    assert client.get(f"{url}&since={delta['next_since'] + 1}").status_code == 400
+    assert client.get(f"/notes/changes?user_id={fake.uuid4()}").status_code == 404
+
+def test_note_changes_after_tombstones_are_pruned(client, db_session, test_user):
+    url = f"/notes/changes?user_id={test_user.id}"
+    note = client.post(f"/notes/?user_id={test_user.id}", json={"title": "Doomed"}).json()
+    since = client.get(url).json()["next_since"]
+    client.delete(f"/notes/{note['id']}?user_id={test_user.id}")
+    current = client.get(url).json()["next_since"]
+
+    later = datetime.now(timezone.utc) + timedelta(days=settings.tombstone_retention_days + 1)
+    assert prune_tombstones_batch(db_session, batch_size=1000, now=later) >= 1
+    assert prune_tombstones_batch(db_session, batch_size=1000, now=later) == 0
+
+    # The pruned delete is gone, so a sync from before it must start over
+    assert client.get(f"{url}&since={since}").status_code == 410
+    assert client.get(f"{url}&since={current}").json()["deleted_ids"] == []
+    assert client.get(url).json()["notes"] == []
+
+def test_note_list_cache_is_invalidated_by_writes(client, test_user):
+    url = f"/notes/?user_id={test_user.id}&status=active"
+    client.post(f"/notes/?user_id={test_user.id}", json={"title": "First"})
+    assert len(client.get(url).json()) == 1
+
+    hits = notes_cache.stats()["hits"]
+    assert len(client.get(url).json()) == 1
+    assert notes_cache.stats()["hits"] == hits + 1
+
+    note_id = client.post(f"/notes/?user_id={test_user.id}", json={"title": "Second"}).json()["id"]
+    assert len(client.get(url).json()) == 2
+
+    client.patch(f"/notes/{note_id}/status?user_id={test_user.id}", json={"status": "archived"})
+    assert [note["title"] for note in client.get(url).json()] == ["First"]
+
+def test_note_endpoints_stay_within_query_budgets(client, test_user, count_queries):
+    user = f"user_id={test_user.id}"
+
+    def within(budget, method, url, **kwargs):
+        with count_queries() as queries:
+            response = client.request(method, url, **kwargs)
+        assert response.status_code < 400, response.text
+        queries.assert_within(budget)
+        return response
+
+    note_id = within(7, "POST", f"/notes/?{user}", json={"title": "Budget", "tags": "a, b"}).json()["id"]
+    within(6, "POST", f"/notes/batch?{user}", json=[{"title": "One", "tags": "c"}, {"title": "Two"}])
+    # Fingerprint (which also checks the user), list; the repeat is served from the cache
+    within(2, "GET", f"/notes/?{user}&status=active")
+    within(0, "GET", f"/notes/?{user}&status=active")
+    within(2, "GET", f"/notes/?{user}&limit=2&view=summary")
+    within(2, "GET", f"/notes/favorites/?{user}")
+    within(1, "GET", f"/notes/{note_id}?{user}")
+    within(1, "GET", f"/notes/tags?{user}")
+    within(1, "GET", f"/notes/search?{user}&q=budget")
+    within(3, "GET", f"/notes/changes?{user}&since=0")
+    # Includes reading the replaced version and saving it as a revision
+    within(8, "PATCH", f"/notes/{note_id}?{user}", json={"title": "Budget v2", "tags": "d"})
+    within(2, "PATCH", f"/notes/{note_id}/status?{user}", json={"status": "archived"})
+    within(2, "PATCH", f"/notes/{note_id}/favorite?{user}", json={"is_favorite": True})
+    within(4, "DELETE", f"/notes/{note_id}?{user}")
+
+def test_export_notes_streams_ndjson_and_csv(client, test_user, monkeypatch):
+    monkeypatch.setattr("app.crud.EXPORT_BATCH_SIZE", 2)
+    titles = [f"Export {i}" for i in range(5)]
+    client.post(f"/notes/batch?user_id={test_user.id}", json=[{"title": t, "content": "a,\"b\"\nc"} for t in titles])
+
+    response = client.get(f"/notes/export?user_id={test_user.id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(record["title"] for record in records) == titles
+    assert records[0]["content"] == "a,\"b\"\nc"
+
+    response = client.get(f"/notes/export?user_id={test_user.id}&format=csv&gzip=true")
+    assert response.headers["content-disposition"] == 'attachment; filename="notes.csv.gz"'
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert len(rows) == 5 and rows[0]["content"] == "a,\"b\"\nc"
+
+    assert client.get(f"/notes/export?user_id={fake.uuid4()}").status_code == 404
+
+def test_import_notes_commits_chunks_and_resumes(client, test_user, monkeypatch):
+    monkeypatch.setattr("app.imports.IMPORT_CHUNK_SIZE", 2)
+    lines = [
+        json.dumps({"title": "Import 1", "tags": "imported"}),
+        "{not json",
+        json.dumps({"title": "Import 2", "content": "Body"}),
+        "",
+        json.dumps({"content": "No title"}),
+        json.dumps({"title": "Import 3", "is_favorite": True}),
+    ]
+    body = "\n".join(lines).encode()
+
+    response = client.post(f"/notes/import?user_id={test_user.id}", content=body)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["imported"], data["failed"], data["committed_lines"]) == (3, 2, 6)
+    assert [error["line"] for error in data["errors"]] == [2, 5]
+    titles = {note["title"] for note in client.get(f"/notes/?user_id={test_user.id}").json()}
+    assert titles == {"Import 1", "Import 2", "Import 3"}
+
+    # The same upload gzipped, resumed after the first three lines
+    response = client.post(f"/notes/import?user_id={test_user.id}&resume_from=3", content=gzip.compress(body))
+    assert response.json()["imported"] == 1
+    assert len(client.get(f"/notes/?user_id={test_user.id}").json()) == 4
+
+    # Chunks committed before a bad body are kept and reported for resuming
+    response = client.post(f"/notes/import?user_id={test_user.id}", content=gzip.compress(body)[:-8])
+    assert response.status_code == 400
+    assert response.json()["detail"]["committed_lines"] == 3
+    assert len(client.get(f"/notes/?user_id={test_user.id}").json()) == 6
+
+    assert client.post(f"/notes/import?user_id={fake.uuid4()}", content=body).status_code == 404
+
+def test_reads_use_replicas_until_the_user_writes(client, test_user, monkeypatch, tmp_path):
+    replica_set = replicas.ReplicaSet([f"sqlite:///{tmp_path / 'replica.db'}"], pin_seconds=60)
+    Base.metadata.create_all(bind=replica_set.replicas[0].engine)
+    replica_set.check_health()
+    monkeypatch.setattr(replicas, "replica_set", replica_set)
+
+    # The empty replica has not seen the user yet
+    assert client.get(f"/notes/?user_id={test_user.id}").status_code == 404
+
+    note_id = client.post(f"/notes/?user_id={test_user.id}", json={"title": "Fresh"}).json()["id"]
+    assert [note["id"] for note in client.get(f"/notes/?user_id={test_user.id}").json()] == [note_id]
+    assert client.get(f"/notes/{note_id}?user_id={test_user.id}").status_code == 200
+
+    # Another worker never saw the in-process pin; the cookie still pins the user
+    replica_set._pins.clear()
+    assert client.cookies.get(replicas.WRITE_COOKIE)
+    assert client.get(f"/notes/{note_id}?user_id={test_user.id}").status_code == 200
+    client.cookies.clear()
+    assert client.get(f"/notes/{note_id}?user_id={test_user.id}").status_code == 404
+    replica_set.dispose()
+
+def test_long_content_is_compressed_at_rest(client, db_session, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "content_compression", "zlib")
+    monkeypatch.setattr(settings, "content_compression_min_bytes", 512)
+    content = " ".join(fake.paragraphs(nb=30)) + " zebracorn"
+    note_id = client.post(f"/notes/?user_id={test_user.id}", json={"title": "Long", "content": content}).json()["id"]
+
+    stored = db_session.execute(
+        select(Note.content, Note.content_blob, Note.change_seq).where(Note.id == UUID(note_id))
+    ).one()
+    assert stored.content == content[:PREVIEW_LENGTH] and stored.content_blob is not None
+
+    # Reads, search, summaries and exports all see the full text
+    assert client.get(f"/notes/{note_id}?user_id={test_user.id}").json()["content"] == content
+    assert client.get(f"/notes/?user_id={test_user.id}").json()[0]["content"] == content
+    summary = client.get(f"/notes/?user_id={test_user.id}&view=summary").json()[0]
+    assert summary["preview"] == content[:PREVIEW_LENGTH] and summary["content_length"] == len(content)
+    assert client.get(f"/notes/search?user_id={test_user.id}&q=zebracorn").json()["items"][0]["id"] == note_id
+    export = json.loads(client.get(f"/notes/export?user_id={test_user.id}").text)
+    assert export["content"] == content
+
+    response = client.patch(f"/notes/{note_id}?user_id={test_user.id}", json={"content": content + " unicorn"})
+    assert response.json()["content"] == content + " unicorn"
+    assert client.get(f"/notes/search?user_id={test_user.id}&q=unicorn").json()["items"][0]["id"] == note_id
+
+    # The background rewrite decompresses once compression is switched off
+    monkeypatch.setattr(settings, "content_compression", "off")
+    change_seq = db_session.scalar(select(Note.change_seq).where(Note.id == UUID(note_id)))
+    after, rewritten = None, 0
+    while True:
+        _, written, after = recompress_notes_batch(db_session, after, batch_size=1)
+        rewritten += written
+        if after is None:
+            break
+    assert rewritten == 1
+    stored = db_session.execute(
+        select(Note.content, Note.content_blob, Note.change_seq).where(Note.id == UUID(note_id))
+    ).one()
+    assert stored == (content + " unicorn", None, change_seq)
+
+def test_note_revision_endpoints(client, test_user):
+    user = f"user_id={test_user.id}"
+    note_id = client.post(f"/notes/?{user}", json={"title": "Plan", "content": "step 1\n"}).json()["id"]
+    client.patch(f"/notes/{note_id}?{user}", json={"content": "step 1\nstep 2\n"})
+    client.patch(f"/notes/{note_id}?{user}", json={"title": "Plan v3", "content": "oops"})
+
+    listed = client.get(f"/notes/{note_id}/revisions?{user}").json()
+    assert [(r["revision"], r["title"], r["content_length"]) for r in listed] == [(2, "Plan", 14), (1, "Plan", 7)]
+    assert client.get(f"/notes/{note_id}/revisions/2?{user}").json()["content"] == "step 1\nstep 2\n"
+
+    restored = client.post(f"/notes/{note_id}/revisions/2/restore?{user}").json()
+    assert (restored["title"], restored["content"]) == ("Plan", "step 1\nstep 2\n")
+    assert client.get(f"/notes/{note_id}/revisions/3?{user}").json()["content"] == "oops"
+
+    assert client.get(f"/notes/{note_id}/revisions/9?{user}").status_code == 404
+    assert client.post(f"/notes/{note_id}/revisions/9/restore?{user}").status_code == 404
+    assert client.get(f"/notes/{fake.uuid4()}/revisions?{user}").status_code == 404
+
+def test_patch_with_if_match_rejects_stale_versions(client, test_user, count_queries):
+    user = f"user_id={test_user.id}"
+    created = client.post(f"/notes/?{user}", json={"title": "Shared", "content": "v1"}).json()
+    note_id = created["id"]
+    etag = client.get(f"/notes/{note_id}?{user}").headers["etag"]
+    assert created["version"] == 1 and etag == '"1"'
+
+    # Tab A saves first; the check is part of the UPDATE, so it costs no extra statement
+    with count_queries() as queries:
+        response = client.patch(f"/notes/{note_id}?{user}", json={"is_favorite": True}, headers={"If-Match": etag})
+    assert response.status_code == 200 and response.json()["version"] == 2
+    assert response.headers["etag"] == '"2"'
+    queries.assert_within(2)
+
+    # Tab B still holds version 1
+    response = client.patch(f"/notes/{note_id}?{user}", json={"content": "tab B"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert response.headers["etag"] == '"2"'
+    assert client.get(f"/notes/{note_id}?{user}").json()["content"] == "v1"
+
+    for header in ('W/"2"', "not-an-etag"):
+        assert client.patch(f"/notes/{note_id}?{user}", json={"title": "x"}, headers={"If-Match": header}).status_code == 412
+    for header in ('"1", "2"', "*"):
+        response = client.patch(f"/notes/{note_id}?{user}", json={"title": header}, headers={"If-Match": header})
+        assert response.status_code == 200
+    assert response.json()["version"] == 4
+
+    # Other writes bump the version too
+    client.patch(f"/notes/{note_id}/status?{user}", json={"status": "archived"})
+    assert client.get(f"/notes/{note_id}?{user}").headers["etag"] == '"5"'
+    assert client.patch(f"/notes/{fake.uuid4()}?{user}", json={"title": "x"}, headers={"If-Match": '"1"'}).status_code == 404
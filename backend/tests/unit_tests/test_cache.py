@@ -0,0 +1,36 @@
+from uuid import uuid4
+
+from app.cache import LocalLRUCache
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: clock[0])
+    cache = LocalLRUCache(max_entries=2, ttl=10)
+    user = uuid4()
+    generation = cache.generation(user)
+
+    cache.set(user, "a", (b"A", '"a"'), generation)
+    cache.set(user, "b", (b"B", '"b"'), generation)
+    assert cache.get(user, "a") == (b"A", '"a"')
+    cache.set(user, "c", (b"C", '"c"'), generation)
+
+    # "b" was least recently used
+    assert cache.get(user, "b") is None
+    clock[0] += 11
+    assert cache.get(user, "a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (1, 2, 1, 1)
+
+def test_invalidate_is_per_user_and_rejects_stale_fills():
+    cache = LocalLRUCache(max_entries=10, ttl=60)
+    writer, other = uuid4(), uuid4()
+    cache.set(writer, "list", (b"old", '"1"'), cache.generation(writer))
+    cache.set(other, "list", (b"theirs", '"2"'), cache.generation(other))
+
+    # A reader started before the write finishes after the invalidation
+    stale_generation = cache.generation(writer)
+    cache.invalidate(writer)
+    cache.set(writer, "list", (b"stale", '"3"'), stale_generation)
+
+    assert cache.get(writer, "list") is None
+    assert cache.get(other, "list") == (b"theirs", '"2"')
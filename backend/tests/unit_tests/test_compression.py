@@ -0,0 +1,44 @@
+import random
+
+import pytest
+from pydantic import ValidationError
+
+from app import compression
+from app.config import Settings
+
+LONG_TEXT = "Meeting notes: shipped the import endpoint, next up compression. " * 100
+
+def test_long_content_is_compressed_behind_a_plain_prefix():
+    values = compression.encode_content(LONG_TEXT, "zlib", min_bytes=1024, prefix_length=200)
+
+    assert values["content"] == LONG_TEXT[:200]
+    assert values["content_length"] == len(LONG_TEXT)
+    assert len(values["content_blob"]) < len(LONG_TEXT) / 10
+
+    class Row:
+        content = values["content"]
+        content_blob = values["content_blob"]
+    assert compression.note_content(Row) == LONG_TEXT
+
+@pytest.mark.parametrize("content, codec", [
+    ("short", "zlib"),  # below min_bytes
+    (LONG_TEXT, None),  # compression off
+    (random.Random(0).randbytes(2048).hex(), "zlib"),  # does not shrink enough to pay for the prefix
+])
+def test_content_stays_plain(content, codec):
+    values = compression.encode_content(content, codec, min_bytes=1024, prefix_length=2048)
+    assert values == {"content": content, "content_blob": None, "content_length": len(content)}
+
+def test_codec_resolution_and_round_trip(monkeypatch):
+    assert compression.resolve_codec("off") is None
+    monkeypatch.setattr(compression, "zstandard", None)
+    assert compression.resolve_codec("zstd") == "zlib"
+
+    text = "ünïcode ✓ " * 50
+    assert compression.decompress(compression.compress(text, "zlib")) == text
+    assert compression.sql_note_content("plain", None) == "plain"
+
+def test_content_compression_is_rejected_on_postgresql():
+    with pytest.raises(ValidationError, match="SQLite only"):
+        Settings(database_url="postgresql://notes@localhost/notes_app", content_compression="zlib")
+    assert Settings(database_url="sqlite:///./notes.db", content_compression="zlib").content_compression == "zlib"
@@ -5,10 +5,17 @@ from app.crud import (
     create_user,
     get_user_by_email,
     create_note,
+    create_notes_bulk,
     get_notes_by_user,
+    get_notes_page,
+    notes_by_user_query,
     get_note_by_id,
     update_note,
-    delete_note_permanently
+    update_note_status,
+    delete_note_permanently,
+    delete_notes_by_ids,
+    parse_tags,
+    get_tag_counts
 )
 from app.schemas import NoteCreate, NoteUpdate
 
@@ -80,3 +87,105 @@ def test_delete_note(db_session):
 
     retrieved_note = get_note_by_id(db_session, note.id, user.id)
     assert retrieved_note is None
+
+def test_get_notes_page_by_user(db_session):
+    user = create_user(db_session, fake.email())
+    db_session.commit()
+
+    for _ in range(3):
+        create_note(db_session, NoteCreate(title=fake.sentence()), user.id)
+
+    query = notes_by_user_query(db_session, user.id)
+    first_page, cursor = get_notes_page(query, limit=2)
+    assert len(first_page) == 2
+    assert cursor is not None
+
+    second_page, cursor = get_notes_page(query, limit=2, after=cursor)
+    assert len(second_page) == 1
+    assert cursor is None
+    assert [n.id for n in first_page + second_page] == [n.id for n in get_notes_by_user(db_session, user.id)]
+
+def test_parse_tags():
+    assert parse_tags(" Work, urgent,,work ,") == ["work", "urgent"]
+    assert parse_tags("") == []
+
+def test_deleting_note_removes_tag_links(db_session):
+    user = create_user(db_session, fake.email())
+    note = create_note(db_session, NoteCreate(title="Tagged", tags="solo"), user.id)
+    assert get_tag_counts(db_session, user.id) == [("solo", 1)]
+
+    delete_note_permanently(db_session, note.id, user.id)
+    assert get_tag_counts(db_session, user.id) == []
+
+def test_update_note_is_a_single_round_trip(db_session, count_queries):
+    user = create_user(db_session, fake.email())
+    note = create_note(db_session, NoteCreate(title="Before", content="Body"), user.id)
+    note_id, user_id = note.id, user.id
+
+    with count_queries() as queries:
+        # Title, content and tag edits also save a revision (see test_revisions)
+        updated = update_note(db_session, note_id, user_id, NoteUpdate(is_favorite=True))
+        archived = update_note_status(db_session, note_id, user_id, "archived")
+
+    # Previously each update was SELECT + UPDATE + refresh SELECT (3 round trips);
+    # now one UPDATE ... RETURNING, after advancing the user's change_seq
+    statements = queries.statements
+    assert len(statements) == 4
+    assert all(s.startswith("UPDATE users") for s in statements[::2])
+    assert all(s.startswith("UPDATE notes") and "RETURNING" in s for s in statements[1::2])
+    assert updated.is_favorite
+    assert archived.status == "archived"
+
+def test_count_queries_flags_lazy_loads_in_a_loop(db_session, count_queries):
+    users = [create_user(db_session, fake.email()) for _ in range(3)]
+    for user in users:
+        create_note(db_session, NoteCreate(title="Lazy"), user.id)
+
+    with count_queries() as queries:
+        for user in users:
+            assert len(user.notes) == 1
+
+    # One identical notes SELECT per user: the N+1 the budget checks reject
+    repeated = queries.repeated()
+    assert any("FROM notes" in sql and n == 3 for sql, n in repeated.items())
+
+def test_update_missing_note_returns_none(db_session):
+    user = create_user(db_session, fake.email())
+    assert update_note(db_session, fake.uuid4(), user.id, NoteUpdate(title="Nope")) is None
+    assert update_note_status(db_session, fake.uuid4(), user.id, "archived") is None
+
+def test_delete_notes_by_ids_is_scoped_and_chunked(db_session, monkeypatch):
+    owner = create_user(db_session, fake.email())
+    other = create_user(db_session, fake.email())
+    own_ids = [create_note(db_session, NoteCreate(title=f"Mine {i}"), owner.id).id for i in range(5)]
+    foreign_id = create_note(db_session, NoteCreate(title="Theirs"), other.id).id
+
+    monkeypatch.setattr("app.crud.ID_CHUNK_SIZE", 2)
+    deleted = delete_notes_by_ids(db_session, own_ids + [foreign_id, own_ids[0]], owner.id)
+
+    assert sorted(deleted) == sorted(own_ids)
+    assert get_notes_by_user(db_session, owner.id) == []
+    assert get_note_by_id(db_session, foreign_id, other.id) is not None
+
+def test_deletes_lock_the_user_before_the_notes(db_session, count_queries):
+    user = create_user(db_session, fake.email())
+    note_ids = [create_note(db_session, NoteCreate(title=f"Doomed {i}"), user.id).id for i in range(3)]
+
+    for delete in (lambda: delete_notes_by_ids(db_session, note_ids[:2], user.id),
+                   lambda: delete_note_permanently(db_session, note_ids[2], user.id)):
+        with count_queries() as queries:
+            delete()
+        # Same order as updates, so a concurrent PATCH and delete cannot deadlock
+        writes = [s for s in queries.statements if not s.startswith("SELECT")]
+        assert writes[0].startswith("UPDATE users")
+        assert any(s.startswith("DELETE FROM notes") for s in writes[1:])
+
+def test_create_notes_bulk_in_chunks(db_session, monkeypatch):
+    user = create_user(db_session, fake.email())
+    monkeypatch.setattr("app.crud.INSERT_CHUNK_SIZE", 2)
+
+    titles = [f"Bulk {i}" for i in range(5)]
+    created = create_notes_bulk(db_session, [NoteCreate(title=title) for title in titles], user.id)
+
+    assert [note.title for note in created] == titles
+    assert len(get_notes_by_user(db_session, user.id)) == 5
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.database import InstrumentedQueuePool, engine_options, pool_status
+
+
+@pytest.fixture
+def small_pool_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+
+def test_pool_status_reports_saturation_and_waits(small_pool_engine):
+    with small_pool_engine.connect():
+        status = pool_status(small_pool_engine)
+        assert status["checked_out"] == 1
+        assert status["saturation"] == 1.0
+
+        # The only connection is taken, so the next checkout times out
+        with pytest.raises(PoolTimeoutError):
+            small_pool_engine.connect()
+
+    status = pool_status(small_pool_engine)
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 1
+    assert status["timeouts"] == 1
+    assert status["max_wait_ms"] >= 50
+
+def test_engine_options_for_postgres():
+    options = engine_options("postgresql://user@localhost/notes_app")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_pre_ping"] is True
+    assert "statement_timeout" in options["connect_args"]["options"]
+
+    async_options = engine_options("postgresql://user@localhost/notes_app", is_async=True)
+    assert "statement_timeout" in async_options["connect_args"]["server_settings"]
+
+def test_engine_options_for_sqlite():
+    assert engine_options("sqlite:///./test.db") == {}
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from faker import Faker
+
+from app import events
+from app.crud import create_note, create_user, delete_notes_by_ids, update_note, update_note_status
+from app.schemas import NoteCreate, NoteUpdate
+
+fake = Faker()
+
+@pytest.fixture
+def broker(monkeypatch):
+    local_broker = events.LocalEventBroker(queue_size=4)
+    monkeypatch.setattr(events, "broker", local_broker)
+    return local_broker
+
+def test_committed_writes_reach_subscribers(db_session, broker):
+    user = create_user(db_session, fake.email())
+
+    async def scenario():
+        async with broker.subscribe(user.id) as subscription:
+            note_id = create_note(db_session, NoteCreate(title="Live"), user.id).id
+            update_note(db_session, note_id, user.id, NoteUpdate(is_favorite=True))
+            update_note_status(db_session, note_id, user.id, "archived")
+            delete_notes_by_ids(db_session, [note_id], user.id)
+            return [await subscription.get() for _ in range(4)], note_id
+
+    received, note_id = asyncio.run(scenario())
+
+    assert [e.type for e in received] == ["created", "favorite", "status", "deleted"]
+    assert received[0].notes[0].title == "Live"
+    assert received[2].notes[0].status == "archived"
+    assert received[3].deleted_ids == [note_id]
+    # Event ids follow the user's change_seq
+    assert [e.change_seq for e in received] == sorted(e.change_seq for e in received)
+    assert not broker.has_listeners(user.id)
+
+def test_rolled_back_writes_are_not_published(db_session, broker):
+    user = create_user(db_session, fake.email())
+
+    async def scenario():
+        async with broker.subscribe(user.id) as subscription:
+            events.queue_note_event(db_session, user.id, "deleted", deleted_ids=[fake.uuid4()], change_seq=1)
+            db_session.rollback()
+            await asyncio.sleep(0)
+            return subscription._queue.empty()
+
+    assert asyncio.run(scenario())
+
+def test_shared_broker_publishes_without_local_subscribers(db_session, monkeypatch):
+    class FakeSharedBroker(events.SharedEventBroker):
+        def __init__(self):
+            super().__init__()
+            self.published = []
+
+        def publish(self, user_id, note_event):
+            self.published.append((user_id, note_event.type))
+
+    shared = FakeSharedBroker()
+    monkeypatch.setattr(events, "broker", shared)
+    user = create_user(db_session, fake.email())
+    create_note(db_session, NoteCreate(title="Elsewhere"), user.id)
+
+    # The user's stream may be open on another worker
+    assert shared.published == [(user.id, "created")]
+
+def test_slow_subscriber_gets_resync_marker(db_session, broker):
+    user = create_user(db_session, fake.email())
+
+    async def scenario():
+        async with broker.subscribe(user.id) as subscription:
+            for i in range(5):
+                create_note(db_session, NoteCreate(title=f"Burst {i}"), user.id)
+            await asyncio.sleep(0)
+            return await subscription.get(), subscription.overflowed
+
+    assert asyncio.run(scenario()) == (None, True)
@@ -0,0 +1,36 @@
+import asyncio
+import gzip
+
+import pytest
+
+from app import imports
+
+def collect(chunks):
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    async def lines():
+        return [line async for line in imports.iter_lines(body())]
+
+    return asyncio.run(lines())
+
+def test_lines_split_across_chunks():
+    assert collect([b"a", b"b\nc", b"d\n", b"\ne"]) == [b"ab", b"cd", b"", b"e"]
+
+def test_gzip_is_detected_and_inflated_incrementally(monkeypatch):
+    monkeypatch.setattr(imports, "INFLATE_STEP", 16)
+    data = gzip.compress(b"first\n" * 100) + gzip.compress(b"second\n")
+    chunks = [data[i:i + 7] for i in range(0, len(data), 7)]
+
+    assert collect(chunks) == [b"first"] * 100 + [b"second"]
+
+def test_undecodable_bodies_are_rejected(monkeypatch):
+    with pytest.raises(imports.InvalidImport):
+        collect([gzip.compress(b"note\n")[:-4]])
+    with pytest.raises(imports.InvalidImport):
+        collect([b"\x1f\x8bnot gzip"])
+
+    monkeypatch.setattr(imports, "MAX_LINE_BYTES", 8)
+    with pytest.raises(imports.InvalidImport):
+        collect([b"short\n", b"much too long"])
@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.metrics import STATEMENT_TIME, Histogram, instrument_engine
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(("/notes/",), value)
+
+    lines = histogram.render()
+
+    assert 'demo_seconds_bucket{route="/notes/",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/notes/",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{route="/notes/",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{route="/notes/"} 4' in lines
+
+def test_failed_statements_leave_no_state_on_the_connection():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing_table"))
+        before = STATEMENT_TIME._values.get((), 0)
+        connection.execute(text("SELECT 1"))
+
+        assert STATEMENT_TIME._values[()] > before
+        assert not any(key.startswith("metrics") for key in connection.info)
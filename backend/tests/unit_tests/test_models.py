@@ -0,0 +1,24 @@
+import uuid
+
+from sqlalchemy import Column, MetaData, Table, create_engine, insert, select, text
+
+from app.models import GUID
+
+def test_guid_stores_sixteen_bytes_on_sqlite(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'guid.db'}")
+    items = Table(
+        "items", MetaData(),
+        Column("id", GUID, primary_key=True),
+        Column("legacy_id", GUID(binary=False)),
+    )
+    items.metadata.create_all(engine)
+    value = uuid.uuid4()
+
+    with engine.begin() as conn:
+        conn.execute(insert(items), [{"id": value, "legacy_id": str(value)}])
+        raw = conn.execute(text("SELECT id, legacy_id FROM items")).one()
+        row = conn.execute(select(items).where(items.c.id == str(value))).one()
+
+    assert raw == (value.bytes, value.hex)
+    assert row == (value, value)
+    engine.dispose()
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+from faker import Faker
+
+from app import replicas
+from app.crud import create_note, create_user
+from app.schemas import NoteCreate
+
+fake = Faker()
+
+@pytest.fixture
+def replica_set(tmp_path):
+    # Two local SQLite files stand in for replicas, plus one that cannot be opened
+    urls = [f"sqlite:///{tmp_path / name}" for name in ("a.db", "b.db", "missing/c.db")]
+    replica_set = replicas.ReplicaSet(urls, pin_seconds=60, max_lag=5)
+    yield replica_set
+    replica_set.dispose()
+
+def test_reads_round_robin_over_healthy_replicas(replica_set):
+    user_id = fake.uuid4(cast_to=None)
+    # Replicas get no reads before their first health check
+    assert replica_set.choose(user_id) is None
+
+    replica_set.check_health()
+    a, b, missing = replica_set.replicas
+    assert (a.healthy, b.healthy, missing.healthy) == (True, True, False)
+    assert missing.error == "OperationalError"
+    assert [replica_set.choose(user_id) for _ in range(4)] == [a, b, a, b]
+
+def test_lagging_and_disconnected_replicas_are_evicted(replica_set, monkeypatch):
+    user_id = fake.uuid4(cast_to=None)
+    a, b, _ = replica_set.replicas
+    monkeypatch.setattr(replicas, "replication_lag", lambda connection: 30.0)
+    replica_set.check_health()
+    assert replica_set.choose(user_id) is None
+    assert a.error == "lagging"
+
+    monkeypatch.setattr(replicas, "replication_lag", lambda connection: 0.0)
+    replica_set.check_health()
+    b.evict("disconnected")
+    assert {replica_set.choose(user_id) for _ in range(3)} == {a}
+
+def test_committed_writes_pin_the_user_to_the_primary(db_session, replica_set, monkeypatch):
+    monkeypatch.setattr(replicas, "replica_set", replica_set)
+    replica_set.check_health()
+    user = create_user(db_session, fake.email())
+    other_user_id = fake.uuid4(cast_to=None)
+
+    assert replica_set.choose(user.id) is None
+    assert replica_set.choose(other_user_id) is not None
+
+    replica_set.pin_seconds = 0
+    create_note(db_session, NoteCreate(title="Pinned"), user.id)
+    assert replica_set.choose(user.id) is not None
+
+def test_write_time_from_another_worker_pins_the_user(replica_set):
+    replica_set.check_health()
+    user_id = fake.uuid4(cast_to=None)
+
+    assert replica_set.choose(user_id, written_at=time.time() - 1) is None
+    assert replica_set.choose(user_id, written_at=time.time() - 61) is not None
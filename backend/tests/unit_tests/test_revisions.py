@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from faker import Faker
+from sqlalchemy import select, update
+
+from app import crud, revisions
+from app.config import settings
+from app.models import NoteRevision
+from app.schemas import NoteCreate, NoteUpdate
+
+fake = Faker()
+
+def body(version):
+    return "".join(f"line {line}\n" for line in range(50)) + f"edit {version}\n"
+
+@pytest.mark.parametrize("base, target", [
+    ("a\nb\nc\n", "a\nB\nc\nd"),
+    ("", "new text"),
+    ("only line", ""),
+    ("same\n", "same\n"),
+])
+def test_delta_round_trip(base, target):
+    assert revisions.apply_delta(base, revisions.make_delta(base, target)) == target
+
+def test_small_edit_to_a_long_note_stores_a_small_delta():
+    delta = revisions.make_delta(body(2), body(1))
+    assert len(delta) < 30
+    assert revisions.encode_revision(body(2), body(1), snapshot=False) == {"content": None, "delta": delta}
+    assert revisions.encode_revision(body(2), body(1), snapshot=True)["content"] == body(1)
+
+def test_every_revision_rebuilds_within_the_snapshot_interval(db_session):
+    user = crud.create_user(db_session, fake.email())
+    note = crud.create_note(db_session, NoteCreate(title="Draft", content=body(0)), user.id)
+    count = revisions.SNAPSHOT_INTERVAL * 2 + 5
+    for version in range(1, count + 1):
+        crud.update_note(db_session, note.id, user.id, NoteUpdate(content=body(version)))
+    # Favorite toggles do not change the text and save no revision
+    crud.update_note(db_session, note.id, user.id, NoteUpdate(is_favorite=True))
+
+    listed = crud.get_note_revisions(db_session, note.id, user.id)
+    assert [row.revision for row in listed] == list(range(count, 0, -1))
+    for revision in (1, revisions.SNAPSHOT_INTERVAL, count):
+        assert crud.get_note_revision(db_session, note.id, user.id, revision)["content"] == body(revision - 1)
+
+    stored = db_session.scalars(select(NoteRevision).order_by(NoteRevision.revision)).all()
+    snapshots = [row.revision for row in stored if row.delta is None]
+    assert snapshots == [revisions.SNAPSHOT_INTERVAL, revisions.SNAPSHOT_INTERVAL * 2]
+
+    assert crud.get_note_revision(db_session, note.id, user.id, count + 1) is None
+    assert crud.get_note_revisions(db_session, note.id, fake.uuid4()) is None
+
+def test_restore_saves_the_replaced_version(db_session):
+    user = crud.create_user(db_session, fake.email())
+    note = crud.create_note(db_session, NoteCreate(title="One", content="first", tags="a"), user.id)
+    crud.update_note(db_session, note.id, user.id, NoteUpdate(title="Two", content="second", tags="b"))
+
+    restored = crud.restore_note_revision(db_session, note.id, user.id, 1)
+    assert (restored.title, restored.content, restored.tags) == ("One", "first", "a")
+    latest = crud.get_note_revision(db_session, note.id, user.id, 2)
+    assert (latest["title"], latest["content"], latest["tags"]) == ("Two", "second", "b")
+
+def test_batch_update_saves_revisions(db_session):
+    user = crud.create_user(db_session, fake.email())
+    notes = crud.create_notes_bulk(db_session, [NoteCreate(title=f"N{i}", content=f"old {i}") for i in range(3)], user.id)
+    crud.update_notes_bulk(db_session, [note.id for note in notes], user.id, {"content": "new"})
+
+    for i, note in enumerate(notes):
+        assert crud.get_note_revision(db_session, note.id, user.id, 1)["content"] == f"old {i}"
+
+def test_prune_thins_old_revisions_and_keeps_the_rest_readable(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "revision_retention_days", 30)
+    monkeypatch.setattr(settings, "revision_max_per_note", 100)
+    user = crud.create_user(db_session, fake.email())
+    note = crud.create_note(db_session, NoteCreate(title="Draft", content=body(0)), user.id)
+    for version in range(1, 31):
+        crud.update_note(db_session, note.id, user.id, NoteUpdate(content=body(version)))
+
+    # Revisions 1-2 past retention, 3-10 and 11-20 autosave bursts three and
+    # two days ago, 21-30 recent
+    now = datetime(2026, 10, 18, 12, 30, tzinfo=timezone.utc)
+    for revision in range(1, 31):
+        if revision <= 2:
+            saved_at = now - timedelta(days=40)
+        elif revision <= 10:
+            saved_at = now - timedelta(days=3, seconds=60 - revision)
+        elif revision <= 20:
+            saved_at = now - timedelta(days=2, seconds=60 - revision)
+        else:
+            saved_at = now - timedelta(minutes=31 - revision)
+        db_session.execute(
+            update(NoteRevision)
+            .where(NoteRevision.note_id == note.id, NoteRevision.revision == revision)
+            .values(saved_at=saved_at)
+        )
+
+    assert crud.prune_revisions_batch(db_session, None, batch_size=10, now=now) == (1, 18, None)
+    kept = [row.revision for row in crud.get_note_revisions(db_session, note.id, user.id)]
+    assert kept == list(range(30, 19, -1)) + [10]
+    for revision in kept:
+        assert crud.get_note_revision(db_session, note.id, user.id, revision)["content"] == body(revision - 1)
+
+    # Nothing left to prune
+    assert crud.prune_revisions_batch(db_session, None, batch_size=10, now=now) == (1, 0, None)
+
+def test_prune_caps_revisions_per_note(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "revision_max_per_note", 3)
+    user = crud.create_user(db_session, fake.email())
+    note = crud.create_note(db_session, NoteCreate(title="Draft", content=body(0)), user.id)
+    for version in range(1, 6):
+        crud.update_note(db_session, note.id, user.id, NoteUpdate(content=body(version)))
+
+    assert crud.prune_revisions_batch(db_session, None, batch_size=10)[1] == 2
+    kept = [row.revision for row in crud.get_note_revisions(db_session, note.id, user.id)]
+    assert kept == [5, 4, 3]
+    assert crud.get_note_revision(db_session, note.id, user.id, 3)["content"] == body(2)
+
+def test_revision_numbers_follow_versions_and_are_never_reused(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "revision_retention_days", 30)
+    user = crud.create_user(db_session, fake.email())
+    note = crud.create_note(db_session, NoteCreate(title="Draft", content="one"), user.id)
+    crud.update_note(db_session, note.id, user.id, NoteUpdate(content="two"))
+    crud.update_note(db_session, note.id, user.id, NoteUpdate(is_favorite=True))
+    crud.update_note(db_session, note.id, user.id, NoteUpdate(content="three"))
+
+    # The favorite toggle replaced version 2 without changing its text, so
+    # no revision 2 was saved; revision 3 is version 3, replaced by "three"
+    assert [row.revision for row in crud.get_note_revisions(db_session, note.id, user.id)] == [3, 1]
+    assert crud.get_note_revision(db_session, note.id, user.id, 3)["content"] == "two"
+
+    # Pruning every revision does not restart the numbering
+    crud.prune_revisions_batch(db_session, None, batch_size=1000, now=datetime.now(timezone.utc) + timedelta(days=60))
+    assert crud.get_note_revisions(db_session, note.id, user.id) == []
+    crud.update_note(db_session, note.id, user.id, NoteUpdate(content="four"))
+    assert [row.revision for row in crud.get_note_revisions(db_session, note.id, user.id)] == [4]
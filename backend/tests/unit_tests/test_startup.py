@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app import crud, database, startup
+from app.database import Base
+from app.schemas import NoteCreate
+
+@pytest.fixture
+def fresh_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(startup.tempfile, "gettempdir", lambda: str(tmp_path))
+    engine = create_engine(f"sqlite:///{tmp_path / 'startup.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+def stamp_head(engine):
+    head = ScriptDirectory(str(startup.ALEMBIC_DIR)).get_current_head()
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        connection.execute(text("INSERT INTO alembic_version VALUES (:head)"), {"head": head})
+
+def test_schema_check_runs_once_per_deployment(fresh_engine, monkeypatch):
+    with pytest.raises(startup.SchemaOutOfDate, match="alembic upgrade head"):
+        startup.ensure_schema_current(fresh_engine)
+    assert not startup.schema_marker(fresh_engine).exists()
+
+    stamp_head(fresh_engine)
+    startup.ensure_schema_current(fresh_engine)
+    assert startup.schema_marker(fresh_engine).exists()
+
+    # Later workers trust the marker and skip the database round trip
+    def fail(engine):
+        raise AssertionError("schema checked twice")
+    monkeypatch.setattr(startup, "check_schema", fail)
+    startup.ensure_schema_current(fresh_engine)
+
+def test_migrations_build_a_fresh_database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=startup.ALEMBIC_DIR.parent,
+        env=dict(os.environ, DATABASE_URL=url),
+        check=True,
+        capture_output=True
+    )
+    engine = create_engine(url)
+    startup.check_schema(engine)
+
+    # Every mapped column exists, and the app can write and search
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        assert set(table.columns.keys()) <= columns, table.name
+    with Session(engine) as db:
+        user = crud.create_user(db, "fresh@example.com")
+        crud.create_note(db, NoteCreate(title="First note", tags="new"), user.id)
+        assert [note.title for note, _, _ in crud.search_notes(db, user.id, "first")] == ["First note"]
+    engine.dispose()
+
+def test_warm_up_fills_pool_and_statement_cache(fresh_engine):
+    startup.warm_up(fresh_engine, 2)
+
+    assert fresh_engine.pool.checkedin() == 2
+    assert len(fresh_engine._compiled_cache) >= 5
+
+def test_forked_children_get_fresh_pools(fresh_engine):
+    database.dispose_after_fork(fresh_engine)
+    parent_pool = fresh_engine.pool
+
+    database._dispose_inherited_pools()
+    assert fresh_engine.pool is not parent_pool